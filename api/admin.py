@@ -3,7 +3,10 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
 
 from .forms import UserChangeForm, UserCreationForm
-from .models import User, Comment, Review, Title, Category, Genre, Rate
+from .models import (User, Comment, Review, Title, Category, Genre, Rate,
+                     PurgeJob, Tombstone)
+from .sync import delete_facets
+from .threads import delete_thread, delete_threads
 
 
 class UserAdmin(BaseUserAdmin):
@@ -26,30 +29,91 @@ class UserAdmin(BaseUserAdmin):
     filter_horizontal = ()
     list_editable = ('role', 'username')
 
+    def delete_model(self, request, obj):
+        delete_threads(Comment.objects.filter(author=obj))
+        Tombstone.objects.record(
+            Tombstone.Kind.REVIEW,
+            Review.objects.filter(author=obj).values_list('pk', flat=True)
+        )
+        super().delete_model(request, obj)
 
-class ReviewAdmin(admin.ModelAdmin):
+    def delete_queryset(self, request, queryset):
+        delete_threads(Comment.objects.filter(author__in=queryset))
+        Tombstone.objects.record(
+            Tombstone.Kind.REVIEW,
+            Review.objects.filter(author__in=queryset)
+            .values_list('pk', flat=True)
+        )
+        super().delete_queryset(request, queryset)
+
+
+class TombstoneAdminMixin:
+    tombstone_kind = None
+
+    def delete_model(self, request, obj):
+        Tombstone.objects.record(self.tombstone_kind, [obj.pk])
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        Tombstone.objects.record(
+            self.tombstone_kind, queryset.values_list('pk', flat=True)
+        )
+        super().delete_queryset(request, queryset)
+
+
+class ReviewAdmin(TombstoneAdminMixin, admin.ModelAdmin):
+    tombstone_kind = Tombstone.Kind.REVIEW
     list_display = ("pk", "title", "text", "author", "score", "pub_date")
 
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("pk", "review", "text", "author", "pub_date")
 
+    def delete_model(self, request, obj):
+        delete_thread(obj)
+
+    def delete_queryset(self, request, queryset):
+        delete_threads(queryset)
+
 
 class RateAdmin(admin.ModelAdmin):
     list_display = ("pk", "title", "sum_vote", "count_vote")
 
 
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(TombstoneAdminMixin, admin.ModelAdmin):
+    tombstone_kind = Tombstone.Kind.TITLE
     list_display = ("pk", "name", "year", "rating", "description", "category")
 
 
+class PurgeJobAdmin(admin.ModelAdmin):
+    list_display = ("pk", "target", "object_id", "status", "created",
+                    "finished")
+    list_filter = ("status", "target")
+
+
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ("pk", "name", "slug")
 
+    def delete_model(self, request, obj):
+        delete_facets([obj], Tombstone.Kind.CATEGORY, 'category')
+
+    def delete_queryset(self, request, queryset):
+        delete_facets(
+            list(queryset), Tombstone.Kind.CATEGORY, 'category'
+        )
+
 
 class GenreAdmin(admin.ModelAdmin):
     list_display = ("pk", "name", "slug")
 
+    def delete_model(self, request, obj):
+        delete_facets([obj], Tombstone.Kind.GENRE, 'genre')
+
+    def delete_queryset(self, request, queryset):
+        delete_facets(
+            list(queryset), Tombstone.Kind.GENRE, 'genre'
+        )
+
 
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Genre, GenreAdmin)
@@ -57,5 +121,6 @@ admin.site.register(Title, TitleAdmin)
 admin.site.register(Rate, RateAdmin)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(PurgeJob, PurgeJobAdmin)
 admin.site.register(User, UserAdmin)
 admin.site.unregister(Group)
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_title
+from .models import Comment, CommentArchive, Review, ReviewArchive
+
+REVIEW_FIELDS = ('id', 'title_id', 'author_id', 'text', 'score', 'pub_date')
+COMMENT_FIELDS = (
+    'id', 'review_id', 'parent', 'path', 'depth', 'text', 'author_id',
+    'pub_date',
+)
+
+
+def get_batch_size():
+    return getattr(settings, 'ARCHIVE_BATCH_SIZE', 1000)
+
+
+def get_cutoff(days=None):
+    if days is None:
+        days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 2 * 365)
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable_reviews(cutoff):
+    # Threads move as a whole: a review stays live while any comment below
+    # it is newer than the cutoff, so paths and parents never straddle the
+    # live and the archive tables. Rows waiting for a purge job are left to
+    # the purge.
+    return (
+        Review.objects
+        .filter(
+            pub_date__lt=cutoff,
+            is_removed=False,
+            title__is_removed=False,
+            author__is_active=True,
+        )
+        .exclude(comments__pub_date__gte=cutoff)
+    )
+
+
+def archive_reviews(review_ids, cutoff):
+    with transaction.atomic():
+        reviews = archivable_reviews(cutoff).filter(pk__in=review_ids)
+        rows = list(
+            Review.objects
+            .select_for_update()
+            .filter(pk__in=reviews.values('pk'))
+            .order_by('pk')
+            .values(*REVIEW_FIELDS)
+        )
+        if not rows:
+            return 0, 0
+        moved_ids = [row['id'] for row in rows]
+        ReviewArchive.objects.bulk_create(
+            ReviewArchive(**row) for row in rows
+        )
+        comments = Comment.objects.filter(review_id__in=moved_ids)
+        archived_comments = CommentArchive.objects.bulk_create(
+            CommentArchive(**row)
+            for row in comments.order_by('pk').values(*COMMENT_FIELDS)
+        )
+        comments._raw_delete(comments.db)
+        moved = Review.objects.filter(pk__in=moved_ids)
+        moved._raw_delete(moved.db)
+    for title_id in {row['title_id'] for row in rows}:
+        invalidate_title(title_id)
+    return len(rows), len(archived_comments)
+
+
+def archive_old_rows(cutoff, dry_run=False):
+    reviews = archivable_reviews(cutoff)
+    if dry_run:
+        return (
+            reviews.count(),
+            Comment.objects.filter(review__in=reviews.values('pk')).count(),
+        )
+    archived_reviews = archived_comments = 0
+    last_id = 0
+    while True:
+        review_ids = list(
+            reviews
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:get_batch_size()]
+        )
+        if not review_ids:
+            return archived_reviews, archived_comments
+        last_id = review_ids[-1]
+        moved_reviews, moved_comments = archive_reviews(review_ids, cutoff)
+        archived_reviews += moved_reviews
+        archived_comments += moved_comments
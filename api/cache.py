@@ -0,0 +1,127 @@
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .metrics import RESPONSE_CACHE
+
+CATALOG_SCOPE = 'catalog'
+KEY_PREFIX = 'response-cache'
+
+
+def title_scope(title_id):
+    return f'title:{title_id}'
+
+
+class ResponseCache:
+    def __init__(self, alias='default', timeout=300):
+        self.alias = alias
+        self.timeout = timeout
+        self._counters = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def version_key(self, scope):
+        return f'{KEY_PREFIX}:version:{scope}'
+
+    def versions(self, scopes):
+        keys = [self.version_key(scope) for scope in scopes]
+        found = self.cache.get_many(keys)
+        versions = []
+        for key in keys:
+            if key not in found:
+                # Versions start from the current time, so a version key
+                # evicted from the cache can never resurrect old entries.
+                self.cache.add(key, time.time_ns(), None)
+                found[key] = self.cache.get(key)
+            versions.append(found[key])
+        return versions
+
+    def bump(self, *scopes):
+        for scope in scopes:
+            key = self.version_key(scope)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, time.time_ns(), None)
+
+    def make_key(self, name, scopes, request):
+        versions = '.'.join(str(v) for v in self.versions(scopes))
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        return f'{KEY_PREFIX}:{name}:{versions}:{params}'
+
+    def get(self, key):
+        cached = self.cache.get(key)
+        self.count('hits' if cached is not None else 'misses')
+        return cached
+
+    def set(self, key, response):
+        self.cache.set(
+            key, (response.data, response.status_code), self.timeout
+        )
+
+    def count(self, counter):
+        RESPONSE_CACHE.labels(counter).inc()
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+response_cache = ResponseCache(
+    alias=getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default'),
+    timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300),
+)
+
+
+class CachedResponseMixin:
+    cached_actions = ()
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def cached(self, handler, request, *args, **kwargs):
+        if self.action not in self.cached_actions:
+            return handler(request, *args, **kwargs)
+        kwargs_part = ','.join(
+            f'{name}={value}' for name, value in sorted(self.kwargs.items())
+        )
+        key = response_cache.make_key(
+            f'{self.__class__.__name__}.{self.action}.{kwargs_part}',
+            self.get_cache_scopes(),
+            request,
+        )
+        cached = response_cache.get(key)
+        if cached is not None:
+            data, status = cached
+            return Response(data, status=status, headers={'X-Cache': 'HIT'})
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response_cache.set(key, response)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+
+def invalidate_title(title_id, catalog=False):
+    scopes = [title_scope(title_id)]
+    if catalog:
+        scopes.append(CATALOG_SCOPE)
+    response_cache.bump(*scopes)
+
+
+def invalidate_catalog():
+    response_cache.bump(CATALOG_SCOPE)
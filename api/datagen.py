@@ -0,0 +1,314 @@
+import csv
+import io
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import (Category, CategoryStat, Comment, Genre, GenreStat, Rate,
+                     Review, Title, User, path_segment)
+from .ratings import SCORES
+from .stats import rebuild_stats
+
+CORPUS_FILES = ('review.csv', 'comments.csv')
+MAX_PAIR_ROUNDS = 20
+
+
+def load_corpus():
+    texts = []
+    for name in CORPUS_FILES:
+        path = os.path.join(settings.BASE_DIR, 'data', name)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as source:
+                texts.extend(row['text'] for row in csv.DictReader(source))
+    return texts or ['text']
+
+
+def zipf_weights(rng, size, skew):
+    # Popularity follows 1 / rank ** skew; ranks are shuffled so that
+    # popular objects are spread over the id range.
+    weights = 1 / np.arange(1, size + 1) ** skew
+    return rng.permutation(weights / weights.sum())
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def insert_rows(model, columns, rows, batch_size):
+    ops = connection.ops
+    adapt = ops.adapt_datetimefield_value
+    table = ops.quote_name(model._meta.db_table)
+    names = ', '.join(ops.quote_name(column) for column in columns)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            if connection.vendor == 'postgresql':
+                buffer = io.StringIO()
+                for row in batch:
+                    buffer.write('\t'.join(map(copy_value, row)))
+                    buffer.write('\n')
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f'COPY {table} ({names}) FROM STDIN', buffer
+                )
+            else:
+                cursor.executemany(
+                    f'INSERT INTO {table} ({names}) VALUES '
+                    f'({", ".join(["%s"] * len(columns))})',
+                    [
+                        [
+                            adapt(value) if isinstance(value, datetime)
+                            else value
+                            for value in row
+                        ]
+                        for row in batch
+                    ],
+                )
+
+
+def reset_sequences(models):
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def random_dates(rng, start, end, size):
+    span = (end - start).total_seconds()
+    offsets = rng.random(size) * span
+    return [start + timedelta(seconds=offset) for offset in offsets.tolist()]
+
+
+def sample_pairs(rng, size, left_weights, right_weights):
+    right_size = len(right_weights)
+    capacity = len(left_weights) * right_size
+    size = min(size, capacity)
+    keys = np.empty(0, dtype=np.int64)
+    for _ in range(MAX_PAIR_ROUNDS):
+        missing = size - len(keys)
+        if missing <= 0:
+            break
+        draw = int(missing * 1.2) + 16
+        left = rng.choice(len(left_weights), draw, p=left_weights)
+        right = rng.choice(right_size, draw, p=right_weights)
+        keys = np.unique(np.concatenate([keys, left * right_size + right]))
+    if len(keys) > size:
+        keys = rng.choice(keys, size, replace=False)
+    keys = rng.permutation(keys)
+    return keys // right_size, keys % right_size
+
+
+def generate(seed=0, users=1000, categories=10, genres=30, titles=1000,
+             reviews=20000, comments=50000, skew=1.1, days=3 * 365,
+             batch_size=10000):
+    rng = np.random.default_rng(seed)
+    corpus = load_corpus()
+    now = timezone.now()
+    since = now - timedelta(days=days)
+    tag = f'gen{seed}'
+    counts = {}
+
+    with transaction.atomic():
+        user_id = next_id(User)
+        user_ids = np.arange(user_id, user_id + users)
+        password = make_password(None)
+        joined = random_dates(rng, since, now, users)
+        insert_rows(
+            User,
+            ['id', 'password', 'is_superuser', 'is_staff', 'is_active',
+             'date_joined', 'username', 'email', 'role'],
+            [
+                (pk, password, False, False, True, joined[number],
+                 f'{tag}_user{number}', f'{tag}_user{number}@yamdb.fake',
+                 'user')
+                for number, pk in enumerate(user_ids.tolist())
+            ],
+            batch_size,
+        )
+        counts['users'] = users
+
+        category_id = next_id(Category)
+        category_ids = np.arange(category_id, category_id + categories)
+        insert_rows(
+            Category,
+            ['id', 'name', 'slug', 'updated_at'],
+            [
+                (pk, f'Category {tag}-{number}', f'{tag}-category-{number}',
+                 now)
+                for number, pk in enumerate(category_ids.tolist())
+            ],
+            batch_size,
+        )
+        genre_id = next_id(Genre)
+        genre_ids = np.arange(genre_id, genre_id + genres)
+        insert_rows(
+            Genre,
+            ['id', 'name', 'slug', 'updated_at'],
+            [
+                (pk, f'Genre {number}', f'{tag}-genre-{number}', now)
+                for number, pk in enumerate(genre_ids.tolist())
+            ],
+            batch_size,
+        )
+        counts['categories'], counts['genres'] = categories, genres
+
+        title_weights = zipf_weights(rng, titles, skew)
+        user_weights = zipf_weights(rng, users, skew)
+        review_titles, review_authors = sample_pairs(
+            rng, reviews, title_weights, user_weights
+        )
+        # Every title gets a hidden quality, reviews scatter around it.
+        quality = rng.normal(7, 1.5, titles)
+        scores = np.clip(
+            np.rint(rng.normal(quality[review_titles], 2)), 1, 10
+        ).astype(np.int64)
+        sums = np.bincount(review_titles, weights=scores, minlength=titles)
+        sums = sums.astype(np.int64)
+        votes = np.bincount(review_titles, minlength=titles)
+        buckets = {
+            score: np.bincount(
+                review_titles[scores == score], minlength=titles
+            )
+            for score in SCORES
+        }
+
+        title_id = next_id(Title)
+        title_ids = np.arange(title_id, title_id + titles)
+        years = rng.integers(1900, now.year + 1, titles)
+        title_categories = category_ids[
+            rng.choice(categories, titles, p=zipf_weights(rng, categories, 1))
+        ]
+        insert_rows(
+            Title,
+            ['id', 'name', 'year', 'rating', 'is_removed', 'description',
+             'category_id', 'updated_at'],
+            [
+                (pk, f'Title {tag}-{number}', year,
+                 total // count if count else None, False,
+                 corpus[rng.integers(len(corpus))], category, now)
+                for number, (pk, year, total, count, category) in enumerate(
+                    zip(title_ids.tolist(), years.tolist(), sums.tolist(),
+                        votes.tolist(), title_categories.tolist())
+                )
+            ],
+            batch_size,
+        )
+        genre_weights = zipf_weights(rng, genres, 1)
+        title_genres = [
+            (int(pk), int(genre_ids[genre]))
+            for pk in title_ids
+            for genre in rng.choice(
+                genres, rng.integers(1, min(3, genres) + 1),
+                replace=False, p=genre_weights,
+            )
+        ]
+        insert_rows(
+            Title.genre.through, ['title_id', 'genre_id'], title_genres,
+            batch_size,
+        )
+        insert_rows(
+            Rate,
+            ['title_id', 'sum_vote', 'count_vote']
+            + [f'votes_{score}' for score in SCORES],
+            [
+                (pk, total, count, *bucket_counts)
+                for pk, total, count, *bucket_counts in zip(
+                    title_ids.tolist(), sums.tolist(), votes.tolist(),
+                    *(buckets[score].tolist() for score in SCORES)
+                )
+            ],
+            batch_size,
+        )
+        counts['titles'] = titles
+
+        review_id = next_id(Review)
+        review_ids = np.arange(review_id, review_id + len(review_titles))
+        review_dates = random_dates(rng, since, now, len(review_ids))
+        review_texts = rng.integers(len(corpus), size=len(review_ids))
+        insert_rows(
+            Review,
+            ['id', 'title_id', 'text', 'author_id', 'score', 'pub_date',
+             'is_removed', 'updated_at'],
+            [
+                (pk, title, corpus[text], author, score, date, False, date)
+                for pk, title, author, score, text, date in zip(
+                    review_ids.tolist(),
+                    title_ids[review_titles].tolist(),
+                    user_ids[review_authors].tolist(),
+                    scores.tolist(),
+                    review_texts.tolist(),
+                    review_dates,
+                )
+            ],
+            batch_size,
+        )
+        counts['reviews'] = len(review_ids)
+
+        if len(review_ids) and comments:
+            # Reviews of popular titles attract most of the discussion.
+            review_weights = title_weights[review_titles]
+            review_weights = review_weights / review_weights.sum()
+            comment_reviews = rng.choice(
+                len(review_ids), comments, p=review_weights
+            )
+            comment_authors = rng.choice(users, comments, p=user_weights)
+            comment_texts = rng.integers(len(corpus), size=comments)
+            delays = rng.random(comments)
+            comment_dates = [
+                review_dates[review] + (now - review_dates[review]) * delay
+                for review, delay in zip(
+                    comment_reviews.tolist(), delays.tolist()
+                )
+            ]
+            comment_id = next_id(Comment)
+            insert_rows(
+                Comment,
+                ['id', 'review_id', 'path', 'depth', 'text', 'author_id',
+                 'pub_date', 'updated_at'],
+                [
+                    (pk, int(review_ids[review]), path_segment(pk), 0,
+                     corpus[text], author, date, date)
+                    for pk, review, author, text, date in zip(
+                        range(comment_id, comment_id + comments),
+                        comment_reviews.tolist(),
+                        user_ids[comment_authors].tolist(),
+                        comment_texts.tolist(),
+                        comment_dates,
+                    )
+                ],
+                batch_size,
+            )
+            counts['comments'] = comments
+        else:
+            counts['comments'] = 0
+
+        reset_sequences([
+            User, Category, Genre, Title, Title.genre.through, Rate,
+            Review, Comment,
+        ])
+        rebuild_stats(CategoryStat, category_ids.tolist())
+        rebuild_stats(GenreStat, genre_ids.tolist())
+    return counts
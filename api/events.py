@@ -0,0 +1,223 @@
+import asyncio
+import json
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+EVENTS_PATH = re.compile(r'^/api/v1/events/titles/(?P<title_id>\d+)/$')
+NOTIFY_CHANNEL = 'yamdb_events'
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes and more.
+MAX_NOTIFY_BYTES = 7900
+
+
+def get_heartbeat():
+    return getattr(settings, 'EVENTS_HEARTBEAT', 15)
+
+
+def get_queue_size():
+    return getattr(settings, 'EVENTS_QUEUE_SIZE', 100)
+
+
+class Subscription:
+    def __init__(self, title_id, size):
+        self.title_id = title_id
+        self.queue = asyncio.Queue(size)
+        self.overflowed = False
+
+
+class Broadcaster:
+    """Fans events out to the subscribers of this process.
+
+    Every open stream costs one bounded queue, a stream that does not keep
+    up is dropped and its client reconnects.
+    """
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.loop = None
+        self.started = None
+
+    async def start(self):
+        loop = asyncio.get_event_loop()
+        if self.started is not loop:
+            self.loop = self.started = loop
+            await get_backend().start(self)
+
+    def subscribe(self, title_id):
+        subscription = Subscription(title_id, get_queue_size())
+        self.subscribers[title_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscribers = self.subscribers.get(subscription.title_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self.subscribers[subscription.title_id]
+
+    def publish(self, message):
+        for subscription in list(self.subscribers.get(message['title'], ())):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+    def publish_threadsafe(self, message):
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.publish, message)
+
+
+broadcaster = Broadcaster()
+
+
+class LocalBackend:
+    """Delivers events to the streams of the publishing process only."""
+
+    async def start(self, broadcaster):
+        pass
+
+    def publish(self, message):
+        broadcaster.publish_threadsafe(message)
+
+
+def notify_payload(message):
+    payload = json.dumps(message, cls=DjangoJSONEncoder)
+    if len(payload.encode()) <= MAX_NOTIFY_BYTES:
+        return payload
+    # Clients refetch the object by id when the body did not fit.
+    return json.dumps({
+        **message, 'data': {'id': message['data'].get('id')},
+        'truncated': True,
+    })
+
+
+class PostgresBackend:
+    """Fans events out to every process through LISTEN/NOTIFY."""
+
+    def publish(self, message):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)',
+                [NOTIFY_CHANNEL, notify_payload(message)]
+            )
+
+    async def start(self, broadcaster):
+        loop = asyncio.get_event_loop()
+        # Opening a connection is blocking, so it is done off the loop.
+        listener = await loop.run_in_executor(
+            None,
+            lambda: connection.get_new_connection(
+                connection.get_connection_params()
+            )
+        )
+        listener.autocommit = True
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+
+        def receive():
+            listener.poll()
+            while listener.notifies:
+                notify = listener.notifies.pop(0)
+                broadcaster.publish(json.loads(notify.payload))
+
+        loop.add_reader(listener.fileno(), receive)
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(
+        getattr(settings, 'EVENTS_BACKEND', 'api.events.LocalBackend')
+    )()
+
+
+def publish_event(title_id, event, data):
+    message = {'title': int(title_id), 'event': event, 'data': data}
+    transaction.on_commit(lambda: get_backend().publish(message))
+
+
+def format_event(message):
+    data = json.dumps(message['data'], cls=DjangoJSONEncoder)
+    return f'event: {message["event"]}\ndata: {data}\n\n'.encode()
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream_events(subscription, receive, send):
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        while not disconnected.done():
+            getter = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                [getter, disconnected],
+                timeout=get_heartbeat(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter in done:
+                body = format_event(getter.result())
+            else:
+                getter.cancel()
+                if disconnected.done() or subscription.overflowed:
+                    break
+                body = b': ping\n\n'
+            await send({
+                'type': 'http.response.body', 'body': body, 'more_body': True
+            })
+    finally:
+        disconnected.cancel()
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await broadcaster.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def events_application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    match = EVENTS_PATH.match(scope['path'])
+    if match is None or scope['method'] != 'GET':
+        await send({
+            'type': 'http.response.start',
+            'status': 404,
+            'headers': [(b'content-type', b'text/plain')],
+        })
+        await send({'type': 'http.response.body', 'body': b'Not Found'})
+        return
+    await broadcaster.start()
+    subscription = broadcaster.subscribe(int(match['title_id']))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'retry: 5000\n\n',
+            'more_body': True,
+        })
+        await stream_events(subscription, receive, send)
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,136 @@
+from base64 import b64decode, b64encode
+from binascii import Error as Base64Error
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import Comment, Review
+from .serializers import FeedCommentSerializer, ReviewSerializer
+
+
+class FeedSource:
+    def __init__(self, kind, rank, queryset, serializer_class, title_path):
+        self.kind = kind
+        self.rank = rank
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self.title_path = title_path
+
+    def filter(self, category=None, genre=None):
+        queryset = self.queryset
+        if category:
+            queryset = queryset.filter(
+                **{f'{self.title_path}__category__slug': category}
+            )
+        if genre:
+            queryset = queryset.filter(
+                **{f'{self.title_path}__genre__slug': genre}
+            )
+        return queryset
+
+    def after(self, queryset, cursor):
+        if cursor is None:
+            return queryset
+        pub_date, rank, pk = cursor
+        if self.rank < rank:
+            return queryset.filter(pub_date__lte=pub_date)
+        if self.rank > rank:
+            return queryset.filter(pub_date__lt=pub_date)
+        return queryset.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )
+
+    def key(self, obj):
+        return obj.pub_date, self.rank, obj.pk
+
+    def serialize(self, obj):
+        return {'type': self.kind, **self.serializer_class(obj).data}
+
+
+FEED_SOURCES = [
+    FeedSource(
+        'review',
+        1,
+        Review.objects.filter(
+            is_removed=False,
+            title__is_removed=False,
+            author__is_active=True
+        ).select_related('author', 'title'),
+        ReviewSerializer,
+        'title',
+    ),
+    FeedSource(
+        'comment',
+        0,
+        Comment.objects.filter(
+            review__is_removed=False,
+            review__title__is_removed=False,
+            author__is_active=True
+        ).select_related('author', 'review'),
+        FeedCommentSerializer,
+        'review__title',
+    ),
+]
+
+
+class FeedCursorPagination:
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            pub_date, rank, pk = (
+                b64decode(encoded.encode('ascii')).decode('ascii').split('|')
+            )
+            pub_date = parse_datetime(pub_date)
+            rank, pk = int(rank), int(pk)
+        except (Base64Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, rank, pk
+
+    def encode_cursor(self, key):
+        pub_date, rank, pk = key
+        raw = f'{pub_date.isoformat()}|{rank}|{pk}'
+        return b64encode(raw.encode('ascii')).decode('ascii')
+
+    def paginate(self, request, sources, **filters):
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        candidates = []
+        for source in sources:
+            queryset = source.after(source.filter(**filters), cursor)
+            queryset = queryset.order_by('-pub_date', '-pk')[:page_size + 1]
+            candidates.extend(
+                (source.key(obj), source, obj) for obj in queryset
+            )
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        page = candidates[:page_size]
+        next_url = None
+        if len(candidates) > page_size:
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                self.cursor_query_param,
+                self.encode_cursor(page[-1][0]),
+            )
+        return Response({
+            'next': next_url,
+            'results': [source.serialize(obj) for _, source, obj in page],
+        })
@@ -0,0 +1,98 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+KEY_PREFIX = 'idempotency'
+MAX_KEY_LENGTH = 255
+
+
+def get_cache():
+    return caches[getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', 'default')]
+
+
+def get_ttl():
+    return getattr(settings, 'IDEMPOTENCY_TTL', 600)
+
+
+def get_lock_timeout():
+    return getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 30)
+
+
+class RequestInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is in progress'
+    default_code = 'request_in_progress'
+
+
+class KeyReused(APIException):
+    status_code = 422
+    default_detail = 'Idempotency-Key was already used with another body'
+    default_code = 'idempotency_key_reused'
+
+
+def fingerprint(data):
+    items = data.lists() if hasattr(data, 'lists') else data.items()
+    body = json.dumps(sorted(items), sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class IdempotentCreateMixin:
+    """Replays the stored response of a create retried with the same key.
+
+    Keys are scoped to the user and the URL. While the first request runs
+    its key is locked, so a concurrent retry gets 409 instead of creating
+    a duplicate; only successful responses are stored.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({
+                HEADER: f'Ensure this value has at most {MAX_KEY_LENGTH} '
+                        f'characters'
+            })
+        cache = get_cache()
+        user = request.user.pk if request.user.is_authenticated else 'anon'
+        digest = hashlib.sha256(
+            f'{user}:{request.path}:{key}'.encode()
+        ).hexdigest()
+        response_key = f'{KEY_PREFIX}:response:{digest}'
+        lock_key = f'{KEY_PREFIX}:lock:{digest}'
+        body = fingerprint(request.data)
+
+        stored = cache.get(response_key)
+        if stored is not None:
+            return self.replay(stored, body)
+        if not cache.add(lock_key, body, get_lock_timeout()):
+            raise RequestInProgress()
+        try:
+            # The first request may have finished between the two lookups.
+            stored = cache.get(response_key)
+            if stored is not None:
+                return self.replay(stored, body)
+            response = super().create(request, *args, **kwargs)
+            if status.is_success(response.status_code):
+                cache.set(
+                    response_key,
+                    (body, response.data, response.status_code),
+                    get_ttl()
+                )
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    def replay(self, stored, body):
+        stored_body, data, status_code = stored
+        if stored_body != body:
+            raise KeyReused()
+        return Response(
+            data, status=status_code, headers={'Idempotent-Replayed': 'true'}
+        )
@@ -0,0 +1,190 @@
+import json
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache import invalidate_catalog, invalidate_title
+from .models import Review, ReviewArchive, Title, User
+from .ratings import apply_votes, live_rating, live_titles
+from .serializers import ReviewIngestSerializer
+
+
+def get_chunk_size():
+    return getattr(settings, 'INGEST_CHUNK_SIZE', 1000)
+
+
+def get_max_errors():
+    return getattr(settings, 'INGEST_MAX_ERRORS', 100)
+
+
+def get_max_line_bytes():
+    return getattr(settings, 'INGEST_MAX_LINE_BYTES', 64 * 1024)
+
+
+class IngestReport:
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def read_lines(stream, max_bytes):
+    # readline() is capped, so one endless line can not pull the whole
+    # upload into memory: its tail is skipped up to the next newline and
+    # the line is yielded as None.
+    number = 0
+    while True:
+        line = stream.readline(max_bytes + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > max_bytes and not line.endswith(b'\n'):
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_bytes)
+            yield number, None
+            continue
+        line = line.strip()
+        if line:
+            yield number, line
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_chunk(chunk, errors):
+    rows = []
+    for number, line in chunk:
+        if line is None:
+            errors[number] = {'non_field_errors': [
+                f'Line is longer than {get_max_line_bytes()} bytes'
+            ]}
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            errors[number] = {'non_field_errors': ['Invalid JSON']}
+            continue
+        if not isinstance(data, dict):
+            errors[number] = {'non_field_errors': ['Expected a JSON object']}
+            continue
+        serializer = ReviewIngestSerializer(data=data)
+        if not serializer.is_valid():
+            errors[number] = serializer.errors
+            continue
+        rows.append((number, serializer.validated_data))
+    return rows
+
+
+def resolve_chunk(rows, errors):
+    title_ids = set(
+        Title.objects
+        .filter(pk__in={row['title'] for _, row in rows}, is_removed=False)
+        .values_list('pk', flat=True)
+    )
+    author_ids = dict(
+        User.objects
+        .filter(
+            username__in={row['author'] for _, row in rows}, is_active=True
+        )
+        .values_list('username', 'pk')
+    )
+    pairs = {
+        (row['title'], author_ids[row['author']])
+        for _, row in rows
+        if row['title'] in title_ids and row['author'] in author_ids
+    }
+    taken = set()
+    for model in (Review, ReviewArchive):
+        taken.update(
+            pair for pair in (
+                model.objects
+                .filter(
+                    title_id__in={title for title, _ in pairs},
+                    author_id__in={author for _, author in pairs},
+                )
+                .values_list('title_id', 'author_id')
+            )
+            if pair in pairs
+        )
+    reviews = []
+    for number, row in rows:
+        if row['title'] not in title_ids:
+            errors[number] = {'title': ['Title not found']}
+            continue
+        if row['author'] not in author_ids:
+            errors[number] = {'author': ['User not found']}
+            continue
+        pair = (row['title'], author_ids[row['author']])
+        if pair in taken:
+            errors[number] = {
+                'non_field_errors': ['You can not write second review']
+            }
+            continue
+        taken.add(pair)
+        reviews.append(Review(
+            title_id=pair[0], author_id=pair[1], text=row['text'],
+            score=row['score'],
+        ))
+    return reviews
+
+
+def insert_chunk(reviews):
+    scores = defaultdict(list)
+    for review in reviews:
+        scores[review.title_id].append(review.score)
+    changed = set()
+    with transaction.atomic():
+        Review.objects.bulk_create(reviews)
+        ratings = {
+            title.pk: live_rating(title)
+            for title in live_titles().filter(pk__in=scores).only('rating')
+        }
+        for title_id in sorted(scores):
+            if apply_votes(title_id, added=scores[title_id]) \
+                    != ratings[title_id]:
+                changed.add(title_id)
+    return changed
+
+
+def ingest_reviews(stream):
+    report = IngestReport(get_max_errors())
+    title_ids = set()
+    catalog = False
+    lines = read_lines(stream, get_max_line_bytes())
+    for chunk in chunked(lines, get_chunk_size()):
+        errors = {}
+        reviews = resolve_chunk(parse_chunk(chunk, errors), errors)
+        for number in sorted(errors):
+            report.error(number, errors[number])
+        if not reviews:
+            continue
+        catalog |= bool(insert_chunk(reviews))
+        report.created += len(reviews)
+        title_ids.update(review.title_id for review in reviews)
+    for title_id in title_ids:
+        invalidate_title(title_id)
+    if catalog:
+        invalidate_catalog()
+    return report.as_dict()
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.archive import archive_old_rows, get_cutoff
+from api.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = ('Переносит старые отзывы вместе с ветками комментариев '
+            'в архивные таблицы; Rate и рейтинги не меняются. '
+            'Заодно удаляет устаревшие записи об удалениях для синхронизации')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='возраст, старше которого ветка уходит в архив '
+                 '(по умолчанию ARCHIVE_AFTER_DAYS)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='только посчитать, сколько строк попадёт в архив',
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is not None and days < 0:
+            raise CommandError('--days must not be negative')
+        reviews, comments = archive_old_rows(
+            get_cutoff(days), dry_run=options['dry_run']
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Would archive {reviews} reviews and {comments} comments'
+            ))
+            return
+        tombstones = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {reviews} reviews and {comments} comments, '
+            f'pruned {tombstones} tombstones'
+        ))
@@ -0,0 +1,98 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils.module_loading import import_string
+
+from api.middleware import LeanAPIMixin
+
+
+def stock_middleware(paths):
+    """The MIDDLEWARE list with every lean middleware swapped back."""
+    stock = []
+    for path in paths:
+        middleware = import_string(path)
+        if issubclass(middleware, LeanAPIMixin):
+            base = middleware.__bases__[-1]
+            path = f'{base.__module__}.{base.__qualname__}'
+        stock.append(path)
+    return stock
+
+
+def build_chain(paths, path):
+    # The same wiring as BaseHandler, around a view that does nothing.
+    match = resolve(path)
+
+    def endpoint(request):
+        return HttpResponse()
+
+    view_middleware = []
+
+    def view(request):
+        request.resolver_match = match
+        for process_view in view_middleware:
+            response = process_view(request, endpoint, (), {})
+            if response is not None:
+                return response
+        return endpoint(request)
+
+    handler = view
+    for middleware_path in reversed(paths):
+        middleware = import_string(middleware_path)(handler)
+        if hasattr(middleware, 'process_view'):
+            view_middleware.insert(0, middleware.process_view)
+        handler = middleware
+    return handler
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает накладные расходы стандартного и облегчённого '
+            'набора middleware на один запрос к API')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='/api/v1/titles/',
+            help='адрес запроса',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20000,
+            help='сколько запросов прогнать в одном замере',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=5,
+            help='сколько замеров сделать, берётся лучший',
+        )
+
+    def measure(self, paths, options):
+        chain = build_chain(paths, options['path'])
+        factory = RequestFactory()
+        best = None
+        for _ in range(options['rounds']):
+            start = time.perf_counter()
+            for _ in range(options['requests']):
+                chain(factory.get(options['path']))
+            elapsed = (time.perf_counter() - start) / options['requests']
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        baseline = self.measure([], options)
+        stock = self.measure(stock_middleware(settings.MIDDLEWARE), options)
+        lean = self.measure(settings.MIDDLEWARE, options)
+        for name, elapsed in (('stock', stock), ('lean', lean)):
+            self.stdout.write(
+                f'{name:>5}: {(elapsed - baseline) * 1e6:8.1f} us '
+                f'per request over a bare view'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Saved {(stock - lean) * 1e6:.1f} us per request '
+            f'on {options["path"]}'
+        ))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.snapshot import (build_snapshot, catalog_marks, is_settled,
+                          is_stale, read_manifest)
+
+
+class Command(BaseCommand):
+    help = ('Собирает сжатый снимок каталога произведений, категорий и '
+            'жанров, если каталог изменился')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='не завершаться, а пересобирать снимок после изменений',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='пауза между проверками в режиме --loop, секунды',
+        )
+
+    def handle(self, *args, **options):
+        dirty_since = None
+        while True:
+            marks = catalog_marks()
+            if is_stale(read_manifest(), marks):
+                now = timezone.now()
+                dirty_since = dirty_since or now
+                if not options['loop'] or is_settled(marks, dirty_since, now):
+                    manifest = build_snapshot()
+                    dirty_since = None
+                    self.stdout.write(
+                        f'Built catalog snapshot {manifest["version"]} '
+                        f'({manifest["titles"]} titles, '
+                        f'{manifest["size"]} bytes)'
+                    )
+            else:
+                dirty_since = None
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
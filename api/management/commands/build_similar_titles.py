@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from api.recommendations import build_similar_titles, get_changed_title_ids
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает списки похожих произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--changed',
+            action='store_true',
+            help='пересчитать только произведения с новыми отзывами',
+        )
+        parser.add_argument(
+            '--titles',
+            type=lambda value: [int(pk) for pk in value.split(',')],
+            help='id произведений через запятую',
+        )
+        parser.add_argument('--top-k', type=int)
+        parser.add_argument('--genre-weight', type=float)
+        parser.add_argument(
+            '--memory-mb',
+            type=int,
+            help='бюджет памяти на блок матрицы сходства, МБ',
+        )
+
+    def handle(self, *args, **options):
+        title_ids = options['titles']
+        if options['changed']:
+            title_ids = (title_ids or []) + get_changed_title_ids()
+            if not title_ids:
+                self.stdout.write('Nothing to refresh')
+                return
+        stored = build_similar_titles(
+            only_title_ids=title_ids,
+            top_k=options['top_k'],
+            genre_weight=options['genre_weight'],
+            memory_mb=options['memory_mb'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {stored} similar title pairs'
+        ))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.ratings import flush_rating_deltas
+
+
+class Command(BaseCommand):
+    help = ('Переносит накопленные изменения оценок в Rate и Title.rating '
+            '(режим RATING_WRITE_BEHIND)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='не завершаться, а переносить изменения периодически',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='пауза между переносами в режиме --loop, секунды',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='сколько изменений переносить в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            folded = flush_rating_deltas(options['batch_size'])
+            if folded:
+                self.stdout.write(f'Folded {folded} rating deltas')
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import invalidate_catalog
+from api.datagen import generate
+
+
+class Command(BaseCommand):
+    help = ('Генерирует воспроизводимый по seed набор пользователей, '
+            'произведений, отзывов и комментариев для нагрузочных тестов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='показатель распределения Ципфа для популярности',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=3 * 365,
+            help='за сколько дней распределить даты публикаций',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='сколько строк записывать одной командой',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('users', 'categories', 'genres', 'titles'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} must be positive')
+        started = time.monotonic()
+        counts = generate(
+            seed=options['seed'],
+            users=options['users'],
+            categories=options['categories'],
+            genres=options['genres'],
+            titles=options['titles'],
+            reviews=options['reviews'],
+            comments=options['comments'],
+            skew=options['skew'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+        )
+        invalidate_catalog()
+        elapsed = time.monotonic() - started
+        rows = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{count} {name}' for name, count in counts.items())
+            + f' in {elapsed:.1f}s ({rows / max(elapsed, 1e-6):.0f} rows/s)'
+        ))
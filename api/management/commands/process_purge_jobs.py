@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.purge import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = ('Выполняет отложенное удаление произведений, отзывов '
+            'и пользователей')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='не завершаться, а ждать новых заданий',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='пауза между проверками очереди в режиме --loop, секунды',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_job()
+            if job is None:
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            run_job(job)
+            if job.status == job.Status.DONE:
+                self.stdout.write(self.style.SUCCESS(str(job)))
+            else:
+                self.stdout.write(self.style.ERROR(f'{job} {job.error}'))
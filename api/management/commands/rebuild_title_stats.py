@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.models import CategoryStat, GenreStat
+from api.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает с нуля статистику категорий и жанров: '
+            'количество произведений, средний рейтинг и лучшие произведения')
+
+    def handle(self, *args, **options):
+        categories = rebuild_stats(CategoryStat)
+        genres = rebuild_stats(GenreStat)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt stats for {categories} categories and {genres} genres'
+        ))
@@ -0,0 +1,137 @@
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Rate, RatingDelta, Title
+from api.ratings import (VOTE_FIELDS, add_vote_changes, calculate_rating,
+                         collect_votes, discard_rating_deltas, empty_votes)
+from api.stats import snapshot, update_stats
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает Rate.sum_vote/count_vote, гистограмму оценок '
+            'и Title.rating по таблице Review и исправляет расхождения')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='только показать расхождения, ничего не сохраняя',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='сколько произведений обрабатывать в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive')
+        dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        checked = drifted = 0
+        last_id = 0
+        while True:
+            title_ids = list(
+                Title.objects
+                .filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not title_ids:
+                break
+            last_id = title_ids[-1]
+            with transaction.atomic():
+                drifted += self.reconcile_chunk(title_ids, dry_run)
+            checked += len(title_ids)
+        action = 'found' if dry_run else 'fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} titles, {action} {drifted} with drift'
+        ))
+
+    def reconcile_chunk(self, title_ids, dry_run):
+        rates = {}
+        duplicates = []
+        for rate in (Rate.objects
+                     .select_for_update()
+                     .filter(title_id__in=title_ids)
+                     .order_by('pk')):
+            if rate.title_id in rates:
+                duplicates.append(rate.pk)
+            else:
+                rates[rate.title_id] = rate
+        pending = defaultdict(Counter)
+        for title_id, score, delta in (RatingDelta.objects
+                                       .filter(title_id__in=title_ids)
+                                       .values_list('title_id', 'score',
+                                                    'delta')):
+            add_vote_changes(pending[title_id], score, delta)
+        for title_id, changes in pending.items():
+            rate = rates.get(title_id)
+            if rate is None:
+                continue
+            for field, value in changes.items():
+                setattr(rate, field, getattr(rate, field) + value)
+        titles = Title.objects.select_for_update().filter(pk__in=title_ids)
+        votes = collect_votes(title_ids)
+
+        new_rates = []
+        changed_rates = []
+        changed_titles = []
+        drifted = set()
+        for title in titles:
+            title_votes = votes.get(title.pk, empty_votes())
+            rating = calculate_rating(
+                title_votes['sum_vote'], title_votes['count_vote']
+            )
+            rate = rates.get(title.pk)
+            if rate is None:
+                self.report(title.pk, 'missing Rate')
+                new_rates.append(Rate(title_id=title.pk, **title_votes))
+                drifted.add(title.pk)
+            else:
+                changes = [
+                    f'{field} {getattr(rate, field)} -> {value}'
+                    for field, value in title_votes.items()
+                    if getattr(rate, field) != value
+                ]
+                if changes:
+                    self.report(title.pk, ', '.join(changes))
+                    for field, value in title_votes.items():
+                        setattr(rate, field, value)
+                    changed_rates.append(rate)
+                    drifted.add(title.pk)
+            if title.rating != rating:
+                self.report(title.pk, f'rating {title.rating} -> {rating}')
+                title.rating = rating
+                title.updated_at = timezone.now()
+                changed_titles.append(title)
+                drifted.add(title.pk)
+        if duplicates:
+            self.report(None, f'{len(duplicates)} duplicate Rate rows')
+
+        if not dry_run:
+            before = snapshot(title_ids)
+            discard_rating_deltas(title_ids)
+            Rate.objects.filter(pk__in=duplicates).delete()
+            Rate.objects.bulk_create(new_rates)
+            changed_rates += [
+                rates[title_id] for title_id in pending
+                if title_id in rates and rates[title_id] not in changed_rates
+            ]
+            Rate.objects.bulk_update(changed_rates, VOTE_FIELDS)
+            Title.objects.bulk_update(
+                changed_titles, ['rating', 'updated_at']
+            )
+            update_stats(before, title_ids)
+        return len(drifted)
+
+    def report(self, title_id, message):
+        if self.verbosity < 1:
+            return
+        prefix = f'title {title_id}: ' if title_id else ''
+        self.stdout.write(f'{prefix}{message}')
@@ -0,0 +1,110 @@
+import os
+import time
+
+from django.db import DatabaseError, connection
+from django.http import HttpResponse, JsonResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+REQUESTS = Counter(
+    'yamdb_http_requests_total',
+    'HTTP requests by route, method and status.',
+    ['route', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'yamdb_http_request_duration_seconds',
+    'HTTP request latency by route.',
+    ['route', 'method'],
+)
+DB_QUERIES = Histogram(
+    'yamdb_db_queries_per_request',
+    'Database queries issued while handling a request.',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, float('inf')),
+)
+THROTTLED = Counter(
+    'yamdb_throttled_requests_total',
+    'Requests rejected with 429 Too Many Requests.',
+    ['route'],
+)
+RESPONSE_CACHE = Counter(
+    'yamdb_response_cache_total',
+    'Response cache lookups by result.',
+    ['result'],
+)
+HEALTH_DB_LATENCY = Histogram(
+    'yamdb_healthz_db_latency_seconds',
+    'Database round trip measured by the readiness probe.',
+)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+def get_route(request, view_func):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return request.resolver_match.view_name or view_func.__name__
+    method = request.method.lower()
+    action = (getattr(view_func, 'actions', None) or {}).get(method, method)
+    return f'{view_class.__name__}.{action}'
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        route = getattr(request, 'metrics_route', UNMATCHED_ROUTE)
+        REQUESTS.labels(route, request.method, response.status_code).inc()
+        LATENCY.labels(route, request.method).observe(duration)
+        DB_QUERIES.labels(route).observe(queries.count)
+        if response.status_code == 429:
+            THROTTLED.labels(route).inc()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_route = get_route(request, view_func)
+
+
+def get_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics(request):
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+def healthz(request):
+    start = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except DatabaseError as error:
+        return JsonResponse(
+            {'status': 'unavailable', 'error': str(error)}, status=503
+        )
+    latency = time.perf_counter() - start
+    HEALTH_DB_LATENCY.observe(latency)
+    return JsonResponse({'status': 'ok', 'db_latency_ms': latency * 1000})
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+
+
+def get_lean_prefix():
+    return getattr(settings, 'LEAN_MIDDLEWARE_PREFIX', '/api/')
+
+
+def is_lean(request):
+    """API requests without a session cookie need no session machinery.
+
+    The API authenticates with JWT in a header, so such a request carries
+    nothing a session, a message or a CSRF token could protect. Requests
+    with a session cookie, like everything under /admin/, keep the full
+    pipeline.
+    """
+    return (
+        request.path_info.startswith(get_lean_prefix())
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+class LeanAPIMixin:
+
+    def __call__(self, request):
+        if is_lean(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if is_lean(request) or not hasattr(super(), 'process_view'):
+            return None
+        return super().process_view(request, view_func, view_args,
+                                    view_kwargs)
+
+
+class LeanSessionMiddleware(LeanAPIMixin, SessionMiddleware):
+    pass
+
+
+class LeanCsrfViewMiddleware(LeanAPIMixin, CsrfViewMiddleware):
+    pass
+
+
+class LeanAuthenticationMiddleware(LeanAPIMixin, AuthenticationMiddleware):
+    pass
+
+
+class LeanMessageMiddleware(LeanAPIMixin, MessageMiddleware):
+    pass
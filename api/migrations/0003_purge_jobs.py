@@ -0,0 +1,38 @@
+# Generated by Django 3.0.5 on 2026-10-18 21:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_auto_20200930_1530'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgeJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('title', 'Title'), ('review', 'Review'), ('user', 'User')], max_length=10, verbose_name='тип объекта')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10, verbose_name='статус')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='дата постановки в очередь')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='дата завершения')),
+                ('error', models.TextField(blank=True, verbose_name='ошибка')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='is_removed',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='ожидает удаления'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='is_removed',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='ожидает удаления'),
+        ),
+    ]
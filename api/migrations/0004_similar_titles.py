@@ -0,0 +1,29 @@
+# Generated by Django 3.0.5 on 2026-10-18 21:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_purge_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarTitle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='место')),
+                ('score', models.FloatField(verbose_name='сходство')),
+                ('computed_at', models.DateTimeField(verbose_name='дата расчёта')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.Title', verbose_name='похожее произведение')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar', to='api.Title', verbose_name='произведение')),
+            ],
+            options={
+                'ordering': ['title', 'rank'],
+                'unique_together': {('title', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 3.0.5 on 2026-10-18 21:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+SCORES = range(1, 11)
+
+
+def fill_histogram(apps, schema_editor):
+    Rate = apps.get_model('api', 'Rate')
+    Review = apps.get_model('api', 'Review')
+    votes = (
+        Review.objects
+        .filter(title=OuterRef('title'))
+        .order_by()
+        .values('title')
+    )
+    Rate.objects.update(**{
+        f'votes_{score}': Coalesce(Subquery(
+            votes.filter(score=score)
+            .annotate(total=Count('id'))
+            .values('total')
+        ), 0)
+        for score in SCORES
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_similar_titles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rate',
+            name='votes_1',
+            field=models.PositiveIntegerField(default=0, verbose_name='количество оценок 1'),
+        ),
+        migrations.AddField(
+            model_name='rate',
+            name='votes_10',
+            field=models.PositiveIntegerField(default=0, verbose_name='количество оценок 10'),
+        ),
+        migrations.AddField(
+            model_name='rate',
+            name='votes_2',
+            field=models.PositiveIntegerField(default=0, verbose_name='количество оценок 2'),
+        ),
+        migrations.AddField(
+            model_name='rate',
+            name='votes_3',
+            field=models.PositiveIntegerField(default=0, verbose_name='количество оценок 3'),
+        ),
+        migrations.AddField(
+            model_name='rate',
+            name='votes_4',
+            field=models.PositiveIntegerField(default=0, verbose_name='количество оценок 4'),
+        ),
+        migrations.AddField(
+            model_name='rate',
+            name='votes_5',
+            field=models.PositiveIntegerField(default=0, verbose_name='количество оценок 5'),
+        ),
+        migrations.AddField(
+            model_name='rate',
+            name='votes_6',
+            field=models.PositiveIntegerField(default=0, verbose_name='количество оценок 6'),
+        ),
+        migrations.AddField(
+            model_name='rate',
+            name='votes_7',
+            field=models.PositiveIntegerField(default=0, verbose_name='количество оценок 7'),
+        ),
+        migrations.AddField(
+            model_name='rate',
+            name='votes_8',
+            field=models.PositiveIntegerField(default=0, verbose_name='количество оценок 8'),
+        ),
+        migrations.AddField(
+            model_name='rate',
+            name='votes_9',
+            field=models.PositiveIntegerField(default=0, verbose_name='количество оценок 9'),
+        ),
+        migrations.RunPython(fill_histogram, migrations.RunPython.noop),
+    ]
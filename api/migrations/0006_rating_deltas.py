@@ -0,0 +1,26 @@
+# Generated by Django 3.0.5 on 2026-10-18 21:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_rate_score_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingDelta',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(verbose_name='оценка')),
+                ('delta', models.SmallIntegerField(verbose_name='изменение')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_deltas', to='api.Title', verbose_name='произведение')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
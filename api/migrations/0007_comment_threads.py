@@ -0,0 +1,67 @@
+# Generated by Django 3.0.5 on 2026-10-18 22:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+PATH_STEP = 7
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def path_segment(pk):
+    digits = []
+    while pk:
+        pk, digit = divmod(pk, 36)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rjust(PATH_STEP, '0')
+
+
+def fill_paths(apps, schema_editor):
+    Comment = apps.get_model('api', 'Comment')
+    last_id = 0
+    while True:
+        comments = list(
+            Comment.objects
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .only('pk')[:1000]
+        )
+        if not comments:
+            return
+        for comment in comments:
+            comment.path = path_segment(comment.pk)
+        Comment.objects.bulk_update(comments, ['path'])
+        last_id = comments[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_rating_deltas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='уровень вложенности'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='replies', to='api.Comment', verbose_name='ответ на комментарий'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='путь в ветке'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', 'path'], name='api_comment_review__cdc6ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', 'depth', 'pub_date'], name='api_comment_review__9dbd63_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.0.5 on 2026-10-18 22:08
+
+from django.db import migrations, models
+
+# istartswith compiles to UPPER(column::text) LIKE UPPER(...) on PostgreSQL,
+# which only an index over the same expression with text_pattern_ops serves.
+PREFIX_INDEXES = {
+    'api_user_username_upper_like': 'username',
+    'api_user_email_upper_like': 'email',
+}
+
+
+def create_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in PREFIX_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} '
+            f'ON api_user (UPPER({column}::text) text_pattern_ops)'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_author_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.CharField(choices=[('user', 'User'), ('moderator', 'Moderator'), ('admin', 'Admin')], db_index=True, default='user', max_length=10, verbose_name='роль пользователя'),
+        ),
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
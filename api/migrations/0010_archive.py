@@ -0,0 +1,46 @@
+# Generated by Django 3.0.5 on 2026-10-18 22:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_user_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewArchive',
+            fields=[
+                ('id', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField(verbose_name='отзыв')),
+                ('score', models.PositiveSmallIntegerField(verbose_name='оценка')),
+                ('pub_date', models.DateTimeField(verbose_name='дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to=settings.AUTH_USER_MODEL, verbose_name='автор отзыва')),
+                ('title', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to='api.Title', verbose_name='произведение')),
+            ],
+            options={
+                'ordering': ['-pub_date'],
+                'unique_together': {('title', 'author')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CommentArchive',
+            fields=[
+                ('id', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('parent', models.PositiveIntegerField(blank=True, null=True, verbose_name='ответ на комментарий')),
+                ('path', models.CharField(blank=True, default='', max_length=255, verbose_name='путь в ветке')),
+                ('depth', models.PositiveSmallIntegerField(default=0, verbose_name='уровень вложенности')),
+                ('text', models.TextField(verbose_name='текст комментария')),
+                ('pub_date', models.DateTimeField(verbose_name='дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL)),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='api.ReviewArchive', verbose_name='отзыв')),
+            ],
+            options={
+                'ordering': ['-pub_date'],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.0.5 on 2026-10-18 22:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStat',
+            fields=[
+                ('title_count', models.PositiveIntegerField(default=0, verbose_name='количество произведений')),
+                ('rated_count', models.PositiveIntegerField(default=0, verbose_name='количество произведений с рейтингом')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='сумма рейтингов')),
+                ('top_title_1', models.PositiveIntegerField(null=True, verbose_name='лучшее произведение')),
+                ('top_title_2', models.PositiveIntegerField(null=True, verbose_name='второе лучшее произведение')),
+                ('top_title_3', models.PositiveIntegerField(null=True, verbose_name='третье лучшее произведение')),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stat', serialize=False, to='api.Category', verbose_name='категория')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='GenreStat',
+            fields=[
+                ('title_count', models.PositiveIntegerField(default=0, verbose_name='количество произведений')),
+                ('rated_count', models.PositiveIntegerField(default=0, verbose_name='количество произведений с рейтингом')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='сумма рейтингов')),
+                ('top_title_1', models.PositiveIntegerField(null=True, verbose_name='лучшее произведение')),
+                ('top_title_2', models.PositiveIntegerField(null=True, verbose_name='второе лучшее произведение')),
+                ('top_title_3', models.PositiveIntegerField(null=True, verbose_name='третье лучшее произведение')),
+                ('genre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stat', serialize=False, to='api.Genre', verbose_name='жанр')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'rating'], name='api_title_categor_cd53b6_idx'),
+        ),
+    ]
@@ -64,6 +64,7 @@ class User(SimpleEmailConfirmationUserMixin, AbstractUser):
         max_length=10,
         choices=Role.choices,
         default=Role.USER,
+        db_index=True,
     )
 
     objects = UserManager()
@@ -90,6 +91,12 @@ class Category(models.Model):
         unique=True
     )
 
+    updated_at = models.DateTimeField(
+        verbose_name='дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
+
     class Meta:
         ordering = ["-id"]
 
@@ -108,6 +115,12 @@ class Genre(models.Model):
         unique=True
     )
 
+    updated_at = models.DateTimeField(
+        verbose_name='дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
+
     class Meta:
         ordering = ["-id"]
 
@@ -126,6 +139,11 @@ class Title(models.Model):
         ]
     )
     rating = models.PositiveIntegerField(verbose_name='рейтинг', null=True)
+    is_removed = models.BooleanField(
+        verbose_name='ожидает удаления',
+        default=False,
+        db_index=True,
+    )
     description = models.TextField(verbose_name='описание', null=True)
     category = models.ForeignKey(
         Category,
@@ -141,8 +159,15 @@ class Title(models.Model):
         verbose_name='жанр'
     )
 
+    updated_at = models.DateTimeField(
+        verbose_name='дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
+
     class Meta:
         ordering = ["-name"]
+        indexes = [models.Index(fields=['category', 'rating'])]
 
     def __str__(self):
         return self.name
@@ -173,16 +198,40 @@ class Review(models.Model):
         auto_now_add=True,
         db_index=True,
     )
+    is_removed = models.BooleanField(
+        verbose_name='ожидает удаления',
+        default=False,
+        db_index=True,
+    )
+
+    updated_at = models.DateTimeField(
+        verbose_name='дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
 
     class Meta:
         ordering = ["-pub_date"]
         unique_together = ('title', 'author')
+        indexes = [models.Index(fields=['author', 'pub_date'])]
 
     def __str__(self):
         return (f'{self.author.username} оценил '
                 f'{self.title.name} на {self.score}')
 
 
+PATH_STEP = 7
+PATH_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def path_segment(pk):
+    digits = []
+    while pk:
+        pk, digit = divmod(pk, 36)
+        digits.append(PATH_DIGITS[digit])
+    return ''.join(reversed(digits)).rjust(PATH_STEP, '0')
+
+
 class Comment(models.Model):
     review = models.ForeignKey(
         Review,
@@ -191,6 +240,27 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         null=True
     )
+    # Replies are removed together with their parent by path range, see
+    # api.threads.delete_threads, so deleting a review or a title can still
+    # drop its comments with a single statement.
+    parent = models.ForeignKey(
+        'self',
+        related_name="replies",
+        verbose_name='ответ на комментарий',
+        on_delete=models.DO_NOTHING,
+        blank=True,
+        null=True
+    )
+    path = models.CharField(
+        verbose_name='путь в ветке',
+        max_length=255,
+        blank=True,
+        default=''
+    )
+    depth = models.PositiveSmallIntegerField(
+        verbose_name='уровень вложенности',
+        default=0
+    )
     text = models.TextField(verbose_name='текст комментария',)
     author = models.ForeignKey(
         User,
@@ -202,12 +272,34 @@ class Comment(models.Model):
         db_index=True,
     )
 
+    updated_at = models.DateTimeField(
+        verbose_name='дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
+
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(fields=['review', 'path']),
+            models.Index(fields=['review', 'depth', 'pub_date']),
+            models.Index(fields=['author', 'pub_date']),
+        ]
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.depth = self.parent.depth + 1 if self.parent_id else 0
+        super().save(*args, **kwargs)
+        if not self.path:
+            self.path = (
+                (self.parent.path if self.parent_id else '')
+                + path_segment(self.pk)
+            )
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
 
 class Rate(models.Model):
     title = models.ForeignKey(
@@ -223,6 +315,292 @@ class Rate(models.Model):
         verbose_name='количество оценок',
         default=0
     )
+    votes_1 = models.PositiveIntegerField(
+        verbose_name='количество оценок 1',
+        default=0
+    )
+    votes_2 = models.PositiveIntegerField(
+        verbose_name='количество оценок 2',
+        default=0
+    )
+    votes_3 = models.PositiveIntegerField(
+        verbose_name='количество оценок 3',
+        default=0
+    )
+    votes_4 = models.PositiveIntegerField(
+        verbose_name='количество оценок 4',
+        default=0
+    )
+    votes_5 = models.PositiveIntegerField(
+        verbose_name='количество оценок 5',
+        default=0
+    )
+    votes_6 = models.PositiveIntegerField(
+        verbose_name='количество оценок 6',
+        default=0
+    )
+    votes_7 = models.PositiveIntegerField(
+        verbose_name='количество оценок 7',
+        default=0
+    )
+    votes_8 = models.PositiveIntegerField(
+        verbose_name='количество оценок 8',
+        default=0
+    )
+    votes_9 = models.PositiveIntegerField(
+        verbose_name='количество оценок 9',
+        default=0
+    )
+    votes_10 = models.PositiveIntegerField(
+        verbose_name='количество оценок 10',
+        default=0
+    )
 
     class Meta:
         ordering = ["-id"]
+
+
+class PurgeJob(models.Model):
+    class Target(models.TextChoices):
+        TITLE = 'title'
+        REVIEW = 'review'
+        USER = 'user'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        RUNNING = 'running'
+        DONE = 'done'
+        FAILED = 'failed'
+
+    target = models.CharField(
+        verbose_name='тип объекта',
+        max_length=10,
+        choices=Target.choices,
+    )
+    object_id = models.PositiveIntegerField(verbose_name='id объекта')
+    status = models.CharField(
+        verbose_name='статус',
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+    )
+    created = models.DateTimeField(
+        verbose_name='дата постановки в очередь',
+        auto_now_add=True,
+    )
+    finished = models.DateTimeField(
+        verbose_name='дата завершения',
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(verbose_name='ошибка', blank=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f'{self.target} {self.object_id}: {self.status}'
+
+
+class SimilarTitle(models.Model):
+    title = models.ForeignKey(
+        Title,
+        related_name="similar",
+        verbose_name='произведение',
+        on_delete=models.CASCADE
+    )
+    similar = models.ForeignKey(
+        Title,
+        related_name="+",
+        verbose_name='похожее произведение',
+        on_delete=models.CASCADE
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name='место')
+    score = models.FloatField(verbose_name='сходство')
+    computed_at = models.DateTimeField(verbose_name='дата расчёта')
+
+    class Meta:
+        ordering = ["title", "rank"]
+        unique_together = ('title', 'rank')
+
+    def __str__(self):
+        return f'{self.title_id} -> {self.similar_id} ({self.score:.3f})'
+
+
+class RatingDelta(models.Model):
+    title = models.ForeignKey(
+        Title,
+        related_name="rating_deltas",
+        verbose_name='произведение',
+        on_delete=models.CASCADE
+    )
+    score = models.PositiveSmallIntegerField(verbose_name='оценка')
+    delta = models.SmallIntegerField(verbose_name='изменение')
+
+    class Meta:
+        ordering = ["id"]
+
+
+class ReviewArchive(models.Model):
+    # Reviews moved out of Review by api.archive keep their ids and still
+    # count towards Rate, see api.ratings.collect_votes.
+    id = models.PositiveIntegerField(primary_key=True)
+    title = models.ForeignKey(
+        Title,
+        related_name="archived_reviews",
+        verbose_name='произведение',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    author = models.ForeignKey(
+        User,
+        related_name="archived_reviews",
+        verbose_name='автор отзыва',
+        on_delete=models.CASCADE
+    )
+    text = models.TextField(verbose_name='отзыв')
+    score = models.PositiveSmallIntegerField(verbose_name='оценка')
+    pub_date = models.DateTimeField(verbose_name='дата публикации')
+
+    class Meta:
+        ordering = ["-pub_date"]
+        unique_together = ('title', 'author')
+
+
+class CommentArchive(models.Model):
+    id = models.PositiveIntegerField(primary_key=True)
+    review = models.ForeignKey(
+        ReviewArchive,
+        related_name="comments",
+        verbose_name='отзыв',
+        on_delete=models.CASCADE
+    )
+    parent = models.PositiveIntegerField(
+        verbose_name='ответ на комментарий',
+        blank=True,
+        null=True
+    )
+    path = models.CharField(
+        verbose_name='путь в ветке',
+        max_length=255,
+        blank=True,
+        default=''
+    )
+    depth = models.PositiveSmallIntegerField(
+        verbose_name='уровень вложенности',
+        default=0
+    )
+    text = models.TextField(verbose_name='текст комментария')
+    author = models.ForeignKey(
+        User,
+        related_name="archived_comments",
+        on_delete=models.CASCADE
+    )
+    pub_date = models.DateTimeField(verbose_name='дата публикации')
+
+    class Meta:
+        ordering = ["-pub_date"]
+
+
+class TitleStat(models.Model):
+    title_count = models.PositiveIntegerField(
+        verbose_name='количество произведений',
+        default=0
+    )
+    rated_count = models.PositiveIntegerField(
+        verbose_name='количество произведений с рейтингом',
+        default=0
+    )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='сумма рейтингов',
+        default=0
+    )
+    # Ids of the best rated titles, kept as plain integers so that removing
+    # a title does not cascade here; api.stats refreshes them.
+    top_title_1 = models.PositiveIntegerField(
+        verbose_name='лучшее произведение', null=True
+    )
+    top_title_2 = models.PositiveIntegerField(
+        verbose_name='второе лучшее произведение', null=True
+    )
+    top_title_3 = models.PositiveIntegerField(
+        verbose_name='третье лучшее произведение', null=True
+    )
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating(self):
+        if not self.rated_count:
+            return None
+        return round(self.rating_sum / self.rated_count, 1)
+
+    @property
+    def top_title_ids(self):
+        return [
+            pk for pk in (self.top_title_1, self.top_title_2, self.top_title_3)
+            if pk is not None
+        ]
+
+
+class CategoryStat(TitleStat):
+    category = models.OneToOneField(
+        Category,
+        related_name="stat",
+        verbose_name='категория',
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+
+
+class GenreStat(TitleStat):
+    genre = models.OneToOneField(
+        Genre,
+        related_name="stat",
+        verbose_name='жанр',
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+
+
+class TombstoneManager(models.Manager):
+
+    def record(self, kind, ids):
+        return self.bulk_create(
+            self.model(kind=kind, object_id=pk) for pk in ids
+        )
+
+
+class Tombstone(models.Model):
+    """A deleted object for /api/v1/sync/.
+
+    Deleting an object deletes everything below it: a title takes its
+    reviews, a review its comments, a comment its replies. Only the
+    topmost deleted object is recorded.
+    """
+
+    class Kind(models.TextChoices):
+        CATEGORY = 'category'
+        GENRE = 'genre'
+        TITLE = 'title'
+        REVIEW = 'review'
+        COMMENT = 'comment'
+
+    kind = models.CharField(
+        verbose_name='тип объекта',
+        max_length=10,
+        choices=Kind.choices,
+    )
+    object_id = models.PositiveIntegerField(verbose_name='id объекта')
+    deleted_at = models.DateTimeField(
+        verbose_name='дата удаления',
+        auto_now_add=True,
+        db_index=True,
+    )
+
+    objects = TombstoneManager()
+
+    class Meta:
+        ordering = ["deleted_at"]
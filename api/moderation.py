@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_catalog, invalidate_title
+from .models import Comment, Review, Tombstone
+from .purge import delete_in_batches
+from .ratings import refresh_ratings
+from .threads import delete_threads
+
+
+def select(queryset, ids=None, author=None, date_from=None, date_to=None):
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    if author is not None:
+        queryset = queryset.filter(author__username=author)
+    if date_from is not None:
+        queryset = queryset.filter(pub_date__gte=date_from)
+    if date_to is not None:
+        queryset = queryset.filter(pub_date__lte=date_to)
+    return queryset
+
+
+def moderate_reviews(action, text=None, **selection):
+    reviews = select(Review.objects.filter(is_removed=False), **selection)
+    title_ids = set()
+    with transaction.atomic():
+        if action == 'update':
+            title_ids.update(reviews.values_list('title_id', flat=True))
+            affected = reviews.update(text=text, updated_at=timezone.now())
+        else:
+            def delete_reviews(batch):
+                rows = list(batch.values_list('pk', 'title_id'))
+                Tombstone.objects.record(
+                    Tombstone.Kind.REVIEW, [pk for pk, _ in rows]
+                )
+                title_ids.update(title_id for _, title_id in rows)
+                comments = Comment.objects.filter(review__in=batch)
+                comments._raw_delete(comments.db)
+                batch._raw_delete(batch.db)
+
+            affected = delete_in_batches(reviews, on_batch=delete_reviews)
+            refresh_ratings(title_ids)
+    for title_id in title_ids:
+        invalidate_title(title_id)
+    if action == 'delete' and title_ids:
+        invalidate_catalog()
+    return affected
+
+
+def moderate_comments(action, text=None, **selection):
+    comments = select(Comment.objects.all(), **selection)
+    title_ids = set()
+    with transaction.atomic():
+        title_ids.update(
+            comments.values_list('review__title_id', flat=True).distinct()
+        )
+        if action == 'update':
+            affected = comments.update(
+                text=text, updated_at=timezone.now()
+            )
+        else:
+            affected = delete_in_batches(comments, on_batch=delete_threads)
+    for title_id in title_ids:
+        invalidate_title(title_id)
+    return affected
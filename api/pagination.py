@@ -0,0 +1,166 @@
+import json
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import CATALOG_SCOPE, response_cache
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class TitlePagination(PageNumberPagination):
+    count_query_param = 'count'
+    count_cache_prefix = 'title-count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        try:
+            self.page_number = int(
+                request.query_params.get(self.page_query_param, 1)
+            )
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params.get(self.page_query_param),
+                message='That page number is not a valid integer'
+            ))
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.page_number != 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.page_number,
+                message='That page contains no results'
+            ))
+        self.has_next = len(rows) > page_size
+        self.count = self.count_estimated = None
+        if request.query_params.get(self.count_query_param) != 'false':
+            self.count, self.count_estimated = self.get_count(
+                queryset, request
+            )
+        return rows[:page_size]
+
+    def get_count_cache_key(self, request):
+        params = sorted(
+            (name, values)
+            for name, values in request.query_params.lists()
+            if name not in (self.page_query_param, self.count_query_param)
+        )
+        version, = response_cache.versions([CATALOG_SCOPE])
+        return (f'{self.count_cache_prefix}:{version}:'
+                f'{urlencode(params, doseq=True)}')
+
+    def get_count(self, queryset, request):
+        key = self.get_count_cache_key(request)
+        cached = response_cache.cache.get(key)
+        if cached is not None:
+            return cached
+        estimate = estimate_count(queryset)
+        if (estimate is not None
+                and estimate > settings.TITLE_COUNT_ESTIMATE_THRESHOLD):
+            result = (estimate, True)
+        else:
+            result = (queryset.count(), False)
+        response_cache.cache.set(
+            key, result, settings.TITLE_COUNT_CACHE_TIMEOUT
+        )
+        return result
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param,
+            self.page_number + 1
+        )
+
+    def get_previous_link(self):
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.page_number - 1
+        )
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_estimated'] = self.count_estimated
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+
+class ArchivedSequence:
+    # Live rows first, then the archive, so the pages served before rows
+    # were archived keep their place and deep pages reach the archive.
+    def __init__(self, live, archive):
+        self.live = live
+        self.archive = archive
+
+    @cached_property
+    def live_count(self):
+        return self.live.count()
+
+    def count(self):
+        return self.live_count + self.archive.count()
+
+    def __getitem__(self, index):
+        start, stop = index.start or 0, index.stop
+        rows = list(self.live[start:stop]) if start < self.live_count else []
+        if stop > self.live_count:
+            rows += list(self.archive[
+                max(start - self.live_count, 0):stop - self.live_count
+            ])
+        return rows
+
+
+class ArchivePagination(PageNumberPagination):
+
+    def paginate_queryset(self, queryset, request, view=None):
+        get_archive_queryset = getattr(view, 'get_archive_queryset', None)
+        if get_archive_queryset is not None:
+            queryset = ArchivedSequence(queryset, get_archive_queryset())
+        return super().paginate_queryset(queryset, request, view)
+
+
+class PubDateCursorPagination(CursorPagination):
+    ordering = ('-pub_date', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class UserCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -1,9 +1,16 @@
 from rest_framework import permissions
 
 
+ME_ACTIONS = ['get_me', 'update_me', 'delete_me', 'my_reviews',
+              'my_comments']
+PUBLIC_USER_ACTIONS = ['reviews', 'comments']
+
+
 class UserPermission(permissions.BasePermission):
     def has_permission(self, request, view):
-        if view.action in ['get_me', 'update_me', 'delete_me']:
+        if view.action in PUBLIC_USER_ACTIONS:
+            return True
+        if view.action in ME_ACTIONS:
             return request.user.is_authenticated
         return (
                 request.user.is_authenticated
@@ -11,7 +18,9 @@ class UserPermission(permissions.BasePermission):
         )
 
     def has_object_permission(self, request, view, obj):
-        if view.action in ['get_me', 'update_me', 'delete_me']:
+        if view.action in PUBLIC_USER_ACTIONS:
+            return True
+        if view.action in ME_ACTIONS:
             return obj.author == request.user
         return (
                 request.user.is_authenticated
@@ -46,3 +55,11 @@ class ReviewAndComment(permissions.BasePermission):
                     obj.author == request.user
                     or request.user.role in ['moderator', 'admin']
             )
+
+
+class IsModerator(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return (
+                request.user.is_authenticated
+                and request.user.role in ['moderator', 'admin']
+        )
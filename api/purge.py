@@ -0,0 +1,204 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import invalidate_catalog, invalidate_title
+from .models import (Comment, CommentArchive, PurgeJob, Rate, Review,
+                     ReviewArchive, Title, Tombstone, User)
+from .ratings import refresh_ratings
+from .stats import snapshot, update_stats
+from .threads import delete_threads
+
+
+def get_batch_size():
+    return getattr(settings, 'PURGE_BATCH_SIZE', 1000)
+
+
+def get_inline_limit():
+    return getattr(settings, 'PURGE_INLINE_LIMIT', 100)
+
+
+def delete_in_batches(queryset, on_batch=None, ordering=()):
+    model = queryset.model
+    deleted = 0
+    while True:
+        ids = list(
+            queryset.order_by(*ordering).values_list('pk', flat=True)
+            [:get_batch_size()]
+        )
+        if not ids:
+            return deleted
+        batch = model.objects.filter(pk__in=ids)
+        with transaction.atomic():
+            if on_batch is None:
+                batch._raw_delete(batch.db)
+            else:
+                on_batch(batch)
+        deleted += len(ids)
+
+
+def remove_title(title):
+    dependents = (
+        title.review.count() + title.archived_reviews.count()
+        + Comment.objects.filter(review__title=title).count()
+        + CommentArchive.objects.filter(review__title=title).count()
+    )
+    with transaction.atomic():
+        before = snapshot([title.pk])
+        Tombstone.objects.record(Tombstone.Kind.TITLE, [title.pk])
+        if dependents <= get_inline_limit():
+            Rate.objects.filter(title=title).delete()
+            title.delete()
+        else:
+            Title.objects.filter(pk=title.pk).update(is_removed=True)
+            PurgeJob.objects.create(
+                target=PurgeJob.Target.TITLE, object_id=title.pk
+            )
+        update_stats(before, [title.pk])
+
+
+def remove_review(review):
+    if review.comments.count() <= get_inline_limit():
+        Tombstone.objects.record(Tombstone.Kind.REVIEW, [review.pk])
+        review.delete()
+        return
+    with transaction.atomic():
+        Tombstone.objects.record(Tombstone.Kind.REVIEW, [review.pk])
+        Review.objects.filter(pk=review.pk).update(is_removed=True)
+        PurgeJob.objects.create(
+            target=PurgeJob.Target.REVIEW, object_id=review.pk
+        )
+
+
+def remove_user(user):
+    reviews = Review.objects.filter(author=user)
+    archived = ReviewArchive.objects.filter(author=user)
+    # The same rows purge_user deletes, replies to the user's reviews too.
+    comments = Q(author=user) | Q(review__author=user)
+    dependents = (
+        reviews.count() + archived.count()
+        + Comment.objects.filter(comments).count()
+        + CommentArchive.objects.filter(comments).count()
+    )
+    if dependents <= get_inline_limit():
+        title_ids = set(reviews.values_list('title_id', flat=True))
+        title_ids.update(archived.values_list('title_id', flat=True))
+        with transaction.atomic():
+            delete_threads(Comment.objects.filter(author=user))
+            Tombstone.objects.record(
+                Tombstone.Kind.REVIEW, reviews.values_list('pk', flat=True)
+            )
+            user.delete()
+            refresh_ratings(title_ids)
+        for title_id in title_ids:
+            invalidate_title(title_id)
+        invalidate_catalog()
+        return
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        PurgeJob.objects.create(
+            target=PurgeJob.Target.USER, object_id=user.pk
+        )
+
+
+def purge_title(title_id):
+    delete_in_batches(
+        Comment.objects.filter(review__title_id=title_id),
+        ordering=['-depth']
+    )
+    delete_in_batches(Review.objects.filter(title_id=title_id))
+    delete_in_batches(
+        CommentArchive.objects.filter(review__title_id=title_id)
+    )
+    delete_in_batches(ReviewArchive.objects.filter(title_id=title_id))
+    Title.genre.through.objects.filter(title_id=title_id).delete()
+    Rate.objects.filter(title_id=title_id).delete()
+    Title.objects.filter(pk=title_id).delete()
+    invalidate_title(title_id, catalog=True)
+
+
+def purge_review(review_id):
+    title_id = (
+        Review.objects
+        .filter(pk=review_id)
+        .values_list('title_id', flat=True)
+        .first()
+    )
+    delete_in_batches(
+        Comment.objects.filter(review_id=review_id), ordering=['-depth']
+    )
+    Review.objects.filter(pk=review_id).delete()
+    invalidate_title(title_id)
+
+
+def purge_user(user_id):
+    delete_in_batches(
+        Comment.objects.filter(author_id=user_id), on_batch=delete_threads
+    )
+    delete_in_batches(
+        Comment.objects.filter(review__author_id=user_id),
+        ordering=['-depth']
+    )
+    title_ids = set()
+
+    def delete_reviews(batch):
+        rows = list(batch.values_list('pk', 'title_id'))
+        # Archived reviews keep their ids, clients may still hold them.
+        Tombstone.objects.record(
+            Tombstone.Kind.REVIEW, [pk for pk, _ in rows]
+        )
+        batch_title_ids = {title_id for _, title_id in rows}
+        batch._raw_delete(batch.db)
+        refresh_ratings(batch_title_ids)
+        title_ids.update(batch_title_ids)
+
+    delete_in_batches(
+        Review.objects.filter(author_id=user_id), on_batch=delete_reviews
+    )
+    delete_in_batches(CommentArchive.objects.filter(
+        Q(author_id=user_id) | Q(review__author_id=user_id)
+    ))
+    delete_in_batches(
+        ReviewArchive.objects.filter(author_id=user_id),
+        on_batch=delete_reviews
+    )
+    User.objects.filter(pk=user_id).delete()
+    for title_id in title_ids:
+        invalidate_title(title_id)
+    invalidate_catalog()
+
+
+PURGERS = {
+    PurgeJob.Target.TITLE: purge_title,
+    PurgeJob.Target.REVIEW: purge_review,
+    PurgeJob.Target.USER: purge_user,
+}
+
+
+def claim_job():
+    with transaction.atomic():
+        job = (
+            PurgeJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=PurgeJob.Status.PENDING)
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = PurgeJob.Status.RUNNING
+        job.save(update_fields=['status'])
+    return job
+
+
+def run_job(job):
+    try:
+        PURGERS[job.target](job.object_id)
+    except Exception as error:
+        job.status = PurgeJob.Status.FAILED
+        job.error = repr(error)
+    else:
+        job.status = PurgeJob.Status.DONE
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished'])
+    return job
@@ -0,0 +1,218 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (Count, F, IntegerField, OuterRef, Q, Subquery,
+                              Sum)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Rate, RatingDelta, Review, ReviewArchive, Title
+from .stats import shift_rating, snapshot, update_stats
+
+SCORES = range(1, 11)
+VOTE_FIELDS = ['sum_vote', 'count_vote'] + [
+    f'votes_{score}' for score in SCORES
+]
+
+
+def calculate_rating(sum_vote, count_vote):
+    if not count_vote:
+        return None
+    return sum_vote // count_vote
+
+
+def empty_votes():
+    return dict.fromkeys(VOTE_FIELDS, 0)
+
+
+def score_distribution(source):
+    return {
+        str(score): getattr(source, f'votes_{score}') or 0
+        for score in SCORES
+    }
+
+
+def with_score_distribution(titles):
+    rates = Rate.objects.filter(title=OuterRef('pk')).order_by('pk')
+    return titles.annotate(**{
+        f'votes_{score}': Subquery(rates.values(f'votes_{score}')[:1])
+        for score in SCORES
+    })
+
+
+def collect_votes(title_ids):
+    buckets = {
+        f'votes_{score}': Count('id', filter=Q(score=score))
+        for score in SCORES
+    }
+    votes = {}
+    for model in (Review, ReviewArchive):
+        rows = (
+            model.objects
+            .filter(title_id__in=title_ids)
+            .order_by()
+            .values('title_id')
+            .annotate(
+                sum_vote=Sum('score'), count_vote=Count('id'), **buckets
+            )
+        )
+        for row in rows:
+            title_votes = votes.setdefault(row.pop('title_id'), empty_votes())
+            for field, value in row.items():
+                title_votes[field] += value
+    return votes
+
+
+def write_behind_enabled():
+    return getattr(settings, 'RATING_WRITE_BEHIND', False)
+
+
+def with_live_votes(titles):
+    rates = Rate.objects.filter(title=OuterRef('pk')).order_by('pk')
+    pending = (
+        RatingDelta.objects
+        .filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+    )
+    pending_sum = pending.annotate(total=Sum(
+        F('score') * F('delta'), output_field=IntegerField()
+    )).values('total')
+    pending_count = pending.annotate(total=Sum('delta')).values('total')
+    return titles.annotate(
+        live_sum_vote=(
+            Coalesce(Subquery(rates.values('sum_vote')[:1]), 0)
+            + Coalesce(Subquery(pending_sum, output_field=IntegerField()), 0)
+        ),
+        live_count_vote=(
+            Coalesce(Subquery(rates.values('count_vote')[:1]), 0)
+            + Coalesce(Subquery(pending_count, output_field=IntegerField()), 0)
+        ),
+    )
+
+
+def live_rating(title):
+    if not hasattr(title, 'live_count_vote'):
+        return title.rating
+    return calculate_rating(title.live_sum_vote, title.live_count_vote)
+
+
+def live_titles():
+    """Titles whose live_rating() is what readers see right now."""
+    titles = Title.objects.all()
+    if write_behind_enabled():
+        titles = with_live_votes(titles)
+    return titles
+
+
+def add_vote_changes(changes, score, delta):
+    changes['sum_vote'] += score * delta
+    changes['count_vote'] += delta
+    changes[f'votes_{score}'] += delta
+
+
+def vote_changes(added=(), removed=()):
+    changes = Counter()
+    for score in added:
+        add_vote_changes(changes, score, 1)
+    for score in removed:
+        add_vote_changes(changes, score, -1)
+    return changes
+
+
+def apply_votes(title_id, added=(), removed=()):
+    if write_behind_enabled():
+        RatingDelta.objects.bulk_create(
+            [RatingDelta(title_id=title_id, score=score, delta=1)
+             for score in added]
+            + [RatingDelta(title_id=title_id, score=score, delta=-1)
+               for score in removed]
+        )
+        return live_rating(
+            with_live_votes(Title.objects.filter(pk=title_id)).first()
+        )
+    return fold_votes(title_id, vote_changes(added, removed))
+
+
+def fold_votes(title_id, changes):
+    changes = {field: delta for field, delta in changes.items() if delta}
+    with transaction.atomic():
+        visible = list(
+            Title.objects.filter(pk=title_id, is_removed=False)
+            .values_list('rating', flat=True)
+        )
+        rates = Rate.objects.filter(title_id=title_id)
+        if changes:
+            updated = rates.update(**{
+                field: F(field) + delta for field, delta in changes.items()
+            })
+        else:
+            updated = rates.exists()
+        if not updated:
+            Rate.objects.create(
+                title_id=title_id,
+                **collect_votes([title_id]).get(title_id, empty_votes())
+            )
+        rate = rates.first()
+        rating = calculate_rating(rate.sum_vote, rate.count_vote)
+        fields = {'rating': rating}
+        if not visible or visible[0] != rating:
+            fields['updated_at'] = timezone.now()
+        Title.objects.filter(pk=title_id).update(**fields)
+        if visible:
+            shift_rating(title_id, visible[0], rating)
+    return rating
+
+
+def flush_rating_deltas(batch_size=10000):
+    with transaction.atomic():
+        deltas = list(
+            RatingDelta.objects
+            .select_for_update(skip_locked=True)
+            .order_by('pk')
+            .values_list('pk', 'title_id', 'score', 'delta')[:batch_size]
+        )
+        changes = defaultdict(Counter)
+        for _, title_id, score, delta in deltas:
+            add_vote_changes(changes[title_id], score, delta)
+        for title_id in sorted(changes):
+            fold_votes(title_id, changes[title_id])
+        folded = RatingDelta.objects.filter(
+            pk__in=[delta[0] for delta in deltas]
+        )
+        folded._raw_delete(folded.db)
+    return len(deltas)
+
+
+def refresh_ratings(title_ids):
+    title_ids = sorted(
+        title_id for title_id in set(title_ids) if title_id is not None
+    )
+    with transaction.atomic():
+        rates = list(
+            Rate.objects.select_for_update().filter(title_id__in=title_ids)
+        )
+        before = snapshot(title_ids)
+        discard_rating_deltas(title_ids)
+        votes = collect_votes(title_ids)
+        for rate in rates:
+            for field, value in votes.get(
+                    rate.title_id, empty_votes()).items():
+                setattr(rate, field, value)
+        Rate.objects.bulk_update(rates, VOTE_FIELDS)
+        titles = []
+        now = timezone.now()
+        for title_id in title_ids:
+            title_votes = votes.get(title_id, empty_votes())
+            rating = calculate_rating(
+                title_votes['sum_vote'], title_votes['count_vote']
+            )
+            titles.append(Title(pk=title_id, rating=rating, updated_at=now))
+        Title.objects.bulk_update(titles, ['rating', 'updated_at'])
+        update_stats(before, title_ids)
+
+
+def discard_rating_deltas(title_ids):
+    pending = RatingDelta.objects.filter(title_id__in=title_ids)
+    pending._raw_delete(pending.db)
@@ -0,0 +1,182 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Review, SimilarTitle, Title
+
+READ_CHUNK_SIZE = 100_000
+
+
+def get_option(name, default):
+    return getattr(settings, f'SIMILAR_TITLES_{name}', default)
+
+
+def to_rows(title_ids, values):
+    rows = np.searchsorted(title_ids, values)
+    rows = np.minimum(rows, len(title_ids) - 1)
+    return rows, title_ids[rows] == values
+
+
+def normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    scale = np.divide(
+        1, norms, out=np.zeros_like(norms), where=norms > 0
+    ).astype(np.float32)
+    return sparse.diags(scale) @ matrix
+
+
+def load_title_ids():
+    return np.fromiter(
+        Title.objects
+        .filter(is_removed=False)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+        .iterator(),
+        dtype=np.int64,
+    )
+
+
+def load_genre_matrix(title_ids):
+    pairs = np.array(
+        list(Title.genre.through.objects.values_list('title_id', 'genre_id')),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    rows, found = to_rows(title_ids, pairs[:, 0])
+    genres, columns = np.unique(pairs[found, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(columns), dtype=np.float32), (rows[found], columns)),
+        shape=(len(title_ids), len(genres)),
+    )
+    return normalize_rows(matrix).tocsr()
+
+
+def iter_score_chunks():
+    last_id = 0
+    reviews = Review.objects.filter(is_removed=False).order_by('pk')
+    while True:
+        chunk = np.array(
+            list(
+                reviews
+                .filter(pk__gt=last_id)
+                .values_list('pk', 'title_id', 'author_id', 'score')
+                [:READ_CHUNK_SIZE]
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 4)
+        if not len(chunk):
+            return
+        last_id = chunk[-1, 0]
+        yield chunk[:, 1:]
+
+
+def load_score_matrix(title_ids):
+    rows, authors, scores = [], [], []
+    for chunk in iter_score_chunks():
+        chunk_rows, found = to_rows(title_ids, chunk[:, 0])
+        rows.append(chunk_rows[found].astype(np.int32))
+        authors.append(chunk[found, 1])
+        scores.append(chunk[found, 2].astype(np.float32))
+    if not rows:
+        return sparse.csr_matrix((len(title_ids), 0), dtype=np.float32)
+    rows = np.concatenate(rows)
+    scores = np.concatenate(scores)
+    authors, columns = np.unique(np.concatenate(authors), return_inverse=True)
+    # Adjusted cosine: centre every score on its author's mean, so generous
+    # and strict reviewers contribute comparable signals.
+    totals = np.bincount(columns, weights=scores)
+    counts = np.bincount(columns)
+    scores -= (totals / counts)[columns].astype(np.float32)
+    matrix = sparse.csr_matrix(
+        (scores, (rows, columns)),
+        shape=(len(title_ids), len(authors)),
+    )
+    matrix.eliminate_zeros()
+    return normalize_rows(matrix).tocsr()
+
+
+def top_neighbours(similarity, rows, top_k):
+    similarity[np.arange(len(rows)), rows] = -np.inf
+    top_k = min(top_k, similarity.shape[1] - 1)
+    candidates = np.argpartition(-similarity, top_k - 1, axis=1)[:, :top_k]
+    scores = np.take_along_axis(similarity, candidates, axis=1)
+    order = np.argsort(-scores, axis=1)
+    return (
+        np.take_along_axis(candidates, order, axis=1),
+        np.take_along_axis(scores, order, axis=1),
+    )
+
+
+def get_changed_title_ids():
+    return list(
+        Title.objects
+        .filter(is_removed=False)
+        .annotate(
+            last_review=Max('review__pub_date'),
+            computed_at=Max('similar__computed_at'),
+        )
+        .filter(
+            Q(computed_at__isnull=True)
+            | Q(last_review__gt=F('computed_at'))
+        )
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+
+def build_similar_titles(only_title_ids=None, top_k=None, genre_weight=None,
+                         memory_mb=None):
+    top_k = top_k or get_option('TOP_K', 10)
+    if genre_weight is None:
+        genre_weight = get_option('GENRE_WEIGHT', 0.3)
+    memory_mb = memory_mb or get_option('MEMORY_MB', 256)
+
+    title_ids = load_title_ids()
+    if len(title_ids) < 2:
+        return 0
+    scores = load_score_matrix(title_ids)
+    genres = load_genre_matrix(title_ids)
+    if only_title_ids is None:
+        targets = np.arange(len(title_ids))
+    else:
+        targets, found = to_rows(
+            title_ids, np.asarray(sorted(only_title_ids), dtype=np.int64)
+        )
+        targets = targets[found]
+
+    # Every block holds a few dense float32 rows against the whole catalog.
+    block_size = max(1, memory_mb * 2 ** 20 // (len(title_ids) * 4 * 3))
+    stored = 0
+    for start in range(0, len(targets), block_size):
+        rows = targets[start:start + block_size]
+        similarity = (
+            (1 - genre_weight) * (scores[rows] @ scores.T).toarray()
+            + genre_weight * (genres[rows] @ genres.T).toarray()
+        )
+        neighbours, neighbour_scores = top_neighbours(similarity, rows, top_k)
+        computed_at = timezone.now()
+        objects = [
+            SimilarTitle(
+                title_id=int(title_ids[row]),
+                similar_id=int(title_ids[neighbour]),
+                rank=rank,
+                score=float(score),
+                computed_at=computed_at,
+            )
+            for row, row_neighbours, row_scores in zip(
+                rows, neighbours, neighbour_scores
+            )
+            for rank, (neighbour, score) in enumerate(
+                zip(row_neighbours, row_scores), start=1
+            )
+            if score > 0
+        ]
+        with transaction.atomic():
+            SimilarTitle.objects.filter(
+                title_id__in=[int(title_ids[row]) for row in rows]
+            ).delete()
+            SimilarTitle.objects.bulk_create(objects, batch_size=1000)
+        stored += len(objects)
+    return stored
@@ -1,11 +1,13 @@
+from django.db.models import OuterRef, Subquery
 from rest_framework import serializers
-from rest_framework.generics import get_object_or_404
 from rest_framework.validators import UniqueValidator
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from .custom_authentication import AuthenticationWithoutPassword
-from .models import User, Review, Comment, Category, Genre, Title
+from .models import (User, Review, Comment, Category, Genre, Title,
+                     SimilarTitle, Tombstone)
+from .ratings import live_rating, score_distribution
 
 
 class UserAllSerializer(serializers.ModelSerializer):
@@ -91,11 +93,91 @@ class CommentSerializer(serializers.ModelSerializer):
         slug_field='username',
         read_only=True
     )
+    parent = serializers.PrimaryKeyRelatedField(
+        queryset=Comment.objects.all(),
+        required=False,
+        allow_null=True
+    )
 
     class Meta:
-        fields = ('id', 'text', 'author', 'pub_date')
+        fields = ('id', 'text', 'author', 'pub_date', 'parent', 'depth')
+        read_only_fields = ('depth',)
         model = Comment
 
+    def update(self, instance, validated_data):
+        validated_data.pop('parent', None)
+        return super().update(instance, validated_data)
+
+
+class CommentThreadSerializer(CommentSerializer):
+
+    def to_representation(self, comment):
+        data = super().to_representation(comment)
+        data['replies'] = []
+        data['more_replies'] = False
+        return data
+
+
+class FeedCommentSerializer(CommentSerializer):
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
+    title = serializers.IntegerField(source='review.title_id')
+
+    class Meta(CommentSerializer.Meta):
+        fields = (
+            'id', 'title', 'review', 'text', 'author', 'pub_date', 'parent'
+        )
+
+
+class UserReviewSerializer(ReviewSerializer):
+    title_name = serializers.CharField(source='title.name', read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title_name',)
+
+
+class UserCommentSerializer(FeedCommentSerializer):
+    title_name = serializers.CharField(
+        source='review.title.name', read_only=True
+    )
+
+    class Meta(FeedCommentSerializer.Meta):
+        fields = FeedCommentSerializer.Meta.fields + ('title_name',)
+
+
+class TitleStatListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        owners = list(data)
+        top_ids = {
+            pk
+            for owner in owners
+            for pk in getattr(getattr(owner, 'stat', None),
+                              'top_title_ids', ())
+        }
+        self._context['top_titles'] = Title.objects.in_bulk(top_ids)
+        return super().to_representation(owners)
+
+
+class TitleStatMixin:
+    """Adds the statistics kept in CategoryStat / GenreStat."""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        stat = getattr(instance, 'stat', None)
+        titles = self.context.get('top_titles', {})
+        data['title_count'] = stat.title_count if stat else 0
+        data['rating'] = stat.rating if stat else None
+        data['top_titles'] = [
+            {
+                'id': pk,
+                'name': titles[pk].name,
+                'rating': titles[pk].rating,
+            }
+            for pk in (stat.top_title_ids if stat else ())
+            if pk in titles
+        ]
+        return data
+
 
 class GenreSerializer(serializers.ModelSerializer):
     slug = serializers.CharField(
@@ -104,7 +186,7 @@ class GenreSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        exclude = ['id']
+        exclude = ['id', 'updated_at']
         model = Genre
 
 
@@ -115,34 +197,180 @@ class CategorySerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        exclude = ['id']
+        exclude = ['id', 'updated_at']
+        model = Category
+
+
+class GenreSyncSerializer(GenreSerializer):
+
+    class Meta:
+        fields = ('id', 'name', 'slug')
+        model = Genre
+
+
+class CategorySyncSerializer(CategorySerializer):
+
+    class Meta:
+        fields = ('id', 'name', 'slug')
         model = Category
 
 
+class TombstoneSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='object_id')
+
+    class Meta:
+        fields = ('kind', 'id')
+        model = Tombstone
+
+
+class GenreStatSerializer(TitleStatMixin, GenreSerializer):
+
+    class Meta(GenreSerializer.Meta):
+        list_serializer_class = TitleStatListSerializer
+
+
+class CategoryStatSerializer(TitleStatMixin, CategorySerializer):
+
+    class Meta(CategorySerializer.Meta):
+        list_serializer_class = TitleStatListSerializer
+
+
 class TitleSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(many=False, read_only=True)
 
     class Meta:
-        fields = '__all__'
+        exclude = ['is_removed', 'updated_at']
         model = Title
 
+    def to_representation(self, title):
+        data = super().to_representation(title)
+        data['rating'] = live_rating(title)
+        return data
+
     def check_category_genre(self, category, genre):
+        real_category = None
         if category:
-            real_category = Category.objects.filter(slug=category)
-            if not real_category:
+            real_category = Category.objects.filter(slug=category).first()
+            if real_category is None:
                 raise serializers.ValidationError(
                     f'{category} category does not exist'
                 )
-        else:
-            real_category = None
-        genres = []
-        genre_list = genre
-        for genre_slug in genre_list:
-            real_genre = Genre.objects.filter(slug=genre_slug)
-            if real_genre:
-                genres.append(get_object_or_404(Genre, slug=genre_slug))
-            else:
+        genres = list(Genre.objects.filter(slug__in=genre))
+        found = {real_genre.slug for real_genre in genres}
+        for genre_slug in genre:
+            if genre_slug not in found:
                 raise serializers.ValidationError(
                     f'{genre_slug} genre does not exist')
         return real_category, genres
+
+
+class TitleDetailSerializer(TitleSerializer):
+    score_distribution = serializers.SerializerMethodField()
+
+    def get_score_distribution(self, title):
+        return score_distribution(title)
+
+    def to_representation(self, title):
+        data = super().to_representation(title)
+        expand = self.context.get('expand', ())
+        if 'reviews' in expand:
+            data['reviews'] = self.expand_reviews(
+                title, 'reviews.comments' in expand
+            )
+        return data
+
+    def expand_reviews(self, title, with_comments):
+        limit = self.context['reviews_limit']
+        reviews = list(
+            title.review
+            .filter(is_removed=False, author__is_active=True)
+            .select_related('author', 'title')[:limit + 1]
+        )
+        expanded = {
+            'results': ReviewSerializer(reviews[:limit], many=True).data,
+            'has_more': len(reviews) > limit,
+        }
+        if with_comments:
+            comments = self.load_comments(reviews[:limit])
+            for review, data in zip(reviews, expanded['results']):
+                data['comments'] = comments[review.pk]
+        return expanded
+
+    def load_comments(self, reviews):
+        limit = self.context['comments_limit']
+        newest = (
+            Comment.objects
+            .filter(review=OuterRef('review'), author__is_active=True)
+            .order_by('-pub_date', '-pk')
+            .values('pk')[:limit + 1]
+        )
+        grouped = {review.pk: [] for review in reviews}
+        comments = (
+            Comment.objects
+            .filter(review_id__in=list(grouped), pk__in=Subquery(newest))
+            .select_related('author')
+            .order_by('-pub_date', '-pk')
+        )
+        for comment in comments if grouped else ():
+            grouped[comment.review_id].append(comment)
+        return {
+            review_id: {
+                'results': CommentSerializer(
+                    comments[:limit], many=True
+                ).data,
+                'has_more': len(comments) > limit,
+            }
+            for review_id, comments in grouped.items()
+        }
+
+
+class SimilarTitleSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='similar.id')
+    name = serializers.CharField(source='similar.name')
+    year = serializers.IntegerField(source='similar.year')
+    rating = serializers.IntegerField(source='similar.rating')
+
+    class Meta:
+        fields = ('id', 'name', 'year', 'rating', 'score')
+        model = SimilarTitle
+
+
+class BulkModerationSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=['delete', 'update'])
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=10000
+    )
+    author = serializers.CharField(required=False)
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+    text = serializers.CharField(required=False)
+
+    def validate(self, data):
+        if not {'ids', 'author', 'date_from', 'date_to'} & data.keys():
+            raise serializers.ValidationError(
+                'Specify ids or a filter: author, date_from, date_to'
+            )
+        if data['action'] == 'update' and 'text' not in data:
+            raise serializers.ValidationError(
+                {'text': 'This field is required for update'}
+            )
+        return data
+
+
+class TitleIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+class ReviewIngestSerializer(serializers.Serializer):
+    title = serializers.IntegerField(min_value=1)
+    author = serializers.CharField(max_length=150)
+    text = serializers.CharField()
+    score = serializers.IntegerField(min_value=1, max_value=10)
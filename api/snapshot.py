@@ -0,0 +1,183 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Category, Genre, Title, Tombstone
+from .ratings import with_live_votes, write_behind_enabled
+from .serializers import (CategorySyncSerializer, GenreSyncSerializer,
+                          TitleSerializer)
+
+MANIFEST_NAME = 'manifest.json'
+SNAPSHOT_PATTERN = 'catalog-*.json.gz'
+# The snapshot being replaced is kept for clients still downloading it.
+KEEP_SNAPSHOTS = 2
+
+
+def get_snapshot_dir():
+    return getattr(
+        settings, 'CATALOG_SNAPSHOT_DIR',
+        os.path.join(settings.BASE_DIR, 'static', 'catalog')
+    )
+
+
+def get_snapshot_url():
+    return getattr(settings, 'CATALOG_SNAPSHOT_URL', '/static/catalog/')
+
+
+def get_debounce():
+    return getattr(settings, 'CATALOG_SNAPSHOT_DEBOUNCE', 30)
+
+
+def get_max_delay():
+    return getattr(settings, 'CATALOG_SNAPSHOT_MAX_DELAY', 300)
+
+
+def get_chunk_size():
+    return getattr(settings, 'CATALOG_SNAPSHOT_CHUNK_SIZE', 1000)
+
+
+def catalog_marks():
+    """When titles, categories and genres were last written or deleted."""
+    return [
+        Title.objects.aggregate(mark=Max('updated_at'))['mark'],
+        Category.objects.aggregate(mark=Max('updated_at'))['mark'],
+        Genre.objects.aggregate(mark=Max('updated_at'))['mark'],
+        Tombstone.objects.filter(kind__in=[
+            Tombstone.Kind.TITLE, Tombstone.Kind.CATEGORY,
+            Tombstone.Kind.GENRE,
+        ]).aggregate(mark=Max('deleted_at'))['mark'],
+    ]
+
+
+def marks_key(marks):
+    return '|'.join(mark.isoformat() if mark else '-' for mark in marks)
+
+
+def is_stale(manifest, marks):
+    return manifest is None or manifest['marks'] != marks_key(marks)
+
+
+def is_settled(marks, dirty_since, now):
+    # Regenerates once writes pause for CATALOG_SNAPSHOT_DEBOUNCE seconds,
+    # but no later than CATALOG_SNAPSHOT_MAX_DELAY after the first one.
+    changes = [mark for mark in marks if mark is not None]
+    if not changes:
+        return True
+    if now - max(changes) >= timedelta(seconds=get_debounce()):
+        return True
+    return now - dirty_since >= timedelta(seconds=get_max_delay())
+
+
+def read_manifest():
+    try:
+        with open(os.path.join(get_snapshot_dir(), MANIFEST_NAME)) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def dumps(data):
+    return json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False,
+        separators=(',', ':')
+    )
+
+
+def title_chunks(size):
+    titles = (
+        Title.objects
+        .filter(is_removed=False)
+        .select_related('category')
+        .prefetch_related('genre')
+    )
+    if write_behind_enabled():
+        titles = with_live_votes(titles)
+    last = 0
+    while True:
+        chunk = list(titles.filter(pk__gt=last).order_by('pk')[:size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1].pk
+
+
+def write_atomic(path, write):
+    directory = os.path.dirname(path)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            write(file)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def build_snapshot():
+    """Writes the catalog as catalog-<version>.json.gz and a manifest."""
+    marks = catalog_marks()
+    directory = get_snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    counts = {'titles': 0}
+
+    def write_catalog(file):
+        # mtime=0 keeps the archive byte-identical for the same catalog.
+        with gzip.GzipFile(fileobj=file, mode='wb', mtime=0) as archive:
+            def write(text):
+                data = text.encode()
+                digest.update(data)
+                archive.write(data)
+
+            categories = CategorySyncSerializer(
+                Category.objects.order_by('pk'), many=True
+            ).data
+            genres = GenreSyncSerializer(
+                Genre.objects.order_by('pk'), many=True
+            ).data
+            write(f'{{"categories":{dumps(categories)},'
+                  f'"genres":{dumps(genres)},"titles":[')
+            for chunk in title_chunks(get_chunk_size()):
+                rows = TitleSerializer(chunk, many=True).data
+                write(
+                    (',' if counts['titles'] else '')
+                    + ','.join(dumps(row) for row in rows)
+                )
+                counts['titles'] += len(rows)
+            write(']}')
+
+    building = os.path.join(directory, 'catalog.json.gz.building')
+    write_atomic(building, write_catalog)
+    version = digest.hexdigest()[:16]
+    name = f'catalog-{version}.json'
+    os.replace(building, os.path.join(directory, f'{name}.gz'))
+    manifest = {
+        'version': version,
+        'url': f'{get_snapshot_url()}{name}',
+        'generated_at': timezone.now().isoformat(),
+        'titles': counts['titles'],
+        'size': os.path.getsize(os.path.join(directory, f'{name}.gz')),
+        'marks': marks_key(marks),
+    }
+    write_atomic(
+        os.path.join(directory, MANIFEST_NAME),
+        lambda file: file.write(json.dumps(manifest).encode())
+    )
+    snapshots = sorted(
+        glob.glob(os.path.join(directory, SNAPSHOT_PATTERN)),
+        key=os.path.getmtime, reverse=True
+    )
+    for path in snapshots[KEEP_SNAPSHOTS:]:
+        if not path.endswith(f'{name}.gz'):
+            os.unlink(path)
+    return manifest
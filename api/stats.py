@@ -0,0 +1,183 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import (Case, Count, F, OuterRef, Subquery, Sum,
+                              When)
+from django.db.models.functions import Coalesce
+
+from .models import Category, CategoryStat, Genre, GenreStat, Title
+
+TOP_TITLES = 3
+STAT_FIELDS = ('title_count', 'rated_count', 'rating_sum')
+TOP_FIELDS = tuple(
+    f'top_title_{place}' for place in range(1, TOP_TITLES + 1)
+)
+# Stat model -> (owner model, lookup of the owner on Title)
+FACETS = {
+    CategoryStat: (Category, 'category'),
+    GenreStat: (Genre, 'genre'),
+}
+
+
+def snapshot(title_ids):
+    """What every visible title contributes: its category, rating, genres."""
+    titles = {
+        pk: (category_id, rating)
+        for pk, category_id, rating in (
+            Title.objects
+            .filter(pk__in=title_ids, is_removed=False)
+            .values_list('pk', 'category_id', 'rating')
+        )
+    }
+    genres = defaultdict(set)
+    if titles:
+        for title_id, genre_id in (
+                Title.genre.through.objects
+                .filter(title_id__in=list(titles))
+                .values_list('title_id', 'genre_id')):
+            genres[title_id].add(genre_id)
+    return {
+        pk: (category_id, rating, frozenset(genres[pk]))
+        for pk, (category_id, rating) in titles.items()
+    }
+
+
+def stat_keys(state):
+    category_id, _, genre_ids = state
+    keys = [(GenreStat, genre_id) for genre_id in genre_ids]
+    if category_id is not None:
+        keys.append((CategoryStat, category_id))
+    return keys
+
+
+def top_fields(model):
+    """Recomputes the best rated titles of every updated row in SQL."""
+    _, lookup = FACETS[model]
+    titles = (
+        Title.objects
+        .filter(
+            **{lookup: OuterRef('pk')}, is_removed=False,
+            rating__isnull=False
+        )
+        .order_by('-rating', 'pk')
+        .values('pk')
+    )
+    return {
+        field: Subquery(titles[place:place + 1])
+        for place, field in enumerate(TOP_FIELDS)
+    }
+
+
+def contributions(state):
+    if state is None:
+        return {}
+    rating = state[1]
+    contribution = Counter(title_count=1)
+    if rating is not None:
+        contribution.update(rated_count=1, rating_sum=rating)
+    return {key: contribution for key in stat_keys(state)}
+
+
+def shift_fields(deltas):
+    fields = {}
+    for field in STAT_FIELDS:
+        whens = [
+            When(pk=owner_id, then=F(field) + delta[field])
+            for owner_id, delta in sorted(deltas.items()) if delta[field]
+        ]
+        if whens:
+            fields[field] = Case(*whens, default=F(field))
+    return fields
+
+
+def update_stats(before, title_ids):
+    """Applies the difference between a snapshot and the current titles.
+
+    Every stat row the titles belong to is refreshed, so the number of
+    queries does not depend on what changed.
+    """
+    after = snapshot(title_ids)
+    deltas = {model: defaultdict(Counter) for model in FACETS}
+    for title_id in set(before) | set(after):
+        old = contributions(before.get(title_id))
+        new = contributions(after.get(title_id))
+        for model, owner_id in old.keys() | new.keys():
+            delta = deltas[model][owner_id]
+            delta.update(new.get((model, owner_id), {}))
+            delta.subtract(old.get((model, owner_id), {}))
+    for model, owner_deltas in deltas.items():
+        if not owner_deltas:
+            continue
+        existing = set(
+            model.objects.filter(pk__in=list(owner_deltas))
+            .values_list('pk', flat=True)
+        )
+        missing = [pk for pk in owner_deltas if pk not in existing]
+        if missing:
+            rebuild_stats(model, missing)
+        if existing:
+            model.objects.filter(pk__in=existing).update(
+                **shift_fields({
+                    pk: delta for pk, delta in owner_deltas.items()
+                    if pk in existing
+                }),
+                **top_fields(model)
+            )
+
+
+def shift_rating(title_id, old, new):
+    """Moves a visible title's rating within the stats it belongs to."""
+    changes = {
+        'rated_count': (new is not None) - (old is not None),
+        'rating_sum': (new or 0) - (old or 0),
+    }
+    for model, (_, lookup) in FACETS.items():
+        model.objects.filter(**{f'{lookup}__titles': title_id}).update(
+            **{
+                field: F(field) + delta
+                for field, delta in changes.items() if delta
+            },
+            **top_fields(model)
+        )
+
+
+def rebuild_stats(model, owner_ids=None):
+    owner_model, lookup = FACETS[model]
+    owners = owner_model.objects.all()
+    if owner_ids is not None:
+        owners = owners.filter(pk__in=owner_ids)
+    owner_ids = list(owners.values_list('pk', flat=True))
+    if model is CategoryStat:
+        rows = (
+            Title.objects
+            .filter(category_id__in=owner_ids, is_removed=False)
+            .values_list('category_id')
+            .annotate(
+                title_count=Count('pk'),
+                rated_count=Count('rating'),
+                rating_sum=Coalesce(Sum('rating'), 0),
+            )
+        )
+    else:
+        rows = (
+            Title.genre.through.objects
+            .filter(genre_id__in=owner_ids, title__is_removed=False)
+            .values_list('genre_id')
+            .annotate(
+                title_count=Count('title_id'),
+                rated_count=Count('title__rating'),
+                rating_sum=Coalesce(Sum('title__rating'), 0),
+            )
+        )
+    counts = {row[0]: row[1:] for row in rows.order_by()}
+    with transaction.atomic():
+        model.objects.filter(pk__in=owner_ids).delete()
+        model.objects.bulk_create(
+            model(
+                **{f'{lookup}_id': owner_id},
+                **dict(zip(STAT_FIELDS, counts.get(owner_id, (0, 0, 0))))
+            )
+            for owner_id in owner_ids
+        )
+        model.objects.filter(pk__in=owner_ids).update(**top_fields(model))
+    return len(owner_ids)
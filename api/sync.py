@@ -0,0 +1,211 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import Category, Comment, Genre, Review, Title, Tombstone
+from .ratings import with_live_votes, write_behind_enabled
+from .serializers import (CategorySyncSerializer, FeedCommentSerializer,
+                          GenreSyncSerializer, ReviewSerializer,
+                          TitleSerializer, TombstoneSerializer)
+
+
+def get_page_size():
+    return getattr(settings, 'SYNC_PAGE_SIZE', 500)
+
+
+def get_settle_seconds():
+    return getattr(settings, 'SYNC_SETTLE_SECONDS', 5)
+
+
+def get_tombstone_days():
+    return getattr(settings, 'SYNC_TOMBSTONE_DAYS', 90)
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Cursor is too old, sync from scratch'
+    default_code = 'cursor_expired'
+
+
+class SyncSource:
+    def __init__(self, name, queryset, serializer_class, field='updated_at'):
+        self.name = name
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self.field = field
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def after(self, queryset, mark):
+        if mark is None:
+            return queryset
+        moment, pk = mark
+        return queryset.filter(
+            Q(**{f'{self.field}__gt': moment})
+            | Q(**{self.field: moment, 'pk__gt': pk})
+        )
+
+    def fetch(self, mark, horizon, size):
+        queryset = self.after(self.get_queryset(), mark).filter(
+            **{f'{self.field}__lte': horizon}
+        )
+        return list(queryset.order_by(self.field, 'pk')[:size + 1])
+
+    def mark(self, obj):
+        return getattr(obj, self.field), obj.pk
+
+    def serialize(self, objs):
+        return self.serializer_class(objs, many=True).data
+
+
+class TitleSyncSource(SyncSource):
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if write_behind_enabled():
+            queryset = with_live_votes(queryset)
+        return queryset
+
+
+DELETED = 'deleted'
+
+SYNC_SOURCES = [
+    SyncSource('categories', Category.objects.all(), CategorySyncSerializer),
+    SyncSource('genres', Genre.objects.all(), GenreSyncSerializer),
+    TitleSyncSource(
+        'titles',
+        Title.objects.filter(is_removed=False)
+        .select_related('category')
+        .prefetch_related('genre'),
+        TitleSerializer,
+    ),
+    SyncSource(
+        'reviews',
+        Review.objects.filter(
+            is_removed=False,
+            title__is_removed=False,
+            author__is_active=True
+        ).select_related('author', 'title'),
+        ReviewSerializer,
+    ),
+    SyncSource(
+        'comments',
+        Comment.objects.filter(
+            review__is_removed=False,
+            review__title__is_removed=False,
+            review__author__is_active=True,
+            author__is_active=True
+        ).select_related('author', 'review'),
+        FeedCommentSerializer,
+    ),
+    SyncSource(
+        DELETED, Tombstone.objects.all(), TombstoneSerializer, 'deleted_at'
+    ),
+]
+
+
+class SyncPagination:
+    """Pages through every change made after the watermarks of a cursor.
+
+    The cursor keeps one (timestamp, id) watermark per source. Rows newer
+    than SYNC_SETTLE_SECONDS are held back, so a transaction that commits
+    a little after its timestamp was taken is not skipped.
+    """
+
+    cursor_query_param = 'since'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            marks = {}
+            for source in SYNC_SOURCES:
+                mark = raw[source.name]
+                if mark is None:
+                    marks[source.name] = None
+                    continue
+                moment, pk = parse_datetime(mark[0]), int(mark[1])
+                if moment is None:
+                    raise ValueError(mark)
+                marks[source.name] = moment, pk
+        except (Base64Error, UnicodeError, ValueError, TypeError, KeyError,
+                IndexError):
+            raise NotFound(self.invalid_cursor_message)
+        return marks
+
+    def encode_cursor(self, marks):
+        raw = {
+            name: None if mark is None else [mark[0].isoformat(), mark[1]]
+            for name, mark in marks.items()
+        }
+        return urlsafe_b64encode(
+            json.dumps(raw).encode('ascii')
+        ).decode('ascii')
+
+    def paginate(self, request):
+        horizon = timezone.now() - timedelta(seconds=get_settle_seconds())
+        marks = self.decode_cursor(request)
+        if marks is None:
+            # A fresh copy gets every live row, so only deletions that
+            # happen from now on matter.
+            marks = {source.name: None for source in SYNC_SOURCES}
+            marks[DELETED] = horizon, 0
+        elif marks[DELETED] is None or marks[DELETED][0] < (
+                timezone.now() - timedelta(days=get_tombstone_days())):
+            raise CursorExpired()
+        size = get_page_size()
+        data = {}
+        has_more = False
+        for source in SYNC_SOURCES:
+            rows = source.fetch(marks[source.name], horizon, size)
+            if len(rows) > size:
+                has_more = True
+                rows = rows[:size]
+                marks[source.name] = source.mark(rows[-1])
+            elif rows and source.mark(rows[-1])[0] == horizon:
+                marks[source.name] = source.mark(rows[-1])
+            else:
+                # Everything up to the horizon has been sent, so an idle
+                # source does not keep the cursor in the past.
+                marks[source.name] = horizon, 0
+            data[source.name] = source.serialize(rows)
+        cursor = self.encode_cursor(marks)
+        next_url = None
+        if has_more:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), self.cursor_query_param, cursor
+            )
+        return Response({'next': next_url, 'cursor': cursor, **data})
+
+
+def prune_tombstones():
+    cutoff = timezone.now() - timedelta(days=get_tombstone_days())
+    expired = Tombstone.objects.filter(deleted_at__lt=cutoff)
+    return expired._raw_delete(expired.db)
+
+
+def delete_facets(owners, kind, lookup):
+    """Deletes categories or genres, their titles change for sync."""
+    ids = [owner.pk for owner in owners]
+    with transaction.atomic():
+        Title.objects.filter(**{f'{lookup}__in': ids}).update(
+            updated_at=timezone.now()
+        )
+        Tombstone.objects.record(kind, ids)
+        for owner in owners:
+            owner.delete()
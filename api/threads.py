@@ -0,0 +1,81 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from .models import PATH_STEP, Comment, Tombstone, path_segment
+
+# Every comment appends its id as a fixed-width base36 segment to the path
+# of its parent, so a subtree is one contiguous range of (review, path).
+MAX_DEPTH = 255 // PATH_STEP - 1
+MAX_THREAD_DEPTH = 5
+
+
+def path_successor(path):
+    return path[:-PATH_STEP] + path_segment(int(path[-PATH_STEP:], 36) + 1)
+
+
+def parent_path(path):
+    return path[:-PATH_STEP]
+
+
+def subtree_filter(comments):
+    return reduce(or_, (
+        Q(
+            review_id=comment.review_id,
+            path__gte=comment.path,
+            path__lt=path_successor(comment.path),
+        ) if comment.path else Q(pk=comment.pk)
+        for comment in comments
+    ), Q(pk__in=[]))
+
+
+def delete_subtree(subtree):
+    subtree._raw_delete(subtree.db)
+
+
+def delete_threads(comments):
+    # Deletes the comments together with every reply below them, so the
+    # parent constraint holds when the surrounding transaction commits.
+    roots = list(comments.only('pk', 'review_id', 'path'))
+    Tombstone.objects.record(
+        Tombstone.Kind.COMMENT, [comment.pk for comment in roots]
+    )
+    delete_subtree(Comment.objects.filter(subtree_filter(roots)))
+
+
+def delete_thread(comment):
+    Tombstone.objects.record(Tombstone.Kind.COMMENT, [comment.pk])
+    delete_subtree(Comment.objects.filter(subtree_filter([comment])))
+
+
+def build_threads(roots, depth, serialize):
+    if not roots:
+        return []
+    root_depth = roots[0].depth
+    nodes = {}
+    threads = []
+    for root in roots:
+        nodes[root.path] = serialize(root)
+        threads.append(nodes[root.path])
+    replies = (
+        Comment.objects
+        .filter(
+            subtree_filter(roots),
+            depth__gt=root_depth,
+            depth__lte=root_depth + depth + 1,
+            author__is_active=True,
+        )
+        .select_related('author')
+        .order_by('path')
+    )
+    for reply in replies:
+        parent = nodes.get(parent_path(reply.path))
+        if parent is None:
+            continue
+        if reply.depth > root_depth + depth:
+            parent['more_replies'] = True
+            continue
+        nodes[reply.path] = serialize(reply)
+        parent['replies'].append(nodes[reply.path])
+    return threads
@@ -5,7 +5,9 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from api import views
 from .views import (MyTokenObtainPairView, UserViewSet,
                     ReviewViewSet, CategoryViewSet,
-                    TitleViewSet, CommentViewSet, GenreViewSet)
+                    TitleViewSet, CommentViewSet, GenreViewSet,
+                    FeedViewSet, ModerationViewSet, IngestViewSet,
+                    SyncViewSet, CatalogViewSet)
 
 
 class CustomUserRouter(SimpleRouter):
@@ -64,6 +66,23 @@ router_user.register(r'users', UserViewSet)
 
 router_review_comment_title = DefaultRouter()
 router_review_comment_title.register(r'titles', TitleViewSet)
+router_review_comment_title.register(r'feed', FeedViewSet, basename='feed')
+router_review_comment_title.register(
+    r'moderation',
+    ModerationViewSet,
+    basename='moderation'
+)
+router_review_comment_title.register(
+    r'ingest',
+    IngestViewSet,
+    basename='ingest'
+)
+router_review_comment_title.register(r'sync', SyncViewSet, basename='sync')
+router_review_comment_title.register(
+    r'catalog',
+    CatalogViewSet,
+    basename='catalog'
+)
 router_review_comment_title.register(
     r'titles/(?P<title_id>[^/.]+)/reviews',
     ReviewViewSet
@@ -83,6 +102,14 @@ urlpatterns = [
         }
     )
          ),
+    path('v1/users/me/reviews/',
+         UserViewSet.as_view({'get': 'my_reviews'})),
+    path('v1/users/me/comments/',
+         UserViewSet.as_view({'get': 'my_comments'})),
+    path('v1/users/<str:username>/reviews/',
+         UserViewSet.as_view({'get': 'reviews'})),
+    path('v1/users/<str:username>/comments/',
+         UserViewSet.as_view({'get': 'comments'})),
     path('v1/', include(router_user.urls)),
     path('v1/', include(router_review_comment_title.urls)),
     path('v1/', include(router_category_genre.urls)),
@@ -1,29 +1,71 @@
 from django.conf import settings
 from django.core.mail import send_mail
+from django.db import transaction
 from django.db.models import QuerySet
+from django.http import Http404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import permission_classes, api_view, action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import (AllowAny,
+from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .models import User, Review, Comment, Category, Genre, Title, Rate
-from .permissions import IsAdmin, ReviewAndComment, UserPermission
+from .cache import (CATALOG_SCOPE, CachedResponseMixin, invalidate_catalog,
+                    invalidate_title, title_scope)
+from .events import publish_event
+from .feed import FEED_SOURCES, FeedCursorPagination
+from .idempotency import IdempotentCreateMixin
+from .ingest import ingest_reviews
+from .models import (User, Review, Comment, Category, Genre, Title, Rate,
+                     SimilarTitle, ReviewArchive, Tombstone)
+from .moderation import moderate_comments, moderate_reviews
+from .pagination import (ArchivePagination, PubDateCursorPagination,
+                         TitlePagination, UserCursorPagination)
+from .permissions import (IsAdmin, IsModerator, ReviewAndComment,
+                          UserPermission)
+from .purge import remove_review, remove_title, remove_user
+from .ratings import (apply_votes, live_rating, live_titles,
+                      with_live_votes, with_score_distribution,
+                      write_behind_enabled)
 from .serializers import (UserSerializer, TokenWithoutPasswordSerializer,
                           UserAllSerializer, ReviewSerializer,
-                          CommentSerializer, CategorySerializer,
-                          GenreSerializer, TitleSerializer)
+                          CommentSerializer, CategoryStatSerializer,
+                          GenreStatSerializer, TitleSerializer,
+                          TitleDetailSerializer, SimilarTitleSerializer,
+                          BulkModerationSerializer, TitleIdsSerializer,
+                          CommentThreadSerializer, UserReviewSerializer,
+                          UserCommentSerializer)
+from .snapshot import read_manifest
+from .stats import snapshot, update_stats
+from .sync import SyncPagination, delete_facets
+from .threads import (MAX_DEPTH, MAX_THREAD_DEPTH, build_threads,
+                      delete_thread)
+
+
+def get_limit(value, default, maximum):
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
 
 
 class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+    queryset = User.objects.filter(is_active=True)
     serializer_class = UserAllSerializer
     permission_classes = [UserPermission]
     lookup_field = 'username'
+    pagination_class = UserCursorPagination
+    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filterset_fields = ['role']
+    search_fields = ['^username', '^email']
+
+    def perform_destroy(self, instance):
+        remove_user(instance)
 
     @action(detail=True)
     def get_me(self, request):
@@ -45,6 +87,50 @@ class UserViewSet(viewsets.ModelViewSet):
     def delete_me(self, request):
         return Response(status=405)
 
+    def history(self, queryset, serializer_class):
+        paginator = PubDateCursorPagination()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(
+            serializer_class(page, many=True).data
+        )
+
+    def review_history(self, author):
+        return self.history(
+            Review.objects
+            .filter(author=author, is_removed=False, title__is_removed=False)
+            .select_related('author', 'title'),
+            UserReviewSerializer
+        )
+
+    def comment_history(self, author):
+        return self.history(
+            Comment.objects
+            .filter(
+                author=author,
+                review__is_removed=False,
+                review__title__is_removed=False,
+                review__author__is_active=True
+            )
+            .select_related('author', 'review__title'),
+            UserCommentSerializer
+        )
+
+    @action(detail=True)
+    def reviews(self, request, username=None):
+        return self.review_history(self.get_object())
+
+    @action(detail=True)
+    def comments(self, request, username=None):
+        return self.comment_history(self.get_object())
+
+    @action(detail=False)
+    def my_reviews(self, request):
+        return self.review_history(request.user)
+
+    @action(detail=False)
+    def my_comments(self, request):
+        return self.comment_history(request.user)
+
 
 @api_view(['post'])
 @permission_classes((AllowAny,))
@@ -67,105 +153,342 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = TokenWithoutPasswordSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(IdempotentCreateMixin, CachedResponseMixin,
+                    viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, ReviewAndComment]
+    pagination_class = ArchivePagination
+    cached_actions = ('list',)
+
+    def get_cache_scopes(self):
+        return [title_scope(self.kwargs.get('title_id'))]
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.review.all()
+        title = get_object_or_404(
+            Title,
+            pk=self.kwargs.get('title_id'),
+            is_removed=False
+        )
+        return (
+            title.review
+            .filter(is_removed=False, author__is_active=True)
+            .select_related('author', 'title')
+        )
+
+    def get_archive_queryset(self):
+        return ReviewArchive.objects.filter(
+            title_id=self.kwargs.get('title_id'),
+            title__is_removed=False,
+            author__is_active=True
+        ).select_related('author', 'title')
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action != 'retrieve':
+                raise
+        return get_object_or_404(
+            self.get_archive_queryset(), pk=self.kwargs.get('pk')
+        )
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        review = Review.objects.filter(
-            author=self.request.user,
-            title_id=self.kwargs.get('title_id')
-        )
-        serializer.check_review(review)
-        serializer.save(
-            author=self.request.user,
-            title_id=self.kwargs.get('title_id')
-        )
-        rate = get_object_or_404(Rate, title_id=self.kwargs.get('title_id'))
-        rate.sum_vote += serializer.data.get('score')
-        rate.count_vote += 1
-        rate.save()
-        title.rating = rate.sum_vote // rate.count_vote
-        title.save()
+        title = get_object_or_404(
+            live_titles(),
+            pk=self.kwargs.get('title_id'),
+            is_removed=False
+        )
+        lookup = {
+            'author': self.request.user,
+            'title_id': self.kwargs.get('title_id'),
+        }
+        serializer.check_review(
+            Review.objects.filter(**lookup).exists()
+            or ReviewArchive.objects.filter(**lookup).exists()
+        )
+        with transaction.atomic():
+            serializer.save(
+                author=self.request.user,
+                title_id=self.kwargs.get('title_id')
+            )
+            rating = apply_votes(title.pk, added=[serializer.instance.score])
+            publish_event(title.pk, 'review.created', serializer.data)
+        invalidate_title(title.pk, catalog=rating != live_rating(title))
 
     def perform_update(self, serializer):
-        review = get_object_or_404(
-            Review,
-            author=self.request.user,
-            title_id=self.kwargs.get('title_id')
-        )
-        rate = get_object_or_404(Rate, title_id=self.kwargs.get('title_id'))
-        rate.sum_vote -= review.score
-        serializer.save(
-            author=self.request.user,
-            title_id=self.kwargs.get('title_id')
+        title = get_object_or_404(
+            live_titles(), id=self.kwargs.get('title_id')
         )
-        rate.sum_vote += serializer.data.get('score')
-        rate.save()
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        title.rating = rate.sum_vote // rate.count_vote
-        title.save()
+        old_score = serializer.instance.score
+        with transaction.atomic():
+            serializer.save()
+            rating = apply_votes(
+                title.pk,
+                added=[serializer.instance.score],
+                removed=[old_score]
+            )
+            publish_event(title.pk, 'review.updated', serializer.data)
+        invalidate_title(title.pk, catalog=rating != live_rating(title))
 
     def perform_destroy(self, instance):
-        get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        rate = get_object_or_404(Rate, title_id=self.kwargs.get('title_id'))
-        rate.sum_vote -= instance.score
-        rate.count_vote -= 1
-        rate.save()
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        title.rating = rate.sum_vote // rate.count_vote
-        title.save()
-        instance.delete()
-
-
-class CommentViewSet(viewsets.ModelViewSet):
+        title = get_object_or_404(
+            live_titles(), pk=self.kwargs.get('title_id')
+        )
+        with transaction.atomic():
+            rating = apply_votes(title.pk, removed=[instance.score])
+            publish_event(title.pk, 'review.deleted', {'id': instance.pk})
+            remove_review(instance)
+        invalidate_title(title.pk, catalog=rating != live_rating(title))
+
+
+class CommentViewSet(IdempotentCreateMixin, CachedResponseMixin,
+                     viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, ReviewAndComment]
+    cached_actions = ('list', 'threads', 'thread')
+
+    def get_cache_scopes(self):
+        return [title_scope(self.kwargs.get('title_id'))]
+
+    def get_review(self):
+        return get_object_or_404(
+            Review,
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id'),
+            is_removed=False,
+            title__is_removed=False,
+            author__is_active=True
+        )
 
     def get_queryset(self):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        return review.comments.all()
+        try:
+            review = self.get_review()
+        except Http404:
+            # Archived threads stay readable, but are never written to.
+            if self.action not in ('list', 'retrieve'):
+                raise
+            review = get_object_or_404(
+                ReviewArchive,
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+                title__is_removed=False,
+                author__is_active=True
+            )
+        return (
+            review.comments
+            .filter(author__is_active=True)
+            .select_related('author')
+        )
 
     def perform_create(self, serializer):
-        get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        serializer.save(
-            author=self.request.user,
-            review_id=self.kwargs.get('review_id')
+        review = self.get_review()
+        parent = serializer.validated_data.get('parent')
+        if parent is not None and parent.review_id != review.pk:
+            raise ValidationError(
+                {'parent': 'Comment belongs to another review'}
+            )
+        depth = parent.depth + 1 if parent is not None else 0
+        if depth > MAX_DEPTH:
+            raise ValidationError(
+                {'parent': f'Threads are limited to {MAX_DEPTH} levels'}
+            )
+        serializer.save(author=self.request.user, review_id=review.pk)
+        self.publish('comment.created', serializer.data)
+        invalidate_title(self.kwargs.get('title_id'))
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.publish('comment.updated', serializer.data)
+        invalidate_title(self.kwargs.get('title_id'))
+
+    def perform_destroy(self, instance):
+        delete_thread(instance)
+        self.publish('comment.deleted', {'id': instance.pk})
+        invalidate_title(self.kwargs.get('title_id'))
+
+    def publish(self, event, data):
+        publish_event(
+            self.kwargs.get('title_id'),
+            event,
+            {**data, 'review': int(self.kwargs.get('review_id'))}
         )
 
+    def get_thread_depth(self, default):
+        return get_limit(
+            self.request.query_params.get('depth'),
+            default=default,
+            maximum=MAX_THREAD_DEPTH
+        )
+
+    @action(detail=False)
+    def threads(self, request, *args, **kwargs):
+        return self.cached(self.list_threads, request, *args, **kwargs)
+
+    def list_threads(self, request, *args, **kwargs):
+        paginator = PubDateCursorPagination()
+        roots = paginator.paginate_queryset(
+            self.get_queryset().filter(depth=0), request, view=self
+        )
+        return paginator.get_paginated_response(build_threads(
+            roots,
+            self.get_thread_depth(default=2),
+            lambda comment: CommentThreadSerializer(comment).data
+        ))
+
+    @action(detail=True)
+    def thread(self, request, *args, **kwargs):
+        return self.cached(self.retrieve_thread, request, *args, **kwargs)
+
+    def retrieve_thread(self, request, *args, **kwargs):
+        threads = build_threads(
+            [self.get_object()],
+            self.get_thread_depth(default=MAX_THREAD_DEPTH),
+            lambda comment: CommentThreadSerializer(comment).data
+        )
+        return Response(threads[0])
+
+
+class FeedViewSet(viewsets.GenericViewSet):
+    permission_classes = [AllowAny]
+    pagination_class = FeedCursorPagination
+
+    def list(self, request):
+        return self.paginator.paginate(
+            request,
+            FEED_SOURCES,
+            category=request.query_params.get('category'),
+            genre=request.query_params.get('genre'),
+        )
+
+
+class ModerationViewSet(viewsets.GenericViewSet):
+    permission_classes = [IsModerator]
+    serializer_class = BulkModerationSerializer
+
+    def moderate(self, request, model, handler):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        selection = dict(serializer.validated_data)
+        action_name = selection.pop('action')
+        text = selection.pop('text', None)
+        missing = []
+        if 'ids' in selection:
+            found = set(
+                model.objects
+                .filter(pk__in=selection['ids'])
+                .values_list('pk', flat=True)
+            )
+            missing = sorted(set(selection['ids']) - found)
+        affected = handler(action_name, text=text, **selection)
+        return Response({
+            'action': action_name,
+            'affected': affected,
+            'missing': missing,
+        })
+
+    @action(detail=False, methods=['post'])
+    def reviews(self, request):
+        return self.moderate(request, Review, moderate_reviews)
+
+    @action(detail=False, methods=['post'])
+    def comments(self, request):
+        return self.moderate(request, Comment, moderate_comments)
+
+
+class IngestViewSet(viewsets.GenericViewSet):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    @action(detail=False, methods=['post'])
+    def reviews(self, request):
+        # The NDJSON body is read line by line straight from the stream,
+        # request.data would load all of it.
+        stream = request.stream
+        if stream is None:
+            raise ValidationError('Empty upload')
+        return Response(ingest_reviews(stream))
+
+
+class SyncViewSet(viewsets.GenericViewSet):
+    permission_classes = [AllowAny]
+    pagination_class = SyncPagination
+
+    def list(self, request):
+        return self.paginator.paginate(request)
+
+
+class CatalogViewSet(viewsets.GenericViewSet):
+    permission_classes = [AllowAny]
+
+    def list(self, request):
+        manifest = read_manifest()
+        if manifest is None:
+            raise Http404('Catalog snapshot is not built yet')
+        etag = f'"{manifest["version"]}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+        data = {key: manifest[key]
+                for key in ('version', 'url', 'generated_at', 'titles',
+                            'size')}
+        return Response(data, headers=headers)
+
 
 class CategoryViewSet(viewsets.ModelViewSet):
-    queryset = Category.objects.all()
-    serializer_class = CategorySerializer
+    queryset = Category.objects.select_related('stat')
+    serializer_class = CategoryStatSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsAdmin]
     lookup_field = 'slug'
     filter_backends = [SearchFilter]
     search_fields = ['=name']
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidate_catalog()
+
+    def perform_destroy(self, instance):
+        delete_facets([instance], Tombstone.Kind.CATEGORY, 'category')
+        invalidate_catalog()
+
 
 class GenreViewSet(viewsets.ModelViewSet):
-    queryset = Genre.objects.all()
-    serializer_class = GenreSerializer
+    queryset = Genre.objects.select_related('stat')
+    serializer_class = GenreStatSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsAdmin]
     lookup_field = 'slug'
     filter_backends = [SearchFilter]
     search_fields = ['=name']
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidate_catalog()
+
+    def perform_destroy(self, instance):
+        delete_facets([instance], Tombstone.Kind.GENRE, 'genre')
+        invalidate_catalog()
+
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(IdempotentCreateMixin, CachedResponseMixin,
+                   viewsets.ModelViewSet):
+    queryset = (
+        Title.objects
+        .filter(is_removed=False)
+        .select_related('category')
+        .prefetch_related('genre')
+    )
     serializer_class = TitleSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsAdmin]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['year']
+    pagination_class = TitlePagination
+    cached_actions = ('list', 'retrieve')
+
+    def get_cache_scopes(self):
+        if self.action == 'retrieve':
+            return [CATALOG_SCOPE, title_scope(self.kwargs.get('pk'))]
+        return [CATALOG_SCOPE]
 
     def get_queryset(self):
         assert self.queryset is not None, (
@@ -188,15 +511,86 @@ class TitleViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(
                 genre__slug=self.request.query_params.get('genre')
             )
+        if self.action == 'retrieve':
+            queryset = with_score_distribution(queryset)
+        if write_behind_enabled():
+            queryset = with_live_votes(queryset)
         return queryset
 
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return TitleDetailSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'retrieve':
+            params = self.request.query_params
+            context['expand'] = set(filter(
+                None, params.get('expand', '').split(',')
+            ))
+            context['reviews_limit'] = get_limit(
+                params.get('reviews_limit'), default=10, maximum=100
+            )
+            context['comments_limit'] = get_limit(
+                params.get('comments_limit'), default=3, maximum=20
+            )
+        return context
+
+    def list(self, request, *args, **kwargs):
+        if 'ids' in request.query_params:
+            return self.cached(self.multi_get, request)
+        return super().list(request, *args, **kwargs)
+
+    def get_permissions(self):
+        if self.action == 'multi_get':
+            return [AllowAny()]
+        return super().get_permissions()
+
+    @action(detail=False, methods=['post'], url_path='multi-get')
+    def multi_get(self, request):
+        if request.method == 'POST':
+            data = request.data
+        else:
+            data = {'ids': [
+                pk.strip() for pk in request.query_params['ids'].split(',')
+            ]}
+        ids_serializer = TitleIdsSerializer(data=data)
+        ids_serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(ids_serializer.validated_data['ids']))
+        titles = self.get_queryset().in_bulk(ids)
+        serializer = TitleSerializer(
+            [titles[pk] for pk in ids if pk in titles],
+            many=True
+        )
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in titles],
+        })
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        if not pk.isdigit():
+            raise Http404
+        neighbours = list(
+            SimilarTitle.objects
+            .filter(title_id=pk, similar__is_removed=False)
+            .select_related('similar')
+            .order_by('rank')
+        )
+        if not neighbours:
+            get_object_or_404(
+                Title.objects.only('pk'), pk=pk, is_removed=False
+            )
+        return Response(SimilarTitleSerializer(neighbours, many=True).data)
+
     def perform_create(self, serializer):
         category, genres = serializer.check_category_genre(
             self.request.data.get('category'),
             self.request.data.getlist('genre')
         )
         if category:
-            serializer.save(category=category[0], genre=genres)
+            serializer.save(category=category, genre=genres)
         else:
             serializer.save(genre=genres)
         Rate.objects.create(
@@ -204,19 +598,26 @@ class TitleViewSet(viewsets.ModelViewSet):
             sum_vote=0,
             count_vote=0
         )
+        update_stats({}, [serializer.instance.pk])
+        invalidate_catalog()
 
     def perform_update(self, serializer):
         category, genres = serializer.check_category_genre(
             self.request.data.get('category'),
             self.request.data.getlist('genre')
         )
+        before = snapshot([serializer.instance.pk])
         if category:
-            serializer.save(category=category[0])
-        title = get_object_or_404(Title, pk=self.kwargs.get('pk'))
-        for genre in genres:
-            title.genre.add(get_object_or_404(Genre, slug=genre))
+            serializer.save(category=category)
+        title = serializer.instance
+        title.genre.add(*genres)
+        if genres:
+            Title.objects.filter(pk=title.pk).update(
+                updated_at=timezone.now()
+            )
+        update_stats(before, [title.pk])
+        invalidate_title(title.pk, catalog=True)
 
     def perform_destroy(self, instance):
-        rate = get_object_or_404(Rate, title_id=self.kwargs.get('pk'))
-        rate.delete()
-        instance.delete()
+        remove_title(instance)
+        invalidate_title(self.kwargs.get('pk'), catalog=True)
@@ -2,6 +2,8 @@
 ASGI config for YaMDb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Server-Sent Events under /api/v1/events/ are served by api.events, every
+other request goes to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
@@ -13,4 +15,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from api.events import events_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if (scope['type'] == 'lifespan'
+            or scope['path'].startswith('/api/v1/events/')):
+        return await events_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -47,13 +47,18 @@ INSTALLED_APPS = [
     'api',
 ]
 
+# Session, CSRF, auth and message middleware are skipped for /api/ requests
+# without a session cookie, see api.middleware.
+LEAN_MIDDLEWARE_PREFIX = '/api/'
+
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'api.middleware.LeanSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'api.middleware.LeanCsrfViewMiddleware',
+    'api.middleware.LeanAuthenticationMiddleware',
+    'api.middleware.LeanMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -94,6 +99,28 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+TITLE_COUNT_CACHE_TIMEOUT = 60
+TITLE_COUNT_ESTIMATE_THRESHOLD = 10000
+IDEMPOTENCY_CACHE_ALIAS = 'default'
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 600))
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -169,3 +196,32 @@ EMAIL_PORT = 587
 EMAIL_HOST_USER = os.getenv('EMAIL')
 EMAIL_HOST_PASSWORD = os.getenv('KEY')
 EMAIL_USE_TLS = True
+
+PURGE_BATCH_SIZE = 1000
+PURGE_INLINE_LIMIT = 100
+
+SIMILAR_TITLES_TOP_K = 10
+SIMILAR_TITLES_GENRE_WEIGHT = 0.3
+SIMILAR_TITLES_MEMORY_MB = 256
+
+RATING_WRITE_BEHIND = os.environ.get('RATING_WRITE_BEHIND') == '1'
+
+ARCHIVE_AFTER_DAYS = 2 * 365
+ARCHIVE_BATCH_SIZE = 1000
+
+SYNC_PAGE_SIZE = 500
+SYNC_SETTLE_SECONDS = 5
+SYNC_TOMBSTONE_DAYS = 90
+
+CATALOG_SNAPSHOT_DIR = os.path.join(BASE_DIR, 'static', 'catalog')
+CATALOG_SNAPSHOT_URL = STATIC_URL + 'catalog/'
+CATALOG_SNAPSHOT_DEBOUNCE = 30
+CATALOG_SNAPSHOT_MAX_DELAY = 300
+
+INGEST_CHUNK_SIZE = 1000
+INGEST_MAX_ERRORS = 100
+INGEST_MAX_LINE_BYTES = 64 * 1024
+
+EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'api.events.LocalBackend')
+EVENTS_HEARTBEAT = 15
+EVENTS_QUEUE_SIZE = 100
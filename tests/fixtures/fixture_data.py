@@ -0,0 +1,22 @@
+import pytest
+
+
+@pytest.fixture
+def category():
+    from api.models import Category
+    return Category.objects.create(name='Фильмы', slug='movie')
+
+
+@pytest.fixture
+def genre():
+    from api.models import Genre
+    return Genre.objects.create(name='Драма', slug='drama')
+
+
+@pytest.fixture
+def title(category, genre):
+    from api.models import Rate, Title
+    title = Title.objects.create(name='Title', year=2000, category=category)
+    title.genre.add(genre)
+    Rate.objects.create(title=title, sum_vote=0, count_vote=0)
+    return title
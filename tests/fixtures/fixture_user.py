@@ -0,0 +1,53 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+def make_user(username, role='user'):
+    from api.models import User
+    return User.objects.create(
+        email=f'{username}@yamdb.fake',
+        username=username,
+        role=role,
+    )
+
+
+def make_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def user():
+    return make_user('TestUser')
+
+
+@pytest.fixture
+def moderator():
+    return make_user('TestModerator', role='moderator')
+
+
+@pytest.fixture
+def admin():
+    return make_user('TestAdmin', role='admin')
+
+
+@pytest.fixture
+def anon_client():
+    return make_client()
+
+
+@pytest.fixture
+def user_client(user):
+    return make_client(user)
+
+
+@pytest.fixture
+def moderator_client(moderator):
+    return make_client(moderator)
+
+
+@pytest.fixture
+def admin_client(admin):
+    return make_client(admin)
@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.models import (Comment, CommentArchive, Rate, Review,
+                        ReviewArchive, Title)
+from api.pagination import ArchivePagination
+from api.purge import purge_title, purge_user
+from api.ratings import refresh_ratings
+from tests.fixtures.fixture_user import make_client, make_user
+
+
+def make_review(title, username, score, days_ago, comments=()):
+    author = make_user(username)
+    review = Review.objects.create(
+        title=title, author=author, text=username, score=score
+    )
+    past = timezone.now() - timedelta(days=days_ago)
+    Review.objects.filter(pk=review.pk).update(pub_date=past)
+    parent = None
+    for comment_days_ago in comments:
+        parent = Comment.objects.create(
+            review=review, author=author, text='comment', parent=parent
+        )
+        Comment.objects.filter(pk=parent.pk).update(
+            pub_date=timezone.now() - timedelta(days=comment_days_ago)
+        )
+    return review
+
+
+@pytest.mark.django_db
+class TestArchive:
+
+    @pytest.fixture
+    def reviews(self, title):
+        reviews = {
+            'old': make_review(title, 'old', 2, 400, comments=(390, 380)),
+            'discussed': make_review(title, 'discussed', 8, 400,
+                                     comments=(5,)),
+            'new': make_review(title, 'new', 10, 5),
+        }
+        refresh_ratings([title.pk])
+        return reviews
+
+    def archive(self):
+        call_command('archive_old_rows', days=30, verbosity=0)
+
+    def test_old_threads_are_moved(self, title, reviews):
+        rate = Rate.objects.values().get(title=title)
+
+        self.archive()
+
+        assert list(Review.objects.order_by('pk').values_list(
+            'pk', flat=True
+        )) == [reviews['discussed'].pk, reviews['new'].pk], \
+            'Проверьте, что в архив уходят только целиком старые ветки'
+        archived = ReviewArchive.objects.get()
+        assert archived.pk == reviews['old'].pk
+        comments = CommentArchive.objects.order_by('depth')
+        assert [comment.parent for comment in comments] == [
+            None, comments[0].pk
+        ], 'Проверьте, что ветка комментариев переносится целиком'
+        assert not Comment.objects.filter(review=reviews['old'].pk).exists()
+        assert Rate.objects.values().get(title=title) == rate, \
+            'Проверьте, что архивирование не меняет Rate'
+
+    def test_ratings_still_count_archive(self, title, reviews):
+        self.archive()
+        refresh_ratings([title.pk])
+
+        assert Title.objects.get(pk=title.pk).rating == 6
+        assert Rate.objects.get(title=title).count_vote == 3, \
+            'Проверьте, что архивные отзывы учитываются при пересчёте'
+
+    def test_dry_run_changes_nothing(self, reviews):
+        call_command('archive_old_rows', days=30, dry_run=True, verbosity=0)
+
+        assert Review.objects.count() == 3
+        assert not ReviewArchive.objects.exists()
+
+    def test_deep_pages_fall_back_to_archive(
+            self, monkeypatch, anon_client, title, reviews):
+        self.archive()
+        monkeypatch.setattr(ArchivePagination, 'page_size', 2)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+
+        first = anon_client.get(url).json()
+        second = anon_client.get(f'{url}?page=2').json()
+
+        assert first['count'] == 3
+        assert [review['id'] for review in second['results']] == [
+            reviews['old'].pk
+        ], 'Проверьте, что последние страницы дочитываются из архива'
+        assert second['results'][0]['author'] == 'old'
+
+    def test_archived_thread_is_readable(self, anon_client, title, reviews):
+        self.archive()
+        url = f'/api/v1/titles/{title.pk}/reviews/{reviews["old"].pk}/'
+
+        response = anon_client.get(url)
+        comments = anon_client.get(f'{url}comments/')
+
+        assert response.status_code == 200
+        assert response.json()['score'] == 2
+        assert comments.status_code == 200
+        assert comments.json()['count'] == 2
+
+    def test_archived_thread_is_read_only(self, title, reviews):
+        self.archive()
+        client = make_client(reviews['old'].author)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+
+        assert client.post(url, {'text': 'again', 'score': 5}) \
+            .status_code == 400, \
+            'Проверьте, что архивный отзыв мешает написать второй'
+        assert client.post(
+            f'{url}{reviews["old"].pk}/comments/', {'text': 'late'}
+        ).status_code == 404
+        assert client.delete(f'{url}{reviews["old"].pk}/').status_code == 404
+
+    def test_purge_removes_archive(self, title, reviews):
+        self.archive()
+
+        purge_user(reviews['old'].author_id)
+        assert not ReviewArchive.objects.exists()
+        assert Rate.objects.get(title=title).count_vote == 2
+
+        make_review(title, 'older', 4, 500)
+        self.archive()
+        purge_title(title.pk)
+        assert not ReviewArchive.objects.exists()
+        assert not CommentArchive.objects.exists()
@@ -0,0 +1,100 @@
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.models import Genre
+from api.snapshot import (build_snapshot, catalog_marks, is_settled,
+                          is_stale, read_manifest)
+
+URL = '/api/v1/catalog/'
+
+
+@pytest.mark.django_db
+class TestCatalogSnapshot:
+
+    @pytest.fixture(autouse=True)
+    def snapshot_dir(self, settings, tmp_path):
+        settings.CATALOG_SNAPSHOT_DIR = str(tmp_path)
+        return tmp_path
+
+    def load(self, snapshot_dir, manifest):
+        name = manifest['url'].rsplit('/', 1)[1] + '.gz'
+        with gzip.open(snapshot_dir / name) as file:
+            return json.load(file)
+
+    def test_snapshot_holds_the_catalog(self, snapshot_dir, title):
+        manifest = build_snapshot()
+        catalog = self.load(snapshot_dir, manifest)
+
+        assert [row['slug'] for row in catalog['categories']] == ['movie']
+        assert [row['slug'] for row in catalog['genres']] == ['drama']
+        assert [row['id'] for row in catalog['titles']] == [title.pk]
+        assert manifest['titles'] == 1
+        assert manifest['url'] == (
+            f'/static/catalog/catalog-{manifest["version"]}.json'
+        )
+
+    def test_version_follows_the_content(self, admin_client, title):
+        first = build_snapshot()
+
+        assert build_snapshot()['version'] == first['version'], \
+            'Проверьте, что версия не меняется без изменений каталога'
+
+        Genre.objects.create(name='Comedy', slug='comedy')
+        build_snapshot()
+        admin_client.patch(f'/api/v1/titles/{title.pk}/', {'genre': 'comedy'})
+
+        assert is_stale(read_manifest(), catalog_marks()), \
+            'Проверьте, что правка произведения делает снимок устаревшим'
+        assert build_snapshot()['version'] != first['version']
+
+    def test_deletes_make_the_snapshot_stale(self, admin_client, title):
+        build_snapshot()
+
+        admin_client.delete('/api/v1/categories/movie/')
+
+        assert is_stale(read_manifest(), catalog_marks())
+
+    def test_old_snapshots_are_removed(self, snapshot_dir, title):
+        for year in (2001, 2002, 2003):
+            title.year = year
+            title.save()
+            build_snapshot()
+
+        assert len(list(snapshot_dir.glob('catalog-*.json.gz'))) == 2
+
+    def test_rebuild_waits_for_a_quiet_catalog(self, settings, title):
+        settings.CATALOG_SNAPSHOT_DEBOUNCE = 30
+        settings.CATALOG_SNAPSHOT_MAX_DELAY = 300
+        marks = catalog_marks()
+        now = timezone.now()
+
+        assert not is_settled(marks, now, now), \
+            'Проверьте, что снимок не собирается сразу после изменения'
+        assert is_settled(marks, now, now + timedelta(seconds=31))
+        assert is_settled(marks, now - timedelta(seconds=300), now), \
+            'Проверьте, что поток изменений не откладывает сборку бесконечно'
+
+    def test_command_builds_only_when_stale(self, title):
+        call_command('build_catalog_snapshot')
+        first = read_manifest()
+        call_command('build_catalog_snapshot')
+
+        assert read_manifest()['generated_at'] == first['generated_at']
+
+    def test_manifest_endpoint(self, anon_client, title):
+        assert anon_client.get(URL).status_code == 404
+
+        manifest = build_snapshot()
+        response = anon_client.get(URL)
+
+        assert response.status_code == 200
+        assert response.json()['version'] == manifest['version']
+        assert 'marks' not in response.json()
+        assert anon_client.get(
+            URL, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == 304
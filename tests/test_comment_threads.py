@@ -0,0 +1,105 @@
+import pytest
+from django.core.management import call_command
+
+from api.models import Comment, Review
+from api.threads import PATH_STEP
+from tests.fixtures.fixture_user import make_client, make_user
+
+
+@pytest.mark.django_db
+class TestCommentThreads:
+
+    @pytest.fixture
+    def review(self, title, user):
+        return Review.objects.create(
+            title=title, author=user, text='review', score=7
+        )
+
+    @pytest.fixture
+    def url(self, title, review):
+        return f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+
+    def reply(self, client, url, text, parent=None):
+        data = {'text': text}
+        if parent is not None:
+            data['parent'] = parent['id']
+        response = client.post(url, data)
+        assert response.status_code == 201, response.content
+        return response.json()
+
+    @pytest.fixture
+    def thread(self, user_client, url):
+        root = self.reply(user_client, url, 'root')
+        child = self.reply(user_client, url, 'child', root)
+        grandchild = self.reply(user_client, url, 'grandchild', child)
+        sibling = self.reply(user_client, url, 'sibling', root)
+        other_root = self.reply(user_client, url, 'other root')
+        return root, child, grandchild, sibling, other_root
+
+    def test_replies_store_depth_and_path(self, thread):
+        root, child, grandchild, _, _ = thread
+        assert (child['parent'], child['depth']) == (root['id'], 1)
+        assert grandchild['depth'] == 2
+        root_path = Comment.objects.get(pk=root['id']).path
+        path = Comment.objects.get(pk=grandchild['id']).path
+        assert len(path) == 3 * PATH_STEP and path.startswith(root_path), \
+            'Проверьте, что путь ответа продолжает путь родителя'
+
+    def test_threads_are_depth_limited(self, anon_client, url, thread):
+        root, child, grandchild, sibling, other_root = thread
+        response = anon_client.get(f'{url}threads/', {'depth': 1})
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [item['id'] for item in results] == \
+            [other_root['id'], root['id']]
+        replies = results[1]['replies']
+        assert [item['id'] for item in replies] == \
+            [child['id'], sibling['id']]
+        assert replies[0]['replies'] == [] and replies[0]['more_replies'], \
+            'Проверьте, что глубже лимита отдаётся только признак ответов'
+
+        subtree = anon_client.get(f'{url}{child["id"]}/thread/').json()
+        assert subtree['replies'][0]['id'] == grandchild['id']
+        assert not subtree['replies'][0]['more_replies']
+
+    def test_top_level_cursor_pagination(self, anon_client, url, thread):
+        response = anon_client.get(
+            f'{url}threads/', {'page_size': 1}
+        ).json()
+        assert len(response['results']) == 1
+        following = anon_client.get(response['next']).json()
+        assert following['results'][0]['id'] == thread[0]['id']
+        assert following['next'] is None
+
+    def test_parent_must_share_review(self, user_client, title, url):
+        other = Review.objects.create(
+            title=title, author=make_user('other'), text='other', score=5
+        )
+        foreign = Comment.objects.create(
+            review=other, author=other.author, text='foreign'
+        )
+        response = user_client.post(
+            url, {'text': 'reply', 'parent': foreign.pk}
+        )
+        assert response.status_code == 400
+
+    def test_delete_removes_replies(self, url, thread):
+        root, child, _, sibling, other_root = thread
+        client = make_client(Comment.objects.get(pk=child['id']).author)
+        response = client.delete(f'{url}{root["id"]}/')
+        assert response.status_code == 204
+        assert list(Comment.objects.values_list('pk', flat=True)) == \
+            [other_root['id']], \
+            'Проверьте, что вместе с комментарием удаляются ответы на него'
+
+    def test_user_purge_removes_replies_of_others(
+            self, settings, admin_client, url, review):
+        settings.PURGE_INLINE_LIMIT = 0
+        author = make_user('author')
+        root = self.reply(make_client(author), url, 'root')
+        self.reply(make_client(review.author), url, 'answer', root)
+
+        admin_client.delete(f'/api/v1/users/{author.username}/')
+        call_command('process_purge_jobs', verbosity=0)
+
+        assert not Comment.objects.exists()
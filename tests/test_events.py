@@ -0,0 +1,167 @@
+import asyncio
+import json
+
+import pytest
+
+from api import events
+from api.events import Broadcaster, events_application, notify_payload
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.messages = []
+
+    async def start(self, broadcaster):
+        pass
+
+    def publish(self, message):
+        self.messages.append(message)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(events, 'get_backend', lambda: backend)
+    return backend
+
+
+@pytest.fixture
+def broadcaster(monkeypatch, backend):
+    broadcaster = Broadcaster()
+    monkeypatch.setattr(events, 'broadcaster', broadcaster)
+    return broadcaster
+
+
+class Connection:
+    def __init__(self, path):
+        self.scope = {'type': 'http', 'method': 'GET', 'path': path}
+        self.queue = None
+        self.sent = []
+
+    @property
+    def incoming(self):
+        # Created on first use, inside the loop asyncio.run() starts; on
+        # Python 3.8 a queue made earlier binds to another loop.
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+        return self.queue
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def body(self):
+        return b''.join(
+            message.get('body', b'') for message in self.sent
+        ).decode()
+
+    async def run(self, scenario):
+        task = asyncio.ensure_future(
+            events_application(self.scope, self.receive, self.send)
+        )
+        await asyncio.sleep(0)
+        await scenario()
+        await asyncio.sleep(0.01)
+        await self.incoming.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(task, 1)
+
+
+class TestEventStream:
+
+    def test_subscriber_gets_events_of_its_title(self, broadcaster):
+        connection = Connection('/api/v1/events/titles/1/')
+
+        async def scenario():
+            broadcaster.publish({
+                'title': 2, 'event': 'review.created', 'data': {'id': 7}
+            })
+            broadcaster.publish({
+                'title': 1, 'event': 'review.created', 'data': {'id': 5}
+            })
+
+        asyncio.run(connection.run(scenario))
+
+        start = connection.sent[0]
+        assert start['status'] == 200
+        assert (b'content-type', b'text/event-stream') in start['headers']
+        assert connection.body() == (
+            'retry: 5000\n\n'
+            'event: review.created\ndata: {"id": 5}\n\n'
+        ), 'Проверьте, что подписчик получает только свои события'
+        assert not broadcaster.subscribers, \
+            'Проверьте, что после отключения подписка снимается'
+
+    def test_idle_stream_gets_heartbeats(self, settings, broadcaster):
+        settings.EVENTS_HEARTBEAT = 0.001
+        connection = Connection('/api/v1/events/titles/1/')
+
+        async def scenario():
+            await asyncio.sleep(0.01)
+
+        asyncio.run(connection.run(scenario))
+
+        assert ': ping\n\n' in connection.body()
+
+    def test_slow_stream_is_dropped(self, settings, broadcaster):
+        settings.EVENTS_QUEUE_SIZE = 1
+
+        async def scenario():
+            await broadcaster.start()
+            subscription = broadcaster.subscribe(1)
+            for number in range(3):
+                broadcaster.publish({
+                    'title': 1, 'event': 'review.created',
+                    'data': {'id': number},
+                })
+            return subscription
+
+        subscription = asyncio.run(scenario())
+
+        assert subscription.overflowed
+        assert not broadcaster.subscribers
+
+    def test_unknown_path_is_not_found(self, broadcaster):
+        connection = Connection('/api/v1/events/unknown/')
+
+        asyncio.run(events_application(
+            connection.scope, connection.receive, connection.send
+        ))
+
+        assert connection.sent[0]['status'] == 404
+
+
+def test_large_notify_payload_is_truncated():
+    message = {
+        'title': 1, 'event': 'review.created',
+        'data': {'id': 5, 'text': 'x' * 10000},
+    }
+
+    payload = json.loads(notify_payload(message))
+
+    assert payload['data'] == {'id': 5}
+    assert payload['truncated'] is True
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPublishing:
+
+    def test_views_publish_after_commit(self, backend, user_client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+
+        review = user_client.post(url, {'text': 'new', 'score': 7}).json()
+        comment = user_client.post(
+            f'{url}{review["id"]}/comments/', {'text': 'reply'}
+        ).json()
+        user_client.delete(f'{url}{review["id"]}/')
+
+        assert [
+            (message['title'], message['event'], message['data']['id'])
+            for message in backend.messages
+        ] == [
+            (title.pk, 'review.created', review['id']),
+            (title.pk, 'comment.created', comment['id']),
+            (title.pk, 'review.deleted', review['id']),
+        ], 'Проверьте, что изменения отзывов и комментариев публикуются'
+        assert backend.messages[1]['data']['review'] == review['id']
@@ -0,0 +1,59 @@
+import pytest
+
+from api.models import Comment, Review, Title
+from tests.fixtures.fixture_user import make_user
+
+
+@pytest.mark.django_db
+class TestFeed:
+
+    @pytest.fixture
+    def activity(self, title, genre):
+        other = Title.objects.create(name='Other', year=2001)
+        items = []
+        for number in range(3):
+            author = make_user(f'author-{number}')
+            for target in (title, other):
+                review = Review.objects.create(
+                    title=target, author=author, text='text', score=5
+                )
+                comment = Comment.objects.create(
+                    review=review, author=author, text='comment'
+                )
+                items += [('review', review.pk), ('comment', comment.pk)]
+        return items
+
+    def walk(self, client, url):
+        seen = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            seen += [(item['type'], item['id']) for item in data['results']]
+            url = data['next']
+        return seen
+
+    def test_pages_cover_feed_once_newest_first(self, anon_client, activity):
+        seen = self.walk(anon_client, '/api/v1/feed/?page_size=4')
+
+        assert sorted(seen) == sorted(activity), \
+            'Проверьте, что лента по курсору отдаёт каждую запись один раз'
+        assert seen[0] == activity[-1], \
+            'Проверьте, что лента начинается с самых новых записей'
+
+    def test_genre_filter(self, anon_client, activity, title):
+        seen = self.walk(anon_client, '/api/v1/feed/?genre=drama')
+        reviews = set(
+            Review.objects.filter(title=title).values_list('pk', flat=True)
+        )
+        assert len(seen) == 6
+        assert {pk for kind, pk in seen if kind == 'review'} == reviews
+
+    def test_page_query_count_is_constant(
+            self, anon_client, activity, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            anon_client.get('/api/v1/feed/?page_size=10')
+
+    def test_invalid_cursor(self, anon_client):
+        response = anon_client.get('/api/v1/feed/?cursor=broken')
+        assert response.status_code == 404
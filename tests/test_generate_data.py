@@ -0,0 +1,60 @@
+import pytest
+from django.core.management import call_command
+
+from api.models import Category, Comment, Genre, Rate, Review, Title, User
+from api.ratings import calculate_rating
+
+
+def snapshot():
+    return (
+        list(Title.objects.order_by('pk').values_list('name', 'rating')),
+        list(Review.objects.order_by('pk').values_list(
+            'title__name', 'author__username', 'score'
+        )),
+    )
+
+
+@pytest.mark.django_db
+class TestGenerateData:
+
+    options = dict(
+        users=30, categories=3, genres=5, titles=20, reviews=150,
+        comments=200, verbosity=0,
+    )
+
+    def test_rates_match_reviews(self):
+        call_command('generate_data', seed=7, **self.options)
+
+        assert User.objects.count() == 30
+        assert Review.objects.count() == 150
+        assert Comment.objects.count() == 200
+        assert not User.objects.first().has_usable_password()
+        for title in Title.objects.prefetch_related('genre'):
+            rate = Rate.objects.get(title=title)
+            scores = list(
+                Review.objects.filter(title=title)
+                .values_list('score', flat=True)
+            )
+            assert (rate.sum_vote, rate.count_vote) == \
+                (sum(scores), len(scores)), \
+                'Проверьте, что Rate согласован с отзывами'
+            assert rate.votes_10 == scores.count(10)
+            assert title.rating == calculate_rating(sum(scores), len(scores))
+            assert 1 <= title.genre.count() <= 3
+        for comment in Comment.objects.select_related('review'):
+            assert comment.pub_date >= comment.review.pub_date
+
+    def test_same_seed_gives_same_data(self):
+        call_command('generate_data', seed=3, **self.options)
+        first = snapshot()
+        Comment.objects.all().delete()
+        Review.objects.all().delete()
+        Rate.objects.all().delete()
+        Title.objects.all().delete()
+        User.objects.all().delete()
+        Category.objects.all().delete()
+        Genre.objects.all().delete()
+
+        call_command('generate_data', seed=3, **self.options)
+        assert snapshot() == first, \
+            'Проверьте, что генерация воспроизводима по seed'
@@ -0,0 +1,92 @@
+import pytest
+
+from api.models import Comment, Rate, Review, Title
+from api.views import ReviewViewSet
+
+
+@pytest.mark.django_db
+class TestIdempotencyKey:
+
+    def post(self, client, url, data, key):
+        return client.post(url, data, HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_review_is_replayed(self, user_client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data = {'text': 'new', 'score': 7}
+
+        first = self.post(user_client, url, data, 'retry-1')
+        second = self.post(user_client, url, data, 'retry-1')
+
+        assert first.status_code == second.status_code == 201
+        assert second.json() == first.json(), \
+            'Проверьте, что повтор с тем же ключом возвращает исходный ответ'
+        assert second['Idempotent-Replayed'] == 'true'
+        assert Review.objects.filter(title=title).count() == 1
+        assert Rate.objects.get(title=title).count_vote == 1
+
+    def test_retried_comment_is_not_duplicated(self, user_client, title):
+        review = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/', {'text': 'r', 'score': 5}
+        ).json()
+        url = f'/api/v1/titles/{title.pk}/reviews/{review["id"]}/comments/'
+
+        for _ in range(3):
+            response = self.post(user_client, url, {'text': 'c'}, 'c-1')
+
+        assert response.status_code == 201
+        assert Comment.objects.count() == 1, \
+            'Проверьте, что повтор не создаёт дубликат комментария'
+
+    def test_key_with_another_body_is_rejected(self, admin_client, category):
+        data = {'name': 'New', 'year': 2000, 'category': 'movie'}
+
+        self.post(admin_client, '/api/v1/titles/', data, 'title-1')
+        response = self.post(
+            admin_client, '/api/v1/titles/', {**data, 'name': 'Other'},
+            'title-1'
+        )
+
+        assert response.status_code == 422
+        assert Title.objects.count() == 1
+
+    def test_request_in_progress_conflicts(self, monkeypatch, user_client,
+                                           title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data = {'text': 'new', 'score': 7}
+        retries = []
+        perform_create = ReviewViewSet.perform_create
+
+        def slow_create(view, serializer):
+            # The retry arrives while the first request is still running.
+            retries.append(self.post(user_client, url, data, 'busy'))
+            perform_create(view, serializer)
+
+        monkeypatch.setattr(ReviewViewSet, 'perform_create', slow_create)
+
+        response = self.post(user_client, url, data, 'busy')
+
+        assert response.status_code == 201
+        assert retries[0].status_code == 409, \
+            'Проверьте, что параллельный повтор получает 409'
+        assert Review.objects.filter(title=title).count() == 1
+
+    def test_keys_are_scoped_to_user(self, user_client, moderator_client,
+                                     title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data = {'text': 'new', 'score': 7}
+
+        self.post(user_client, url, data, 'shared')
+        response = self.post(moderator_client, url, data, 'shared')
+
+        assert response.status_code == 201
+        assert not response.has_header('Idempotent-Replayed')
+        assert Review.objects.filter(title=title).count() == 2
+
+    def test_without_key_nothing_is_stored(self, user_client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data = {'text': 'new', 'score': 7}
+
+        user_client.post(url, data)
+        response = user_client.post(url, data)
+
+        assert response.status_code == 400
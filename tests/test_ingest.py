@@ -0,0 +1,135 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Rate, Review, Title
+from tests.fixtures.fixture_user import make_user
+
+URL = '/api/v1/ingest/reviews/'
+
+
+def ndjson(*rows):
+    return '\n'.join(
+        row if isinstance(row, str) else json.dumps(row) for row in rows
+    ).encode()
+
+
+def upload(client, body):
+    return client.post(URL, body, content_type='application/x-ndjson')
+
+
+@pytest.mark.django_db
+class TestIngestReviews:
+
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, settings):
+        settings.INGEST_CHUNK_SIZE = 2
+
+    @pytest.fixture
+    def authors(self):
+        return [make_user(f'partner{number}') for number in range(4)]
+
+    def test_rows_are_inserted_and_rated(self, admin_client, title, authors):
+        response = upload(admin_client, ndjson(*(
+            {'title': title.pk, 'author': author.username, 'text': 'ok',
+             'score': score}
+            for author, score in zip(authors, (4, 6, 8, 10))
+        )))
+
+        assert response.status_code == 200
+        assert response.json() == {
+            'created': 4, 'failed': 0, 'errors': [],
+            'errors_truncated': False,
+        }
+        assert Review.objects.filter(title=title).count() == 4
+        rate = Rate.objects.get(title=title)
+        assert (rate.sum_vote, rate.count_vote, rate.votes_10) == (28, 4, 1)
+        assert Title.objects.get(pk=title.pk).rating == 7, \
+            'Проверьте, что рейтинг пересчитан по загруженным отзывам'
+
+    def test_bad_lines_are_reported(self, admin_client, title, authors):
+        Review.objects.create(
+            title=title, author=authors[0], text='old', score=5
+        )
+        row = {'title': title.pk, 'text': 'ok', 'score': 5}
+
+        response = upload(admin_client, ndjson(
+            {**row, 'author': authors[0].username},
+            '{broken',
+            '',
+            {**row, 'author': 'nobody'},
+            {**row, 'author': authors[1].username, 'score': 11},
+            {**row, 'author': authors[1].username},
+            {**row, 'author': authors[1].username},
+            {**row, 'author': authors[2].username, 'title': 999},
+            '[1, 2]',
+        ))
+
+        report = response.json()
+        assert report['created'] == 1
+        assert [(error['line'], list(error['errors'])) for error in
+                report['errors']] == [
+            (1, ['non_field_errors']),
+            (2, ['non_field_errors']),
+            (4, ['author']),
+            (5, ['score']),
+            (7, ['non_field_errors']),
+            (8, ['title']),
+            (9, ['non_field_errors']),
+        ], 'Проверьте, что ошибки привязаны к номерам строк'
+        assert Rate.objects.get(title=title).count_vote == 1
+
+    def test_errors_are_capped(self, settings, admin_client):
+        settings.INGEST_MAX_ERRORS = 2
+
+        report = upload(admin_client, ndjson(*['{'] * 5)).json()
+
+        assert report['failed'] == 5
+        assert len(report['errors']) == 2
+        assert report['errors_truncated'] is True
+
+    def test_long_lines_are_skipped(self, settings, admin_client, title,
+                                    authors):
+        settings.INGEST_MAX_LINE_BYTES = 100
+
+        report = upload(admin_client, ndjson(
+            {'title': title.pk, 'author': authors[0].username,
+             'text': 'x' * 300, 'score': 5},
+            {'title': title.pk, 'author': authors[1].username,
+             'text': 'short', 'score': 5},
+        )).json()
+
+        assert report['created'] == 1
+        assert report['errors'][0]['line'] == 1
+
+    def test_queries_do_not_grow_with_chunk(
+            self, settings, admin_client, title, authors):
+        settings.INGEST_CHUNK_SIZE = 1000
+        other = Title.objects.create(
+            name='Other', year=2000, category=title.category
+        )
+        other.genre.set(title.genre.all())
+        Rate.objects.create(title=other)
+        call_command('rebuild_title_stats', stdout=io.StringIO())
+        counts = []
+        for target, users in ((title, authors[:1]), (other, authors)):
+            with CaptureQueriesContext(connection) as queries:
+                upload(admin_client, ndjson(*(
+                    {'title': target.pk, 'author': author.username,
+                     'text': 'ok', 'score': 5}
+                    for author in users
+                )))
+            counts.append(len(queries))
+
+        assert counts[0] == counts[1], \
+            'Проверьте, что число запросов не зависит от размера пачки'
+
+    def test_only_admin_can_ingest(self, anon_client, user_client,
+                                   moderator_client):
+        assert upload(anon_client, b'{}').status_code == 401
+        assert upload(user_client, b'{}').status_code == 403
+        assert upload(moderator_client, b'{}').status_code == 403
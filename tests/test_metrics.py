@@ -0,0 +1,25 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_requests_are_labelled_by_action(self, anon_client, title):
+        anon_client.get('/api/v1/titles/')
+        anon_client.get(f'/api/v1/titles/{title.pk}/similar/')
+
+        response = anon_client.get('/metrics')
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert 'route="TitleViewSet.list"' in body, \
+            'Проверьте, что запросы помечаются именем ViewSet и action'
+        assert 'route="TitleViewSet.similar"' in body
+        assert 'yamdb_db_queries_per_request_bucket' in body
+        assert 'yamdb_response_cache_total{result="misses"}' in body
+        assert f'/titles/{title.pk}/' not in body
+
+    def test_healthz_reports_db_latency(self, anon_client):
+        response = anon_client.get('/healthz')
+        assert response.status_code == 200
+        assert response.json()['status'] == 'ok'
+        assert response.json()['db_latency_ms'] >= 0
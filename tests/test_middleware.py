@@ -0,0 +1,53 @@
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client
+
+from api.management.commands.benchmark_middleware import stock_middleware
+
+
+@pytest.mark.django_db
+class TestLeanMiddleware:
+
+    def test_api_reads_skip_sessions_and_csrf(self, client, category):
+        response = client.get('/api/v1/categories/')
+
+        assert response.status_code == 200
+        assert not hasattr(response.wsgi_request, 'session'), \
+            'Проверьте, что запрос к API без сессии не загружает сессию'
+        assert 'Cookie' not in response.get('Vary', '')
+
+    def test_api_with_session_cookie_keeps_the_pipeline(self, client):
+        client.cookies[settings.SESSION_COOKIE_NAME] = 'stale'
+
+        response = client.get('/api/v1/categories/')
+
+        assert hasattr(response.wsgi_request, 'session')
+
+    def test_admin_is_still_protected(self, admin):
+        client = Client(enforce_csrf_checks=True)
+
+        assert hasattr(client.get('/admin/login/').wsgi_request, 'session')
+        response = client.post(
+            '/admin/login/', {'username': 'admin', 'password': 'admin'}
+        )
+
+        assert response.status_code == 403, \
+            'Проверьте, что вход в админку без CSRF-токена запрещён'
+
+    def test_stock_middleware(self):
+        stock = stock_middleware(settings.MIDDLEWARE)
+
+        assert 'django.middleware.csrf.CsrfViewMiddleware' in stock
+        assert not any(path.startswith('api.middleware') for path in stock)
+
+    def test_benchmark_runs(self):
+        out = StringIO()
+
+        call_command(
+            'benchmark_middleware', requests=5, rounds=1, stdout=out
+        )
+
+        assert 'per request' in out.getvalue()
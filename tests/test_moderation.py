@@ -0,0 +1,87 @@
+import pytest
+
+from api.models import Comment, Rate, Review, Title
+from api.ratings import refresh_ratings
+from tests.fixtures.fixture_user import make_user
+
+
+@pytest.mark.django_db
+class TestBulkModeration:
+
+    @pytest.fixture
+    def spam(self, title):
+        other = Title.objects.create(name='Other', year=2001)
+        Rate.objects.create(title=other)
+        spammer = make_user('spammer')
+        honest = make_user('honest')
+        reviews = []
+        for target in (title, other):
+            reviews.append(Review.objects.create(
+                title=target, author=spammer, text='spam', score=1
+            ))
+            review = Review.objects.create(
+                title=target, author=honest, text='good', score=9
+            )
+            Comment.objects.create(review=review, author=spammer, text='spam')
+            Comment.objects.create(review=review, author=honest, text='ok')
+        refresh_ratings([title.pk, other.pk])
+        return reviews
+
+    def test_only_moderators(self, user_client):
+        response = user_client.post(
+            '/api/v1/moderation/reviews/',
+            {'action': 'delete', 'author': 'spammer'},
+            format='json'
+        )
+        assert response.status_code == 403
+
+    def test_delete_reviews_by_author(self, moderator_client, spam):
+        response = moderator_client.post(
+            '/api/v1/moderation/reviews/',
+            {'action': 'delete', 'author': 'spammer'},
+            format='json'
+        )
+        assert response.status_code == 200
+        assert response.json()['affected'] == 2
+        assert not Review.objects.filter(author__username='spammer').exists()
+        assert set(Title.objects.values_list('rating', flat=True)) == {9}, \
+            'Проверьте, что рейтинги пересчитываются после массового удаления'
+        for rate in Rate.objects.all():
+            assert (rate.sum_vote, rate.count_vote, rate.votes_1) == (9, 1, 0)
+
+    def test_delete_comments_by_ids_reports_missing(
+            self, moderator_client, spam):
+        ids = list(
+            Comment.objects
+            .filter(author__username='spammer')
+            .values_list('pk', flat=True)
+        )
+        response = moderator_client.post(
+            '/api/v1/moderation/comments/',
+            {'action': 'delete', 'ids': ids + [999]},
+            format='json'
+        )
+        assert response.json() == {
+            'action': 'delete', 'affected': 2, 'missing': [999]
+        }
+        assert Comment.objects.count() == 2
+
+    def test_update_requires_text(self, admin_client, spam):
+        response = admin_client.post(
+            '/api/v1/moderation/reviews/',
+            {'action': 'update', 'author': 'spammer'},
+            format='json'
+        )
+        assert response.status_code == 400
+
+        response = admin_client.post(
+            '/api/v1/moderation/reviews/',
+            {'action': 'update', 'author': 'spammer', 'text': '[removed]'},
+            format='json'
+        )
+        assert response.json()['affected'] == 2
+        assert set(
+            Review.objects
+            .filter(author__username='spammer')
+            .values_list('text', flat=True)
+        ) == {'[removed]'}
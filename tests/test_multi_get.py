@@ -0,0 +1,46 @@
+import pytest
+
+from api.models import Title
+
+
+@pytest.mark.django_db
+class TestTitleMultiGet:
+
+    @pytest.fixture
+    def titles(self, title, genre):
+        titles = [title]
+        for number in range(4):
+            other = Title.objects.create(name=f'Title {number}', year=2001)
+            other.genre.add(genre)
+            titles.append(other)
+        return titles
+
+    def test_get_keeps_order_and_reports_missing(self, anon_client, titles):
+        ids = [titles[3].pk, 999, titles[0].pk]
+        response = anon_client.get(
+            '/api/v1/titles/', {'ids': ','.join(map(str, ids))}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [item['id'] for item in data['results']] == ids[::2], \
+            'Проверьте, что произведения возвращаются в порядке запроса'
+        assert data['missing'] == [999]
+        assert data['results'][1]['genre'][0]['slug'] == 'drama'
+
+    def test_post_body_variant(self, anon_client, titles):
+        ids = [title.pk for title in reversed(titles)]
+        response = anon_client.post(
+            '/api/v1/titles/multi-get/', {'ids': ids}, format='json'
+        )
+        assert response.status_code == 200
+        assert [item['id'] for item in response.json()['results']] == ids
+
+    def test_query_count_does_not_grow(
+            self, anon_client, titles, django_assert_num_queries):
+        ids = ','.join(str(title.pk) for title in titles)
+        with django_assert_num_queries(2):
+            anon_client.get('/api/v1/titles/', {'ids': ids})
+
+    def test_invalid_ids(self, anon_client):
+        response = anon_client.get('/api/v1/titles/', {'ids': '1,abc'})
+        assert response.status_code == 400
@@ -0,0 +1,124 @@
+import pytest
+from django.core.management import call_command
+
+from api.models import Comment, PurgeJob, Rate, Review, Title, User
+from api.ratings import refresh_ratings
+from tests.fixtures.fixture_user import make_user
+
+
+def make_reviews(title, count, score=6, comments=0):
+    reviews = []
+    for number in range(count):
+        author = make_user(f'author-{title.pk}-{number}')
+        review = Review.objects.create(
+            title=title, author=author, text='text', score=score
+        )
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='comment')
+            for _ in range(comments)
+        )
+        reviews.append(review)
+    refresh_ratings([title.pk])
+    return reviews
+
+
+@pytest.mark.django_db
+class TestPurge:
+
+    @pytest.fixture(autouse=True)
+    def small_batches(self, settings):
+        settings.PURGE_BATCH_SIZE = 2
+        settings.PURGE_INLINE_LIMIT = 1
+
+    def test_large_title_is_hidden_then_purged(
+            self, admin_client, anon_client, title):
+        make_reviews(title, 3, comments=2)
+
+        response = admin_client.delete(f'/api/v1/titles/{title.pk}/')
+        assert response.status_code == 204
+        assert anon_client.get(f'/api/v1/titles/{title.pk}/').status_code \
+            == 404, 'Проверьте, что удаляемое произведение сразу скрыто'
+        assert Review.objects.filter(title=title).count() == 3, \
+            'Проверьте, что большое удаление откладывается в очередь'
+
+        call_command('process_purge_jobs', verbosity=0)
+
+        assert not Title.objects.filter(pk=title.pk).exists()
+        assert not Review.objects.exists()
+        assert not Comment.objects.exists()
+        assert not Rate.objects.exists()
+        assert PurgeJob.objects.get().status == PurgeJob.Status.DONE
+
+    def test_small_title_is_deleted_inline(self, admin_client, title):
+        make_reviews(title, 1)
+
+        admin_client.delete(f'/api/v1/titles/{title.pk}/')
+
+        assert not Title.objects.exists()
+        assert not PurgeJob.objects.exists()
+
+    def test_title_with_many_comments_is_purged(self, admin_client, title):
+        make_reviews(title, 1, comments=3)
+
+        admin_client.delete(f'/api/v1/titles/{title.pk}/')
+
+        assert Title.objects.filter(pk=title.pk, is_removed=True).exists(), \
+            'Проверьте, что комментарии учитываются при выборе очереди'
+        assert PurgeJob.objects.exists()
+
+    def test_review_purge_keeps_rating(self, anon_client, title):
+        review, other = make_reviews(title, 2, score=4, comments=3)
+        Review.objects.filter(pk=other.pk).update(score=8)
+        refresh_ratings([title.pk])
+        client = anon_client
+        client.force_authenticate(review.author)
+
+        response = client.delete(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        )
+        assert response.status_code == 204
+        reviews = client.get(f'/api/v1/titles/{title.pk}/reviews/').json()
+        assert [item['id'] for item in reviews['results']] == [other.pk]
+        assert Title.objects.get(pk=title.pk).rating == 8
+
+        call_command('process_purge_jobs', verbosity=0)
+
+        assert list(Review.objects.all()) == [other]
+        assert Comment.objects.filter(review=other).count() == 3
+
+    def test_replies_to_user_reviews_are_counted(self, admin_client, title):
+        review = make_reviews(title, 1)[0]
+        reader = make_user('reader')
+        Comment.objects.bulk_create(
+            Comment(review=review, author=reader, text='reply')
+            for _ in range(2)
+        )
+
+        admin_client.delete(f'/api/v1/users/{review.author.username}/')
+
+        assert User.objects.filter(pk=review.author.pk).exists(), \
+            'Проверьте, что ответы на отзывы пользователя учитываются ' \
+            'при выборе очереди'
+        assert PurgeJob.objects.exists()
+
+    def test_user_purge_recomputes_ratings(self, admin_client, title):
+        spammer = make_user('spammer')
+        other_title = Title.objects.create(name='Other', year=2001)
+        Rate.objects.create(title=other_title)
+        for target in (title, other_title):
+            Review.objects.create(
+                title=target, author=spammer, text='spam', score=1
+            )
+        refresh_ratings([title.pk, other_title.pk])
+
+        response = admin_client.delete(f'/api/v1/users/{spammer.username}/')
+        assert response.status_code == 204
+        assert not User.objects.get(pk=spammer.pk).is_active
+
+        call_command('process_purge_jobs', verbosity=0)
+
+        assert not User.objects.filter(pk=spammer.pk).exists()
+        for rate in Rate.objects.all():
+            assert (rate.sum_vote, rate.count_vote) == (0, 0)
+        assert set(Title.objects.values_list('rating', flat=True)) == {None}, \
+            'Проверьте, что удаление пользователя пересчитывает рейтинги'
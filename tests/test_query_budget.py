@@ -0,0 +1,302 @@
+import difflib
+import re
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+
+from api.datagen import generate
+from api.feed import FeedCursorPagination
+from api.models import Category, Genre, Title, User
+from api.pagination import PubDateCursorPagination, UserCursorPagination
+from tests.fixtures.fixture_user import make_client, make_user
+
+SIZES = {
+    'small': dict(users=10, categories=2, genres=4, titles=5, reviews=20,
+                  comments=40),
+    'large': dict(users=40, categories=4, genres=8, titles=30, reviews=300,
+                  comments=900),
+}
+
+
+class World:
+    def __init__(self, seed, sizes):
+        generate(seed=seed, **sizes)
+        tag = f'gen{seed}'
+        self.tag = tag
+        titles = Title.objects.filter(name__startswith=f'Title {tag}-')
+        self.title_ids = list(titles.values_list('pk', flat=True))
+        self.title = (
+            titles.annotate(reviews=Count('review'))
+            .order_by('-reviews', 'pk').first()
+        )
+        self.review = (
+            self.title.review.annotate(comment_count=Count('comments'))
+            .order_by('-comment_count', 'pk').first()
+        )
+        self.comment = self.review.comments.order_by('pk').first()
+        self.category = Category.objects.get(slug=f'{tag}-category-0')
+        self.genres = list(
+            Genre.objects.filter(slug__startswith=f'{tag}-genre-')
+            .order_by('pk')
+        )
+        # The least active reviewer who has not reviewed the title yet.
+        self.user = (
+            User.objects.filter(username__startswith=f'{tag}_')
+            .exclude(review__title=self.title)
+            .annotate(review_count=Count('review'))
+            .filter(review_count__gt=0)
+            .order_by('review_count', 'pk').first()
+        )
+        self.admin = make_user(f'{tag}_admin', role='admin')
+        self.signup = make_user(f'{tag}_signup')
+
+    def client(self, actor):
+        return make_client({
+            'anon': None,
+            'admin': self.admin,
+            'user': self.user,
+            'review_author': self.review.author,
+            'comment_author': self.comment.author,
+        }[actor])
+
+
+def titles(w):
+    return '/api/v1/titles/'
+
+
+def title(w):
+    return f'/api/v1/titles/{w.title.pk}/'
+
+
+def reviews(w):
+    return f'{title(w)}reviews/'
+
+
+def review(w):
+    return f'{reviews(w)}{w.review.pk}/'
+
+
+def comments(w):
+    return f'{review(w)}comments/'
+
+
+def comment(w):
+    return f'{comments(w)}{w.comment.pk}/'
+
+
+def title_data(w):
+    return {
+        'name': f'{w.tag} new', 'year': 2000, 'category': w.category.slug,
+        'genre': [genre.slug for genre in w.genres[:3]],
+    }
+
+
+def token_data(w):
+    return {
+        'email': w.signup.email,
+        'confirmation_code': w.signup.confirmation_key,
+    }
+
+
+# name: (actor, method, url, data, budget)
+ROUTES = {
+    'titles.list': ('anon', 'get', titles, None, 3),
+    'titles.list.filtered': (
+        'anon', 'get',
+        lambda w: f'{titles(w)}?category={w.category.slug}'
+                  f'&genre={w.genres[0].slug}',
+        None, 3,
+    ),
+    'titles.multi_get': (
+        'anon', 'get',
+        lambda w: f'{titles(w)}?ids={",".join(map(str, w.title_ids))}',
+        None, 2,
+    ),
+    'titles.retrieve': ('anon', 'get', title, None, 2),
+    'titles.retrieve.expanded': (
+        'anon', 'get', lambda w: f'{title(w)}?expand=reviews.comments',
+        None, 4,
+    ),
+    'titles.similar': (
+        'anon', 'get', lambda w: f'{title(w)}similar/', None, 2
+    ),
+    'titles.create': ('admin', 'post', titles, title_data, 13),
+    'titles.partial_update': ('admin', 'patch', title, title_data, 16),
+    'titles.destroy': ('admin', 'delete', title, None, 27),
+    'titles.destroy.background': ('admin', 'delete', title, None, 18),
+    'reviews.list': ('anon', 'get', reviews, None, 4),
+    'reviews.retrieve': ('anon', 'get', review, None, 2),
+    'reviews.create': (
+        'user', 'post', reviews, lambda w: {'text': 'new', 'score': 5}, 15
+    ),
+    'reviews.partial_update': (
+        'review_author', 'patch', review,
+        lambda w: {'text': 'edited', 'score': 7}, 15,
+    ),
+    'reviews.destroy': ('review_author', 'delete', review, None, 17),
+    'comments.list': ('anon', 'get', comments, None, 4),
+    'comments.threads': (
+        'anon', 'get', lambda w: f'{comments(w)}threads/?depth=3', None, 3
+    ),
+    'comments.thread': (
+        'anon', 'get', lambda w: f'{comment(w)}thread/', None, 3
+    ),
+    'comments.retrieve': ('anon', 'get', comment, None, 2),
+    'comments.create': (
+        'user', 'post', comments, lambda w: {'text': 'new'}, 5
+    ),
+    'comments.partial_update': (
+        'comment_author', 'patch', comment, lambda w: {'text': 'edited'}, 4
+    ),
+    'comments.destroy': ('comment_author', 'delete', comment, None, 4),
+    'categories.list': ('anon', 'get', lambda w: '/api/v1/categories/',
+                        None, 3),
+    'categories.create': (
+        'admin', 'post', lambda w: '/api/v1/categories/',
+        lambda w: {'name': f'{w.tag} new', 'slug': f'{w.tag}-new'}, 4,
+    ),
+    'categories.destroy': (
+        'admin', 'delete',
+        lambda w: f'/api/v1/categories/{w.category.slug}/', None, 9,
+    ),
+    'genres.list': ('anon', 'get', lambda w: '/api/v1/genres/', None, 3),
+    'genres.create': (
+        'admin', 'post', lambda w: '/api/v1/genres/',
+        lambda w: {'name': 'new', 'slug': f'{w.tag}-new'}, 3,
+    ),
+    'genres.destroy': (
+        'admin', 'delete',
+        lambda w: f'/api/v1/genres/{w.genres[0].slug}/', None, 8,
+    ),
+    'users.list': ('admin', 'get', lambda w: '/api/v1/users/', None, 2),
+    'users.retrieve': (
+        'admin', 'get', lambda w: f'/api/v1/users/{w.user.username}/',
+        None, 9,
+    ),
+    'users.create': (
+        'admin', 'post', lambda w: '/api/v1/users/',
+        lambda w: {'username': f'{w.tag}_new',
+                   'email': f'{w.tag}_new@yamdb.fake'},
+        4,
+    ),
+    'users.partial_update': (
+        'admin', 'patch', lambda w: f'/api/v1/users/{w.user.username}/',
+        lambda w: {'bio': 'edited'}, 3,
+    ),
+    'users.destroy': (
+        'admin', 'delete', lambda w: f'/api/v1/users/{w.user.username}/',
+        None, 41,
+    ),
+    'users.destroy.background': (
+        'admin', 'delete', lambda w: f'/api/v1/users/{w.user.username}/',
+        None, 9,
+    ),
+    'users.me': ('user', 'get', lambda w: '/api/v1/users/me/', None, 0),
+    'users.me.reviews': (
+        'user', 'get', lambda w: '/api/v1/users/me/reviews/', None, 1
+    ),
+    'users.reviews': (
+        'anon', 'get',
+        lambda w: f'/api/v1/users/{w.review.author.username}/reviews/',
+        None, 2,
+    ),
+    'users.comments': (
+        'anon', 'get',
+        lambda w: f'/api/v1/users/{w.comment.author.username}/comments/',
+        None, 2,
+    ),
+    'users.me.update': (
+        'user', 'patch', lambda w: '/api/v1/users/me/',
+        lambda w: {'bio': 'edited'}, 2,
+    ),
+    'auth.email': (
+        'anon', 'post', lambda w: '/api/v1/auth/email/',
+        lambda w: {'email': f'{w.tag}_register@yamdb.fake'}, 6,
+    ),
+    'auth.token': (
+        'anon', 'post', lambda w: '/api/v1/token/', token_data, 4
+    ),
+    'feed.list': ('anon', 'get', lambda w: '/api/v1/feed/', None, 2),
+    'moderation.reviews': (
+        'admin', 'post', lambda w: '/api/v1/moderation/reviews/',
+        lambda w: {'action': 'update', 'text': 'hidden',
+                   'author': w.review.author.username},
+        4,
+    ),
+}
+
+
+# users.me.reviews shares the history view with users.reviews, and the
+# world's user has a single review.
+LIST_ROUTES = [
+    'titles.list', 'titles.list.filtered', 'reviews.list', 'comments.list',
+    'comments.threads', 'categories.list', 'genres.list', 'users.list',
+    'users.reviews', 'users.comments', 'feed.list',
+]
+
+PAGINATORS = [
+    PageNumberPagination, PubDateCursorPagination, UserCursorPagination,
+    FeedCursorPagination,
+]
+
+
+def normalize(sql):
+    sql = re.sub(r"'[^']*'", "'?'", sql)
+    return re.sub(r'\b\d+(\.\d+)?\b', 'N', sql)
+
+
+def run(world, route):
+    actor, method, url, data, _ = ROUTES[route]
+    client = world.client(actor)
+    payload = data(world) if data else None
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(url(world), payload)
+    assert response.status_code < 400, (route, response.content)
+    return [query['sql'] for query in queries.captured_queries]
+
+
+def report(route, budget, small, large, labels=('small', 'large')):
+    diff = '\n'.join(difflib.unified_diff(
+        [normalize(sql) for sql in small],
+        [normalize(sql) for sql in large],
+        *labels, lineterm='',
+    ))
+    return (
+        f'{route}: {len(small)} queries on {labels[0]} data, {len(large)} '
+        f'on {labels[1]} data, budget {budget}\n'
+        + (diff or '\n'.join(large))
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('route', sorted(ROUTES))
+def test_query_budget(settings, route):
+    # Both worlds have to take the same deletion path, so each path is a
+    # route of its own.
+    settings.PURGE_INLINE_LIMIT = (
+        0 if route.endswith('.background') else 10 ** 6
+    )
+    budget = ROUTES[route][-1]
+    small = run(World(1, SIZES['small']), route)
+    large = run(World(2, SIZES['large']), route)
+    assert len(large) <= budget and len(small) == len(large), \
+        report(route, budget, small, large)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('route', sorted(LIST_ROUTES))
+def test_queries_do_not_grow_with_page_size(monkeypatch, route):
+    world = World(2, SIZES['large'])
+    pages = {}
+    for size in (1, 100):
+        for paginator in PAGINATORS:
+            monkeypatch.setattr(paginator, 'page_size', size)
+        pages[size] = run(world, route)
+    assert len(pages[1]) == len(pages[100]), \
+        report(route, ROUTES[route][-1], pages[1], pages[100],
+               ('1-row page', '100-row page'))
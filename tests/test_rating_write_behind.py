@@ -0,0 +1,72 @@
+import pytest
+from django.core.management import call_command
+
+from api.models import Rate, RatingDelta, Title
+from tests.fixtures.fixture_user import make_client, make_user
+
+
+@pytest.mark.django_db
+class TestRatingWriteBehind:
+
+    @pytest.fixture(autouse=True)
+    def write_behind(self, settings):
+        settings.RATING_WRITE_BEHIND = True
+
+    def post_reviews(self, title, *scores):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        reviews = []
+        for number, score in enumerate(scores):
+            client = make_client(make_user(f'author-{number}'))
+            response = client.post(url, {'text': 'text', 'score': score})
+            assert response.status_code == 201
+            reviews.append((client, f'{url}{response.json()["id"]}/'))
+        return reviews
+
+    def test_rating_is_exact_before_flush(self, anon_client, title):
+        reviews = self.post_reviews(title, 10, 6, 5)
+        client, url = reviews[0]
+        client.patch(url, {'score': 1})
+
+        assert RatingDelta.objects.count() == 5, \
+            'Проверьте, что в режиме write-behind оценки пишутся в журнал'
+        assert Rate.objects.get(title=title).count_vote == 0
+        response = anon_client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.json()['rating'] == 4, \
+            'Проверьте, что рейтинг учитывает ещё не перенесённые изменения'
+        response = anon_client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['rating'] == 4
+
+    def test_title_list_follows_live_rating(self, anon_client, title):
+        self.post_reviews(title, 5)
+        call_command('flush_rating_deltas', verbosity=0)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+
+        make_client(make_user('high')).post(url, {'text': 't', 'score': 9})
+        response = anon_client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['rating'] == 7
+
+        make_client(make_user('low')).post(url, {'text': 't', 'score': 1})
+        response = anon_client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['rating'] == 5, \
+            'Проверьте, что возврат рейтинга к перенесённому значению ' \
+            'сбрасывает кэш списка произведений'
+
+    def test_flush_folds_deltas(self, anon_client, title):
+        client, url = self.post_reviews(title, 9, 3)[1]
+        client.delete(url)
+
+        call_command('flush_rating_deltas', verbosity=0)
+
+        assert not RatingDelta.objects.exists()
+        rate = Rate.objects.get(title=title)
+        assert (rate.sum_vote, rate.count_vote) == (9, 1)
+        assert (rate.votes_9, rate.votes_3) == (1, 0)
+        assert Title.objects.get(pk=title.pk).rating == 9
+
+    def test_reconcile_keeps_pending_votes(self, title):
+        self.post_reviews(title, 8)
+
+        call_command('reconcile_ratings', verbosity=0)
+
+        assert not RatingDelta.objects.exists()
+        assert Rate.objects.get(title=title).count_vote == 1
@@ -0,0 +1,65 @@
+import pytest
+from django.core.management import call_command
+
+from api.models import Rate, Review, Title, User
+
+
+@pytest.mark.django_db
+class TestReconcileRatings:
+
+    def make_title(self, sum_vote, count_vote, rating):
+        title = Title.objects.create(name='Title', year=2000, rating=rating)
+        Rate.objects.create(
+            title=title, sum_vote=sum_vote, count_vote=count_vote
+        )
+        return title
+
+    def make_reviews(self, title, *scores):
+        for number, score in enumerate(scores):
+            author = User.objects.create(
+                email=f'{title.pk}-{number}@yamdb.fake',
+                username=f'user-{title.pk}-{number}',
+            )
+            Review.objects.create(
+                title=title, author=author, text='text', score=score
+            )
+
+    def test_reconcile_fixes_drift(self):
+        drifted = self.make_title(sum_vote=3, count_vote=5, rating=0)
+        self.make_reviews(drifted, 4, 9)
+        emptied = self.make_title(sum_vote=7, count_vote=1, rating=7)
+        consistent = self.make_title(sum_vote=10, count_vote=2, rating=5)
+        self.make_reviews(consistent, 3, 7)
+
+        call_command('reconcile_ratings', chunk_size=2, verbosity=0)
+
+        rate = Rate.objects.get(title=drifted)
+        assert (rate.sum_vote, rate.count_vote) == (13, 2), \
+            'Проверьте, что reconcile_ratings пересчитывает Rate по Review'
+        assert Title.objects.get(pk=drifted.pk).rating == 6, \
+            'Проверьте, что reconcile_ratings пересчитывает Title.rating'
+        rate = Rate.objects.get(title=emptied)
+        assert (rate.sum_vote, rate.count_vote) == (0, 0)
+        assert Title.objects.get(pk=emptied.pk).rating is None, \
+            'Проверьте, что рейтинг без отзывов сбрасывается в None'
+        assert Title.objects.get(pk=consistent.pk).rating == 5
+
+    def test_reconcile_creates_missing_rate(self):
+        title = Title.objects.create(name='Title', year=2000)
+        self.make_reviews(title, 8)
+
+        call_command('reconcile_ratings', verbosity=0)
+
+        rate = Rate.objects.get(title=title)
+        assert (rate.sum_vote, rate.count_vote) == (8, 1)
+
+    def test_dry_run_changes_nothing(self):
+        title = self.make_title(sum_vote=3, count_vote=5, rating=0)
+        self.make_reviews(title, 4)
+
+        call_command('reconcile_ratings', dry_run=True, verbosity=0)
+
+        rate = Rate.objects.get(title=title)
+        assert (rate.sum_vote, rate.count_vote) == (3, 5), \
+            'Проверьте, что --dry-run ничего не сохраняет'
+        assert Title.objects.get(pk=title.pk).rating == 0
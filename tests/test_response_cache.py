@@ -0,0 +1,69 @@
+import pytest
+
+from api.cache import response_cache
+from tests.fixtures.fixture_user import make_client, make_user
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_title_detail_is_cached(self, anon_client, title):
+        url = f'/api/v1/titles/{title.pk}/'
+        hits = response_cache.stats()['hits']
+
+        first = anon_client.get(url)
+        second = anon_client.get(url)
+
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT', \
+            'Проверьте, что повторный запрос произведения берётся из кэша'
+        assert second.json() == first.json()
+        assert response_cache.stats()['hits'] == hits + 1
+
+    def test_query_params_are_part_of_key(self, anon_client, title):
+        anon_client.get('/api/v1/titles/')
+        response = anon_client.get('/api/v1/titles/', {'year': 2000})
+        assert response['X-Cache'] == 'MISS'
+
+    def test_review_write_bumps_only_its_title(
+            self, user_client, anon_client, title):
+        other = type(title).objects.create(name='Other', year=2001)
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        other_url = f'/api/v1/titles/{other.pk}/reviews/'
+        anon_client.get(reviews_url)
+        anon_client.get(other_url)
+
+        response = user_client.post(reviews_url, {'text': 'ok', 'score': 7})
+        assert response.status_code == 201
+
+        response = anon_client.get(reviews_url)
+        assert response['X-Cache'] == 'MISS', \
+            'Проверьте, что новый отзыв сбрасывает кэш своего произведения'
+        assert len(response.json()['results']) == 1
+        assert anon_client.get(other_url)['X-Cache'] == 'HIT', \
+            'Проверьте, что отзыв не сбрасывает кэш других произведений'
+
+    def test_rating_change_refreshes_title_list(self, anon_client, title):
+        anon_client.get('/api/v1/titles/')
+        author = make_user('Critic')
+        make_client(author).post(
+            f'/api/v1/titles/{title.pk}/reviews/', {'text': 'ok', 'score': 9}
+        )
+
+        response = anon_client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['results'][0]['rating'] == 9
+
+    def test_comment_write_bumps_title(self, user_client, anon_client, title):
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/', {'text': 'ok', 'score': 5}
+        )
+        comments_url = (f'/api/v1/titles/{title.pk}/reviews/'
+                        f'{response.json()["id"]}/comments/')
+        anon_client.get(comments_url)
+
+        user_client.post(comments_url, {'text': 'comment'})
+
+        response = anon_client.get(comments_url)
+        assert response['X-Cache'] == 'MISS'
+        assert len(response.json()['results']) == 1
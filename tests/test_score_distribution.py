@@ -0,0 +1,71 @@
+import pytest
+from django.core.management import call_command
+
+from api.models import Rate, Review
+from tests.fixtures.fixture_user import make_client, make_user
+
+
+@pytest.mark.django_db
+class TestScoreDistribution:
+
+    def get_distribution(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.status_code == 200
+        return response.json()['score_distribution']
+
+    def test_distribution_follows_review_writes(
+            self, anon_client, user_client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        critic = make_client(make_user('Critic'))
+        critic.post(url, {'text': 'text', 'score': 3})
+        review_id = user_client.post(url, {'text': 'text', 'score': 7}).json()
+        review_id = review_id['id']
+
+        distribution = self.get_distribution(anon_client, title)
+        assert distribution['3'] == 1 and distribution['7'] == 1, \
+            'Проверьте, что гистограмма оценок обновляется при создании отзыва'
+        assert sum(distribution.values()) == 2
+
+        user_client.patch(f'{url}{review_id}/', {'score': 9})
+        distribution = self.get_distribution(anon_client, title)
+        assert distribution['7'] == 0 and distribution['9'] == 1
+
+        user_client.delete(f'{url}{review_id}/')
+        distribution = self.get_distribution(anon_client, title)
+        assert distribution['9'] == 0
+        assert sum(distribution.values()) == 1
+
+    def test_moderator_edit_keeps_the_author(self, moderator_client,
+                                             moderator, title):
+        author = make_user('Critic')
+        Review.objects.create(title=title, author=moderator, text='m',
+                              score=5)
+        review = Review.objects.create(title=title, author=author, text='t',
+                                       score=3)
+        call_command('reconcile_ratings', verbosity=0)
+
+        response = moderator_client.patch(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/', {'score': 8}
+        )
+
+        assert response.status_code == 200
+        review.refresh_from_db()
+        assert review.author == author, \
+            'Проверьте, что правка модератора не меняет автора отзыва'
+        rate = Rate.objects.get(title=title)
+        assert (rate.votes_3, rate.votes_8) == (0, 1)
+
+    def test_distribution_costs_no_extra_queries(
+            self, anon_client, title, django_assert_max_num_queries):
+        with django_assert_max_num_queries(3):
+            self.get_distribution(anon_client, title)
+
+    def test_reconcile_backfills_distribution(self, title, user):
+        Review.objects.create(title=title, author=user, text='t', score=10)
+
+        call_command('reconcile_ratings', verbosity=0)
+
+        rate = Rate.objects.get(title=title)
+        assert rate.votes_10 == 1, \
+            'Проверьте, что reconcile_ratings заполняет гистограмму оценок'
+        assert rate.count_vote == 1
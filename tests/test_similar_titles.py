@@ -0,0 +1,64 @@
+import pytest
+from django.core.management import call_command
+
+from api.models import Genre, Review, SimilarTitle, Title
+from tests.fixtures.fixture_user import make_user
+
+
+@pytest.mark.django_db
+class TestSimilarTitles:
+
+    @pytest.fixture
+    def catalog(self):
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        rock = Genre.objects.create(name='Рок', slug='rock')
+        titles = [
+            Title.objects.create(name=f'Title {number}', year=2000)
+            for number in range(4)
+        ]
+        for title in titles[:2]:
+            title.genre.add(drama)
+        for title in titles[2:]:
+            title.genre.add(rock)
+        votes = {
+            'fan': (10, 9, 1, 2),
+            'critic': (9, 10, 2, 1),
+            'rocker': (1, 2, 10, 9),
+        }
+        for username, scores in votes.items():
+            author = make_user(username)
+            for title, score in zip(titles, scores):
+                Review.objects.create(
+                    title=title, author=author, text='text', score=score
+                )
+        return titles
+
+    def test_build_and_serve(self, anon_client, catalog):
+        call_command('build_similar_titles', top_k=2, verbosity=0)
+
+        response = anon_client.get(f'/api/v1/titles/{catalog[0].pk}/similar/')
+        assert response.status_code == 200
+        data = response.json()
+        assert data[0]['id'] == catalog[1].pk, \
+            'Проверьте, что самым похожим считается произведение с ' \
+            'похожими оценками и жанрами'
+        assert data[0]['score'] > 0.9
+        assert all(item['id'] != catalog[0].pk for item in data)
+
+    def test_incremental_refresh(self, catalog):
+        call_command('build_similar_titles', titles=[catalog[0].pk],
+                     verbosity=0)
+        assert set(SimilarTitle.objects.values_list('title', flat=True)) \
+            == {catalog[0].pk}
+
+        call_command('build_similar_titles', changed=True, verbosity=0)
+        assert SimilarTitle.objects.values('title').distinct().count() == 4
+
+    def test_unknown_title(self, anon_client):
+        response = anon_client.get('/api/v1/titles/999/similar/')
+        assert response.status_code == 404
+
+    def test_malformed_id(self, anon_client):
+        response = anon_client.get('/api/v1/titles/abc/similar/')
+        assert response.status_code == 404, \
+            'Проверьте, что нечисловой id произведения даёт 404'
@@ -0,0 +1,115 @@
+import pytest
+
+from api.models import Comment, Review, Title, Tombstone
+from tests.fixtures.fixture_user import make_user
+
+URL = '/api/v1/sync/'
+
+
+@pytest.mark.django_db
+class TestSync:
+
+    @pytest.fixture(autouse=True)
+    def no_settle(self, settings):
+        settings.SYNC_SETTLE_SECONDS = 0
+
+    @pytest.fixture
+    def review(self, title):
+        review = Review.objects.create(
+            title=title, author=make_user('critic'), text='ok', score=7
+        )
+        Comment.objects.create(
+            review=review, author=make_user('reader'), text='agree'
+        )
+        return review
+
+    def sync(self, client, cursor=None):
+        response = client.get(URL, {'since': cursor} if cursor else {})
+        assert response.status_code == 200
+        return response.json()
+
+    def test_first_sync_sends_everything(self, anon_client, title, review):
+        data = self.sync(anon_client)
+
+        assert [row['slug'] for row in data['categories']] == ['movie']
+        assert [row['slug'] for row in data['genres']] == ['drama']
+        assert [row['id'] for row in data['titles']] == [title.pk]
+        assert [row['id'] for row in data['reviews']] == [review.pk]
+        assert data['comments'][0]['review'] == review.pk
+        assert data['deleted'] == []
+        assert data['next'] is None
+
+    def test_next_sync_sends_only_changes(self, anon_client, user_client,
+                                          title, review):
+        cursor = self.sync(anon_client)['cursor']
+        own = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/', {'text': 'new', 'score': 3}
+        ).json()
+
+        data = self.sync(anon_client, cursor)
+
+        assert [row['id'] for row in data['reviews']] == [own['id']], \
+            'Проверьте, что синхронизация отдаёт только изменения'
+        assert [row['id'] for row in data['titles']] == [title.pk], \
+            'Проверьте, что смена рейтинга попадает в синхронизацию'
+        assert data['categories'] == data['genres'] == data['comments'] == []
+
+        cursor = data['cursor']
+        user_client.delete(f'/api/v1/titles/{title.pk}/reviews/{own["id"]}/')
+
+        data = self.sync(anon_client, cursor)
+
+        assert data['deleted'] == [{'kind': 'review', 'id': own['id']}], \
+            'Проверьте, что удаления приходят записями в deleted'
+        assert data['reviews'] == []
+
+    def test_removed_title_and_category_are_tombstoned(
+            self, admin_client, anon_client, title, category):
+        cursor = self.sync(anon_client)['cursor']
+
+        admin_client.delete(f'/api/v1/titles/{title.pk}/')
+        admin_client.delete('/api/v1/categories/movie/')
+        data = self.sync(anon_client, cursor)
+
+        assert data['deleted'] == [
+            {'kind': 'title', 'id': title.pk},
+            {'kind': 'category', 'id': category.pk},
+        ]
+
+    def test_pages_are_resumable(self, settings, anon_client, title):
+        settings.SYNC_PAGE_SIZE = 1
+        other = Title.objects.create(name='Other', year=2001)
+
+        first = self.sync(anon_client)
+        second = anon_client.get(first['next']).json()
+
+        assert [row['id'] for row in first['titles']] == [title.pk]
+        assert [row['id'] for row in second['titles']] == [other.pk]
+        assert second['next'] is None
+
+    def test_recent_rows_wait_for_the_horizon(self, settings, anon_client,
+                                              title):
+        settings.SYNC_SETTLE_SECONDS = 60
+
+        assert self.sync(anon_client)['titles'] == []
+
+    def test_bad_and_expired_cursors(self, settings, anon_client, title):
+        assert anon_client.get(URL, {'since': 'broken'}).status_code == 404
+
+        cursor = self.sync(anon_client)['cursor']
+        settings.SYNC_TOMBSTONE_DAYS = 0
+
+        assert anon_client.get(URL, {'since': cursor}).status_code == 410, \
+            'Проверьте, что устаревший курсор требует полной синхронизации'
+
+    def test_comment_deletes_are_recorded(self, moderator_client, review):
+        comment = review.comments.get()
+
+        moderator_client.delete(
+            f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+            f'comments/{comment.pk}/'
+        )
+
+        assert list(Tombstone.objects.values_list('kind', 'object_id')) == [
+            ('comment', comment.pk)
+        ]
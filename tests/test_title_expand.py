@@ -0,0 +1,57 @@
+import pytest
+
+from api.models import Comment, Review
+from tests.fixtures.fixture_user import make_user
+
+
+@pytest.mark.django_db
+class TestTitleExpand:
+
+    @pytest.fixture
+    def discussion(self, title):
+        for number in range(4):
+            author = make_user(f'author-{number}')
+            review = Review.objects.create(
+                title=title, author=author, text='text', score=5
+            )
+            for _ in range(number):
+                Comment.objects.create(
+                    review=review, author=author, text='comment'
+                )
+        return title
+
+    def get(self, client, title, **params):
+        response = client.get(f'/api/v1/titles/{title.pk}/', params)
+        assert response.status_code == 200
+        return response.json()
+
+    def test_plain_detail_has_no_reviews(self, anon_client, discussion):
+        assert 'reviews' not in self.get(anon_client, discussion)
+
+    def test_expand_reviews_and_comments(self, anon_client, discussion):
+        data = self.get(
+            anon_client, discussion,
+            expand='reviews,reviews.comments',
+            reviews_limit=3, comments_limit=2
+        )
+        reviews = data['reviews']
+        assert len(reviews['results']) == 3 and reviews['has_more']
+        comments = {
+            review['author']: review['comments']
+            for review in reviews['results']
+        }
+        assert len(comments['author-3']['results']) == 2, \
+            'Проверьте, что у отзыва встраиваются только первые N комментариев'
+        assert comments['author-3']['has_more']
+        assert len(comments['author-2']['results']) == 2
+        assert not comments['author-2']['has_more']
+        assert comments['author-1']['results'][0]['text'] == 'comment'
+
+    def test_query_count_does_not_depend_on_reviews(
+            self, anon_client, discussion, django_assert_num_queries):
+        with django_assert_num_queries(4):
+            self.get(anon_client, discussion,
+                     expand='reviews,reviews.comments', reviews_limit=2)
+        with django_assert_num_queries(4):
+            self.get(anon_client, discussion,
+                     expand='reviews,reviews.comments', reviews_limit=4)
@@ -0,0 +1,65 @@
+import pytest
+
+from api import pagination
+from api.models import Title
+
+
+@pytest.mark.django_db
+class TestTitlePagination:
+
+    @pytest.fixture(autouse=True)
+    def titles(self, monkeypatch):
+        monkeypatch.setattr(pagination.TitlePagination, 'page_size', 2)
+        Title.objects.bulk_create(
+            Title(name=f'Title {number}', year=2000) for number in range(5)
+        )
+
+    def test_count_is_cached_per_filters(self, anon_client):
+        first = anon_client.get('/api/v1/titles/', {'year': 2000})
+        assert first.json()['count'] == 5
+        assert first.json()['count_estimated'] is False
+        Title.objects.create(name='Uncounted', year=2000)
+
+        second = anon_client.get(
+            '/api/v1/titles/', {'year': 2000, 'page': 2}
+        )
+        assert second.json()['count'] == 5, \
+            'Проверьте, что количество кешируется для набора фильтров'
+        other = anon_client.get('/api/v1/titles/', {'year': 2001})
+        assert other.json()['count'] == 0
+
+    def test_catalog_write_resets_cached_count(self, admin_client):
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 5
+        admin_client.post(
+            '/api/v1/titles/', {'name': 'New', 'year': 2000}
+        )
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 6
+
+    def test_count_can_be_skipped(self, anon_client):
+        response = anon_client.get(
+            '/api/v1/titles/', {'count': 'false', 'page': 2}
+        )
+        data = response.json()
+        assert 'count' not in data, \
+            'Проверьте, что count=false отключает подсчёт'
+        assert len(data['results']) == 2
+        assert data['next'].endswith('page=3')
+        assert data['previous'].endswith('count=false')
+
+        last = anon_client.get(
+            '/api/v1/titles/', {'count': 'false', 'page': 3}
+        )
+        assert last.json()['next'] is None
+        assert len(last.json()['results']) == 1
+        assert anon_client.get(
+            '/api/v1/titles/', {'page': 4}
+        ).status_code == 404
+
+    def test_large_counts_are_estimated(self, anon_client, monkeypatch):
+        monkeypatch.setattr(
+            pagination, 'estimate_count', lambda queryset: 50000
+        )
+        data = anon_client.get('/api/v1/titles/').json()
+        assert (data['count'], data['count_estimated']) == (50000, True)
+        assert data['next'].endswith('page=2'), \
+            'Проверьте, что ссылки не зависят от оценки количества'
@@ -0,0 +1,108 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from api.models import CategoryStat, Genre, GenreStat
+from tests.fixtures.fixture_user import make_client, make_user
+
+TITLES = '/api/v1/titles/'
+
+
+def stat_values():
+    return {
+        model.__name__: sorted(model.objects.values_list(
+            'pk', 'title_count', 'rated_count', 'rating_sum',
+            'top_title_1', 'top_title_2', 'top_title_3',
+        ))
+        for model in (CategoryStat, GenreStat)
+    }
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    @pytest.fixture
+    def comedy(self):
+        return Genre.objects.create(name='Комедия', slug='comedy')
+
+    def create_title(self, client, name, genres):
+        response = client.post(TITLES, {
+            'name': name, 'year': 2000, 'category': 'movie',
+            'genre': genres,
+        })
+        assert response.status_code == 201
+        return response.json()['id']
+
+    def review(self, client, title_id, score):
+        response = client.post(
+            f'{TITLES}{title_id}/reviews/', {'text': 'ok', 'score': score}
+        )
+        assert response.status_code == 201
+
+    def test_stats_follow_titles_and_reviews(
+            self, admin_client, user_client, category, genre, comedy):
+        first = self.create_title(admin_client, 'First', ['drama'])
+        second = self.create_title(admin_client, 'Second',
+                                   ['drama', 'comedy'])
+        self.review(user_client, first, 4)
+        self.review(user_client, second, 9)
+        self.review(admin_client, second, 7)
+
+        stat = CategoryStat.objects.get(category=category)
+        assert (stat.title_count, stat.rated_count, stat.rating_sum) == \
+            (2, 2, 12), \
+            'Проверьте, что статистика категории обновляется по отзывам'
+        assert stat.rating == 6
+        assert stat.top_title_ids == [second, first]
+        assert GenreStat.objects.get(genre=comedy).top_title_ids == [second]
+
+        response = admin_client.patch(
+            f'{TITLES}{first}/', {'genre': ['comedy']}
+        )
+        assert response.status_code == 200
+        assert GenreStat.objects.get(genre=comedy).title_count == 2
+
+        assert admin_client.delete(f'{TITLES}{second}/').status_code == 204
+        stat = CategoryStat.objects.get(category=category)
+        assert (stat.title_count, stat.rating, stat.top_title_ids) == \
+            (1, 4, [first]), \
+            'Проверьте, что удалённое произведение уходит из статистики'
+
+    def test_rebuild_matches_incremental(
+            self, admin_client, category, genre, comedy):
+        titles = [
+            self.create_title(admin_client, f'Title {number}', genres)
+            for number, genres in enumerate(
+                (['drama'], ['comedy'], ['drama', 'comedy'])
+            )
+        ]
+        for number, title_id in enumerate(titles):
+            for score in range(number + 1):
+                critic = make_user(f'critic{title_id}_{score}')
+                self.review(make_client(critic), title_id, score + 5)
+        incremental = stat_values()
+
+        call_command('rebuild_title_stats', stdout=io.StringIO())
+
+        assert stat_values() == incremental, \
+            'Проверьте, что пересчёт с нуля совпадает с обновлениями'
+
+    def test_lists_show_stats(self, admin_client, anon_client, user_client,
+                              title):
+        call_command('rebuild_title_stats', stdout=io.StringIO())
+        self.review(user_client, title.pk, 8)
+
+        categories = anon_client.get('/api/v1/categories/').json()
+        genres = anon_client.get('/api/v1/genres/').json()
+
+        expected = {
+            'title_count': 1, 'rating': 8,
+            'top_titles': [{'id': title.pk, 'name': 'Title', 'rating': 8}],
+        }
+        assert categories['results'] == [
+            {'name': 'Фильмы', 'slug': 'movie', **expected}
+        ], 'Проверьте, что список категорий отдаёт статистику'
+        assert genres['results'] == [
+            {'name': 'Драма', 'slug': 'drama', **expected}
+        ]
@@ -0,0 +1,48 @@
+import pytest
+
+from tests.fixtures.fixture_user import make_user
+
+
+@pytest.mark.django_db
+class TestUserDirectory:
+
+    @pytest.fixture(autouse=True)
+    def users(self):
+        make_user('Alice', role='moderator')
+        make_user('alfred')
+        make_user('bob')
+        make_user('carol', role='moderator')
+
+    def names(self, response):
+        assert response.status_code == 200, response.content
+        return [item['username'] for item in response.json()['results']]
+
+    def test_case_insensitive_prefix(self, admin_client):
+        response = admin_client.get('/api/v1/users/', {'search': 'AL'})
+        assert self.names(response) == ['Alice', 'alfred'], \
+            'Проверьте, что поиск идёт по началу username без учёта регистра'
+        response = admin_client.get('/api/v1/users/', {'search': 'lic'})
+        assert self.names(response) == []
+
+    def test_prefix_matches_email(self, admin_client):
+        response = admin_client.get('/api/v1/users/', {'search': 'BOB@'})
+        assert self.names(response) == ['bob']
+
+    def test_role_filter(self, admin_client):
+        response = admin_client.get(
+            '/api/v1/users/', {'role': 'moderator', 'search': 'a'}
+        )
+        assert self.names(response) == ['Alice']
+
+    def test_cursor_pagination(self, admin_client):
+        first = admin_client.get('/api/v1/users/', {'page_size': 3}).json()
+        assert len(first['results']) == 3 and 'count' not in first
+        second = admin_client.get(first['next']).json()
+        assert [item['username'] for item in second['results']] == \
+            ['carol', 'TestAdmin']
+        assert second['next'] is None
+
+    def test_only_admins(self, user_client):
+        assert user_client.get(
+            '/api/v1/users/', {'search': 'al'}
+        ).status_code == 403
@@ -0,0 +1,62 @@
+import pytest
+
+from api.models import Comment, Review, Title
+from tests.fixtures.fixture_user import make_user
+
+
+@pytest.mark.django_db
+class TestUserHistory:
+
+    @pytest.fixture
+    def history(self, title, user):
+        other = Title.objects.create(name='Other', year=2001)
+        stranger = make_user('stranger')
+        reviews = [
+            Review.objects.create(title=target, author=user, text='r', score=5)
+            for target in (title, other)
+        ]
+        Review.objects.create(title=title, author=stranger, text='r', score=1)
+        comments = [
+            Comment.objects.create(review=review, author=user, text='c')
+            for review in reviews
+        ]
+        return reviews, comments
+
+    def test_my_reviews_newest_first(self, user_client, history):
+        reviews, _ = history
+        response = user_client.get('/api/v1/users/me/reviews/')
+        assert response.status_code == 200
+        data = response.json()
+        assert [item['id'] for item in data['results']] == \
+            [review.pk for review in reversed(reviews)], \
+            'Проверьте, что отзывы пользователя отсортированы по дате'
+        assert data['results'][0]['title_name'] == 'Other'
+        assert 'next' in data and 'count' not in data
+
+    def test_my_history_requires_auth(self, anon_client):
+        assert anon_client.get(
+            '/api/v1/users/me/comments/'
+        ).status_code == 401
+
+    def test_public_comment_history(self, anon_client, user, history, title):
+        _, comments = history
+        response = anon_client.get(f'/api/v1/users/{user.username}/comments/')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [item['id'] for item in results] == \
+            [comment.pk for comment in reversed(comments)]
+        assert results[1]['title'] == title.pk
+        assert results[1]['title_name'] == title.name
+
+    def test_cursor_pages(self, anon_client, user, history):
+        url = f'/api/v1/users/{user.username}/reviews/'
+        first = anon_client.get(url, {'page_size': 1}).json()
+        second = anon_client.get(first['next']).json()
+        assert [first['results'][0]['id'], second['results'][0]['id']] == \
+            [review.pk for review in reversed(history[0])]
+        assert second['next'] is None
+
+    def test_removed_titles_are_hidden(self, anon_client, user, history):
+        Title.objects.filter(name='Other').update(is_removed=True)
+        response = anon_client.get(f'/api/v1/users/{user.username}/reviews/')
+        assert len(response.json()['results']) == 1